@@ -0,0 +1,112 @@
+import time
+from typing import Callable, List, Optional
+
+from internal.codegen.common.util import ListCollection, State
+from internal.codegen.php.ast import Identifier, Type
+from internal.codegen.php.convension import AccessModifier
+from internal.codegen.php.grammer import ClassDeclaration, MemberDeclaration
+
+SIZES = [10, 1000, 100000]
+ROUNDS = 3
+# the quadratic operations of the copying collection are not measured beyond this size
+COPYING_LIMIT = 10000
+
+
+#
+# the collection before it was made linear: every modification copies the list and filter is built on reduce
+class CopyingListCollection:
+    def __init__(self, elements: List):
+        self._elements = elements
+
+    def elements(self) -> List:
+        return self._elements.copy()
+
+    def add(self, element) -> None:
+        self._elements = self._elements.copy()
+        self._elements.append(element)
+
+    def map(self, fn: Callable) -> 'CopyingListCollection':
+        return CopyingListCollection([fn(elem) for elem in self._elements])
+
+    def fold(self, initial_state, fn: Callable) -> 'CopyingListCollection':
+        state = State(initial_state)
+        return self.map(lambda elem: state.forward(fn(state.state(), elem)))
+
+    def reduce(self, initial_state, fn: Callable):
+        elements = self.fold(initial_state, fn)._elements
+        return elements[-1] if len(elements) > 0 else None
+
+    def filter(self, fn: Callable) -> 'CopyingListCollection':
+        return CopyingListCollection(self.reduce([], lambda state, elem: [*state, elem] if fn(elem) else state))
+
+
+def build(make: Callable[[List], object], size: int) -> None:
+    collection = make([])
+
+    for i in range(size):
+        collection.add(i)
+
+
+def operations(make: Callable[[List], object], size: int, lazy: bool) -> List[Callable[[], object]]:
+    collection = make(list(range(size)))
+
+    if lazy:
+        chain = lambda: collection.lazy().map(lambda x: x * 3).filter(lambda x: x % 2 == 0).collect()
+    else:
+        chain = lambda: collection.map(lambda x: x * 3).filter(lambda x: x % 2 == 0)
+
+    return [
+        lambda: build(make, size),
+        lambda: collection.filter(lambda x: x % 2 == 0),
+        lambda: collection.reduce(0, lambda state, x: state + x),
+        chain,
+    ]
+
+
+#
+# builds a class through add_field, reading its fields after every member as the printers do
+def add_fields(size: int) -> None:
+    clazz = ClassDeclaration(Identifier("Dto"), [])
+
+    for i in range(size):
+        clazz.add_field(MemberDeclaration(Identifier("field{0}".format(i)), Type.any(), AccessModifier.public(), False))
+
+        if i % 100 == 0:
+            clazz.fields()
+
+
+def measure(fn: Callable[[], object]) -> float:
+    elapsed = []
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        elapsed.append(time.perf_counter() - start)
+
+    return min(elapsed)
+
+
+def format_ms(seconds: Optional[float]) -> str:
+    return "{0:>10.3f} ms".format(seconds * 1000) if seconds is not None else "{0:>13}".format("-")
+
+
+def main():
+    names = ["add", "filter", "reduce", "map + filter"]
+    print("{0:<14} {1:>7} {2:>13} {3:>13}".format("operation", "size", "copying", "linear"))
+
+    for size in SIZES:
+        copying = operations(CopyingListCollection, size, False)
+        linear = operations(ListCollection, size, True)
+
+        for i, name in enumerate(names):
+            # only reduce is linear in both, add, filter and the chain built on filter copy quadratically
+            old = measure(copying[i]) if size <= COPYING_LIMIT or name == "reduce" else None
+            print("{0:<14} {1:>7} {2} {3}".format(name, size, format_ms(old), format_ms(measure(linear[i]))))
+
+        # the fields of a class were a collection which copied itself on every add_field before the builder
+        print("{0:<14} {1:>7} {2} {3}".format("add_field", size, format_ms(None),
+                                              format_ms(measure(lambda: add_fields(size)))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import time
+from typing import Callable, List
+
+from internal.codegen.common.printer import Printer, PrinterFactory, PassThroughPrinter, printer_type_of
+from internal.codegen.php.printer.common import Printer as NodePrinter
+
+from benchmark.printer import make_class
+
+WIDTH = 1000
+ROUNDS = 5
+
+
+#
+# the dispatch before the registry: every create_printer imported its printer class on each call
+def local_import(node: PrinterFactory, parent: Printer) -> Printer:
+    from internal.codegen.php.printer.grammer import ClassDeclarationPrinter  # noqa: F401
+
+    return printer_type_of(type(node))(node, parent, node.printer_children())
+
+
+def registry(node: PrinterFactory, parent: Printer) -> Printer:
+    return node.create_printer(parent)
+
+
+#
+# the nodes which are dispatched through the registry, nodes with a create_printer of their own are skipped
+def collect(root: PrinterFactory) -> List[PrinterFactory]:
+    nodes = []
+    pending = list(PassThroughPrinter(None, [root]).children())
+
+    while len(pending) > 0:
+        printer = pending.pop()
+
+        if isinstance(printer, NodePrinter) and type(printer.node()).create_printer is PrinterFactory.create_printer:
+            nodes.append(printer.node())
+
+        pending.extend(printer.children())
+
+    return nodes
+
+
+def measure(create: Callable[[PrinterFactory, Printer], Printer], nodes: List[PrinterFactory]) -> float:
+    elapsed = []
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+
+        for node in nodes:
+            create(node, None)
+
+        elapsed.append(time.perf_counter() - start)
+
+    return min(elapsed)
+
+
+def main():
+    nodes = collect(make_class(WIDTH))
+
+    for name, create in (("local import", local_import), ("registry", registry)):
+        seconds = measure(create, nodes)
+        print("{0:<14} {1:>7} nodes {2:>9.2f} ms {3:>9.0f} ns/node".format(
+            name, len(nodes), seconds * 1000, seconds / len(nodes) * 1e9
+        ))
+
+
+if __name__ == '__main__':
+    main()
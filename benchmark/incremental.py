@@ -0,0 +1,57 @@
+import time
+from typing import Optional
+
+from internal.codegen.common.cache import IncrementalCache
+from internal.codegen.common.printer import PassThroughPrinter, PrintContext, PrinterConfig, ChunkSink
+from internal.codegen.php.ast import Identifier, Type
+from internal.codegen.php.convension import AccessModifier
+from internal.codegen.php.grammer import ClassDeclaration, MemberDeclaration
+from internal.codegen.php.middleware import IndentMiddleware
+from internal.codegen.php.util import StatementBlockCollection
+
+from benchmark.printer import make_class
+
+WIDTHS = [100, 1000]
+EDITS = 20
+
+
+def render(root: StatementBlockCollection, incremental_cache: Optional[IncrementalCache]) -> str:
+    sink = ChunkSink()
+    PassThroughPrinter(None, [root]) \
+        .emit(PrintContext.initial(PrinterConfig.default(), [IndentMiddleware()],
+                                   incremental_cache=incremental_cache), sink)
+
+    return sink.getvalue()
+
+
+#
+# adds one member at a time to a class and prints the whole file again after each one
+def edit_and_print(width: int, incremental_cache: Optional[IncrementalCache]) -> float:
+    clazz = make_class(width)  # type: ClassDeclaration
+    root = StatementBlockCollection([clazz])
+    render(root, incremental_cache)
+    elapsed = 0.0
+
+    for i in range(EDITS):
+        clazz.add_field(MemberDeclaration(Identifier("added{0}".format(i)), Type.any(), AccessModifier.public(), False))
+
+        start = time.perf_counter()
+        output = render(root, incremental_cache)
+        elapsed += time.perf_counter() - start
+
+        if incremental_cache is not None and output != render(root, None):
+            raise ValueError("the incremental output differs from the full one")
+
+    return elapsed / EDITS
+
+
+def main():
+    for width in WIDTHS:
+        for mode, incremental_cache in (("full", None), ("incremental", IncrementalCache())):
+            print("class of {0} fields {1:<12} {2:>9.2f} ms per edit".format(
+                width, mode, edit_and_print(width, incremental_cache) * 1000
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from internal.codegen.common.ast import Node
+from internal.codegen.php.ast import Identifier
+from internal.codegen.php.generator import v1_fragment_builders
+from internal.codegen.php.grammer import ClassDeclaration
+from internal.spec import Spec
+
+from benchmark.printer import render
+from benchmark.spec import make_spec
+
+WIDTH = 500
+ROUNDS = 5
+
+
+#
+# the bytes and the number of memory blocks which are still allocated after fn returns, along with its result
+def retained(fn: Callable[[], object]) -> Tuple[object, int, int]:
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = snapshot.statistics('filename')
+
+    return result, sum(stat.size for stat in stats), sum(stat.count for stat in stats)
+
+
+def peak(fn: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, size = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return size
+
+
+def measure(fn: Callable[[], object]) -> float:
+    elapsed = []
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        elapsed.append(time.perf_counter() - start)
+
+    return min(elapsed)
+
+
+def make_class(spec: Spec) -> ClassDeclaration:
+    return ClassDeclaration(Identifier(spec.lang().php().clazz()), [
+        stmt for _, build in v1_fragment_builders(spec) for stmt in build()
+    ])
+
+
+def count_instances(base: type) -> int:
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, base))
+
+
+DICT_BACKED = {}  # type: Dict[type, type]
+
+
+def slot_values(value: Any) -> List[Tuple[str, Any]]:
+    names = []
+
+    for base in type(value).__mro__:
+        slots = base.__dict__.get('__slots__', ())
+        names.extend(name for name in ([slots] if isinstance(slots, str) else slots) if name != '__weakref__')
+
+    return [(name, getattr(value, name)) for name in names if hasattr(value, name)]
+
+
+#
+# a copy of the tree, with every instance either of its own class or of a class without __slots__ which keeps
+# the attributes in a __dict__ the way the classes did before. lists and shared instances are copied as well,
+# strings and other values are shared with the tree, so that the two kinds of copies only differ in the instances
+def copy_tree(value: Any, dict_backed: bool, copies: Dict[int, Any] = None) -> Any:
+    if copies is None:
+        copies = {}
+
+    if id(value) in copies:
+        return copies[id(value)]
+
+    clazz = type(value)
+
+    if clazz is list or clazz is tuple:
+        copy = clazz([copy_tree(elem, dict_backed, copies) for elem in value])
+    elif clazz is dict:
+        copy = {key: copy_tree(elem, dict_backed, copies) for key, elem in value.items()}
+    elif hasattr(clazz, '__slots__') and clazz.__module__.startswith('internal.'):
+        if not dict_backed:
+            copy = object.__new__(clazz)
+        else:
+            if clazz not in DICT_BACKED:
+                DICT_BACKED[clazz] = type(clazz.__name__, (), {})
+
+            copy = DICT_BACKED[clazz]()
+
+        copies[id(value)] = copy
+
+        for name, attr in slot_values(value):
+            setattr(copy, name, copy_tree(attr, dict_backed, copies))
+
+        return copy
+    else:
+        return value
+
+    copies[id(value)] = copy
+
+    return copy
+
+
+def main():
+    spec = Spec.parse(make_spec(WIDTH))
+    clazz, size, blocks = retained(lambda: make_class(spec))
+    nodes = count_instances(Node)
+    print("DTO of {0} fields".format(WIDTH))
+    print("  ast         {0:>7} nodes {1:>9.1f} KiB {2:>8} blocks {3:>6.1f} B per node".format(
+        nodes, size / 1024, blocks, size / nodes
+    ))
+
+    # the instances of the tree without the strings, with __slots__ and with a __dict__ per instance
+    sizes = []
+
+    for name, dict_backed in (("__slots__", False), ("__dict__", True)):
+        _, copy_size, copy_blocks = retained(lambda: copy_tree(clazz, dict_backed))
+        sizes.append(copy_size)
+        print("  {0:<11} {1:>7} nodes {2:>9.1f} KiB {3:>8} blocks {4:>6.1f} B per node".format(
+            name, nodes, copy_size / 1024, copy_blocks, copy_size / nodes
+        ))
+
+    print("  __slots__ save {0:.1f} KiB, {1:.1f}% of the memory of the instances".format(
+        (sizes[1] - sizes[0]) / 1024, 100 * (1 - sizes[0] / sizes[1])
+    ))
+
+    # the printers of a tree are kept by their parents until the whole tree is printed
+    print("  printing    peak {0:>9.1f} KiB {1:>9.2f} ms".format(
+        peak(lambda: render(clazz, True)) / 1024, measure(lambda: render(clazz, True)) * 1000
+    ))
+    print("  building    {0:>9.2f} ms".format(measure(lambda: make_class(spec)) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import io
+import time
+from typing import List, Optional
+
+from internal.codegen.common.plan import RenderPlans
+from internal.codegen.php import PHPGenerator
+from internal.spec import Spec
+
+from benchmark.spec import make_spec
+
+COUNT = 1000
+WIDTH = 20
+ROUNDS = 3
+
+
+#
+# DTOs of the same shape, which only differ in the names of the class and its fields
+def make_specs(count: int, width: int) -> List[Spec]:
+    specs = []
+
+    for i in range(count):
+        spec = make_spec(width)
+        spec["lang"]["php"]["clazz"] = "Dto{0}".format(i)
+
+        for field in spec["fields"]:
+            field["name"] = "dto{0}_{1}".format(i, field["name"])
+
+        specs.append(Spec.parse(spec))
+
+    return specs
+
+
+def render(specs: List[Spec], render_plans: Optional[RenderPlans]) -> str:
+    gen = PHPGenerator(render_plans=render_plans)
+    fp = io.StringIO()
+
+    for spec in specs:
+        gen.generate(spec, fp)
+
+    return fp.getvalue()
+
+
+def main():
+    specs = make_specs(COUNT, WIDTH)
+    expected = render(specs, None)
+
+    for mode in ("tree", "plans"):
+        elapsed = []
+
+        for _ in range(ROUNDS):
+            render_plans = RenderPlans() if mode == "plans" else None
+            start = time.perf_counter()
+            output = render(specs, render_plans)
+            elapsed.append(time.perf_counter() - start)
+
+            if output != expected:
+                raise ValueError("the output of {0} differs from the tree printer".format(mode))
+
+        print("{0} DTOs of {1} fields {2:<6} {3:>9.2f} ms".format(COUNT, WIDTH, mode, min(elapsed) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import time
+from typing import Callable, Optional
+
+from internal.codegen.common.printer import PassThroughPrinter, PrintContext, PrinterConfig, Indent, IndentStyle, \
+    PrinterFactory, ChunkSink
+from internal.codegen.php.ast import Identifier, Type
+from internal.codegen.php.element import ParameterList
+from internal.codegen.php.generator import v1_fragment_builders
+from internal.codegen.php.grammer import ClassDeclaration, InvocationStatement, NamedCallableReference, \
+    AnyEvaluation
+from internal.codegen.php.middleware import IndentMiddleware
+from internal.codegen.php.util import StatementBlockCollection
+from internal.spec import Spec
+
+from benchmark.spec import make_spec
+
+DEPTHS = [100, 1000, 10000]
+WIDTH = 1000
+ROUNDS = 5
+
+
+#
+# f(f(f(...f($x)...))), every level is five printers deep
+def make_invocation(depth: int) -> InvocationStatement:
+    evaluation = AnyEvaluation("$x", Type.any())
+
+    for _ in range(depth):
+        evaluation = InvocationStatement(NamedCallableReference("f"), Type.any(), ParameterList([evaluation]))
+
+    return evaluation
+
+
+def make_class(width: int) -> ClassDeclaration:
+    spec = Spec.parse(make_spec(width))
+
+    return ClassDeclaration(Identifier(spec.lang().php().clazz()), [
+        stmt for _, build in v1_fragment_builders(spec) for stmt in build()
+    ])
+
+
+def render(node: PrinterFactory, iterative: bool) -> str:
+    config = PrinterConfig(Indent(4, IndentStyle.space()), iterative)
+    sink = ChunkSink()
+    PassThroughPrinter(None, [StatementBlockCollection([node])]) \
+        .emit(PrintContext.initial(config, [IndentMiddleware()]), sink)
+
+    return sink.getvalue()
+
+
+def measure(fn: Callable[[], str]) -> Optional[float]:
+    elapsed = []
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+
+        try:
+            fn()
+        except RecursionError:
+            return None
+
+        elapsed.append(time.perf_counter() - start)
+
+    return min(elapsed)
+
+
+def report(name: str, mode: str, seconds: Optional[float]):
+    if seconds is None:
+        print("{0:<22} {1:<10} {2:>12}".format(name, mode, "RecursionError"))
+    else:
+        print("{0:<22} {1:<10} {2:>9.2f} ms".format(name, mode, seconds * 1000))
+
+
+def main():
+    cases = [("depth {0}".format(depth), make_invocation(depth)) for depth in DEPTHS]
+    cases.append(("class of {0} fields".format(WIDTH), make_class(WIDTH)))
+
+    for name, node in cases:
+        for mode, iterative in (("recursive", False), ("iterative", True)):
+            report(name, mode, measure(lambda: render(node, iterative)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from copy import deepcopy
+from typing import Callable, Tuple
+
+from internal.spec import Spec, parse_file
+
+WIDTHS = [100, 1000, 10000]
+ROUNDS = 5
+
+TYPES = ["string", "integer", "float", "boolean", "datetime", "any"]
+
+
+def make_spec(width: int) -> dict:
+    fields = []
+
+    for i in range(width):
+        field = {"name": "field{0}".format(i), "type": TYPES[i % len(TYPES)]}
+
+        if i % 3 == 0:
+            field["comment"] = "comment of field {0}".format(i)
+
+        if i % 2 == 0:
+            field["groups"] = [{"name": "api", "member": "field_{0}".format(i)}]
+
+        fields.append(field)
+
+    return {
+        "outDir": "out",
+        "lang": {"php": {"namespace": "App\\Dto", "clazz": "Wide"}, "ts": {"clazz": "Wide"}},
+        "fields": fields,
+    }
+
+
+#
+# the parse path before streaming: load, deep-copy, then build every field
+def eager_parse_file(spec_file: str) -> Spec:
+    with open(spec_file, "r", encoding='utf8') as fp:
+        spec_json = json.load(fp)
+
+    return Spec.parse(deepcopy(spec_json))
+
+
+def measure(fn: Callable[[str], Spec], spec_file: str) -> Tuple[float, int]:
+    elapsed = []
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(spec_file)
+        elapsed.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(spec_file)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(elapsed), peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for width in WIDTHS:
+            spec_file = os.path.join(tmp, "wide{0}.json".format(width))
+
+            with open(spec_file, "w", encoding="utf-8") as fp:
+                json.dump(make_spec(width), fp, indent=2)
+
+            for name, fn in (("eager", eager_parse_file), ("streaming", parse_file)):
+                seconds, peak = measure(fn, spec_file)
+                print("{0:>6} fields  {1:<10} {2:>9.2f} ms  peak {3:>9.1f} KiB".format(
+                    width, name, seconds * 1000, peak / 1024
+                ))
+
+
+if __name__ == '__main__':
+    main()
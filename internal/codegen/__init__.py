@@ -1,9 +1,32 @@
-from typing import IO
+from typing import IO, List, Dict, Optional
 
-from internal.spec import Spec
+from internal.spec import Spec, SpecDiff
+from internal.codegen.common.cache import RenderCache, IncrementalCache
+from internal.codegen.common.plan import RenderPlans
+from internal.codegen.common.profile import PrintProfiler
+from internal.util import upper_first
 
 
 class Generator:
+    def __init__(self, render_cache: RenderCache = None, profiler: PrintProfiler = None,
+                 render_plans: RenderPlans = None, incremental_cache: IncrementalCache = None):
+        self._render_cache = render_cache
+        self._profiler = profiler
+        self._render_plans = render_plans
+        self._incremental_cache = incremental_cache
+
+    def render_cache(self) -> Optional[RenderCache]:
+        return self._render_cache
+
+    def profiler(self) -> Optional[PrintProfiler]:
+        return self._profiler
+
+    def render_plans(self) -> Optional[RenderPlans]:
+        return self._render_plans
+
+    def incremental_cache(self) -> Optional[IncrementalCache]:
+        return self._incremental_cache
+
     @staticmethod
     def get_extension() -> str:
         raise NotImplementedError()
@@ -14,3 +37,37 @@ class Generator:
 
     def generate(self, spec: Spec, fp: IO) -> None:
         raise NotImplementedError()
+
+    def fragment_names(self, spec: Spec) -> List[str]:
+        raise NotImplementedError()
+
+    #
+    # returns None when the whole file has to be generated again
+    def affected_fragments(self, diff: SpecDiff) -> Optional[List[str]]:
+        raise NotImplementedError()
+
+    def generate_fragments(self, spec: Spec, names: List[str]) -> Dict[str, str]:
+        raise NotImplementedError()
+
+
+#
+# names the members and methods whose output differs between the two versions of a spec,
+# removed fragments are included so that callers can drop them
+def collect_affected_fragments(diff: SpecDiff, suffix: str) -> List[str]:
+    names = []
+
+    for name in [*diff.added(), *diff.removed(), *diff.retyped(), *diff.recommented()]:
+        if name not in names:
+            names.append(name)
+
+    if diff.fields_changed():
+        names.append("from{0}()".format(suffix))
+
+    names.extend("from{0}()".format(upper_first(name)) for name in sorted(diff.deserializing_groups()))
+
+    if diff.fields_changed():
+        names.append("to{0}()".format(suffix))
+
+    names.extend("to{0}()".format(upper_first(name)) for name in sorted(diff.serializing_groups()))
+
+    return names
@@ -1,15 +1,61 @@
-from typing import List, TypeVar, Generic
+from typing import List, TypeVar, Generic, Optional, Any
+from weakref import ref
 
 T = TypeVar('T')
 
 
-class Node(Generic[T]):
+#
+# counts the modifications of a node. modifying a node raises its version and the versions of the nodes
+# which adopted it, so that output rendered for a version can be reused as long as the version holds.
+# nodes are modified through their own methods only, which touch them.
+# the slots of the attributes are declared by the classes which mix Versioned in, along with __weakref__
+class Versioned:
+    __slots__ = ()
+
+    # the attributes of Versioned are not part of the structure of a node, see transient_names()
+    TRANSIENT = {'_version': 0, '_parents': None}
+
+    def __new__(cls, *args, **kwargs):
+        instance = super().__new__(cls)
+        instance._version = 0
+        instance._parents = None  # type: Optional[List[ref]]
+
+        return instance
+
+    def version(self) -> int:
+        return self._version
+
+    def touch(self) -> None:
+        self._version += 1
+
+        if self._parents is not None:
+            for parent_ref in self._parents:
+                parent = parent_ref()
+
+                if parent is not None:
+                    parent.touch()
+
+    #
+    # the children are held by the node, their parents are held weakly
+    def adopt(self, *children: Any) -> None:
+        for child in children:
+            if isinstance(child, Versioned):
+                if child._parents is None:
+                    child._parents = []
+
+                child._parents.append(ref(self))
+
+
+class Node(Versioned, Generic[T]):
+    __slots__ = ('_concept', '_children', '_version', '_parents', '__weakref__')
+
     def __init__(self, concept: T, children: List['Node'] = None):
         if children is None:
             children = []
 
         self._concept = concept
         self._children = children
+        self.adopt(*children)
 
     def concept(self) -> T:
         return self._concept
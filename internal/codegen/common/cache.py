@@ -0,0 +1,259 @@
+from collections import OrderedDict
+from types import ModuleType
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from internal.codegen.common.ast import Versioned
+
+PRIMITIVES = {str, int, float, bool, type(None)}
+
+
+#
+# functions, classes and modules are compared by identity rather than by their attributes
+def is_opaque(value: Any) -> bool:
+    return callable(value) or isinstance(value, ModuleType)
+
+
+#
+# assigns the same id to structurally identical nodes: nodes of the same type whose attributes are equal,
+# comparing nested nodes by their ids. ids are memoized per version of a node, see Versioned.
+# beyond the capacity the least recently used structures are forgotten, ids are never reused, so a forgotten
+# structure gets a new id when it is seen again and keys which were made with the old one only miss
+class StructuralKeys:
+    def __init__(self, capacity: int = None):
+        self._ids = OrderedDict()  # type: OrderedDict
+        self._capacity = capacity
+        self._next_id = 0
+        self._memo = WeakKeyDictionary()  # type: WeakKeyDictionary
+
+    def key(self, value: Any) -> Hashable:
+        clazz = type(value)
+
+        if clazz in PRIMITIVES:
+            return value
+
+        if clazz is list or clazz is tuple:
+            return tuple([self.key(elem) for elem in value])
+
+        if clazz is dict:
+            return tuple([(key, self.key(elem)) for key, elem in value.items()])
+
+        if is_opaque(value):
+            return id(value)
+
+        version = getattr(value, '_version', 0)
+
+        # most nodes are keyed once, looking them up without raising KeyError keeps the first time cheap
+        try:
+            entry = self._memo.get(value)
+            memoizable = True
+        except TypeError:
+            entry = None
+            memoizable = False
+
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        signature = (clazz, tuple([self.key(attr) for attr in attributes(value) if attr is not value]))
+        key = self._ids.get(signature)
+
+        if key is None:
+            key = self._next_id
+            self._next_id += 1
+            self._ids[signature] = key
+
+            if self._capacity is not None and len(self._ids) > self._capacity:
+                self._ids.popitem(last=False)
+        elif self._capacity is not None:
+            self._ids.move_to_end(signature)
+
+        if memoizable:
+            self._memo[value] = (version, key)
+
+        return key
+
+    def count(self) -> int:
+        return len(self._ids)
+
+
+SLOTS = {}  # type: Dict[type, List[str]]
+TRANSIENTS = {}  # type: Dict[type, Tuple[str, ...]]
+
+
+#
+# the attributes which a class and its bases declare in TRANSIENT along with their defaults, such as bookkeeping
+# of modifications, are not part of the structure of its instances
+def transient_names(clazz: type) -> Tuple[str, ...]:
+    if clazz not in TRANSIENTS:
+        names = []
+
+        for base in clazz.__mro__:
+            names.extend(base.__dict__.get('TRANSIENT', ()))
+
+        TRANSIENTS[clazz] = tuple(names)
+
+    return TRANSIENTS[clazz]
+
+
+def reset_transients(value: Any) -> None:
+    for base in reversed(type(value).__mro__):
+        for name, default in base.__dict__.get('TRANSIENT', {}).items():
+            setattr(value, name, default)
+
+
+def slot_names(clazz: type) -> List[str]:
+    if clazz not in SLOTS:
+        names = []
+        transient = transient_names(clazz)
+
+        for base in clazz.__mro__:
+            slots = base.__dict__.get('__slots__', ())
+
+            for name in [slots] if isinstance(slots, str) else slots:
+                if name not in ('__weakref__', '__dict__') and name not in transient:
+                    names.append(name)
+
+        SLOTS[clazz] = names
+
+    return SLOTS[clazz]
+
+
+def attributes(value: Any) -> List[Any]:
+    clazz = type(value)
+    values = [getattr(value, name) for name in slot_names(clazz) if hasattr(value, name)]
+
+    if hasattr(value, '__dict__'):
+        transient = transient_names(clazz)
+
+        if len(transient) > 0:
+            values.extend([attr for name, attr in value.__dict__.items() if name not in transient])
+        else:
+            values.extend(value.__dict__.values())
+
+    return values
+
+
+def named_attributes(value: Any) -> List[Tuple[str, Any]]:
+    clazz = type(value)
+    attrs = [(name, getattr(value, name)) for name in slot_names(clazz) if hasattr(value, name)]
+
+    if hasattr(value, '__dict__'):
+        transient = transient_names(clazz)
+        attrs.extend((name, attr) for name, attr in value.__dict__.items() if name not in transient)
+
+    return attrs
+
+
+class RenderCacheStats:
+    def __init__(self, hits: int, misses: int, evictions: int, size: int):
+        self._hits = hits
+        self._misses = misses
+        self._evictions = evictions
+        self._size = size
+
+    def hits(self) -> int:
+        return self._hits
+
+    def misses(self) -> int:
+        return self._misses
+
+    def evictions(self) -> int:
+        return self._evictions
+
+    def size(self) -> int:
+        return self._size
+
+    def hit_rate(self) -> float:
+        total = self._hits + self._misses
+
+        return self._hits / total if total > 0 else 0.0
+
+    def __str__(self):
+        return "{0} hit(s), {1} miss(es), {2} eviction(s), {3} entrie(s), hit rate {4:.1%}".format(
+            self._hits, self._misses, self._evictions, self._size, self.hit_rate()
+        )
+
+
+# a cached subtree is keyed through the structures of its nested nodes, which are kept along with it
+STRUCTURES_PER_ENTRY = 8
+
+
+#
+# the rendered output of printers, least recently used entries are evicted beyond the capacity.
+# a cache should only be used with one set of middlewares, since they are not part of the key
+class RenderCache:
+    def __init__(self, capacity: int = 4096):
+        self._capacity = capacity
+        self._entries = OrderedDict()  # type: OrderedDict
+        self._keys = StructuralKeys(capacity * STRUCTURES_PER_ENTRY)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def capacity(self) -> int:
+        return self._capacity
+
+    def key(self, node: Any, indent_size: int, config_key: Hashable) -> Hashable:
+        return self._keys.key(node), indent_size, config_key
+
+    def get(self, key: Hashable) -> Optional[str]:
+        content = self._entries.get(key)
+
+        if content is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._entries.move_to_end(key)
+
+        return content
+
+    def put(self, key: Hashable, content: str) -> None:
+        self._entries[key] = content
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def stats(self) -> RenderCacheStats:
+        return RenderCacheStats(self._hits, self._misses, self._evictions, len(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys = StructuralKeys(self._capacity * STRUCTURES_PER_ENTRY)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+
+#
+# the last output of every node, which is reused for as long as the version of the node holds, see Versioned.
+# nodes are held weakly and only their latest output is kept, a node printed in another context replaces it
+class IncrementalCache:
+    def __init__(self):
+        self._entries = WeakKeyDictionary()  # type: WeakKeyDictionary
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, node: Versioned, context: Hashable) -> Optional[str]:
+        entry = self._entries.get(node)
+
+        if entry is None or entry[0] != node.version() or entry[1] != context:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+
+        return entry[2]
+
+    def put(self, node: Versioned, context: Hashable, content: str) -> None:
+        self._entries[node] = (node.version(), context, content)
+
+    def stats(self) -> RenderCacheStats:
+        return RenderCacheStats(self._hits, self._misses, 0, len(self._entries))
+
+    def clear(self) -> None:
+        self._entries = WeakKeyDictionary()
+        self._hits = 0
+        self._misses = 0
@@ -0,0 +1,149 @@
+from typing import List, Tuple, Any, Callable
+
+TEXT = 0
+LINE = 1
+BEGIN = 2
+END = 3
+NEST = 4
+UNNEST = 5
+INDENT = 6
+DEDENT = 7
+
+# the width of a group which contains a hard line break, it never fits
+UNFITTABLE = 1 << 62
+
+
+#
+# lays out a group of documents in the manner of Wadler and Oppen: a group is printed flat if it fits into the
+# width, otherwise each line of the group breaks and is indented by the nests around it. the tokens are buffered
+# until the line on which the outermost group ends is complete, then laid out in linear time. columns are counted
+# from the start of the line: the tokens start at the column and broken lines at the margin, the indentation of the sink
+class Layout:
+    def __init__(self, width: int, nest: str = "", column: int = 0, margin: int = 0):
+        self._width = width
+        self._nest = nest
+        self._column = column
+        self._margin = margin
+        self._tokens = []  # type: List[Tuple[int, Any]]
+        self._depth = 0
+
+    def text(self, chunk: str) -> None:
+        self._tokens.append((TEXT, chunk))
+
+    #
+    # a line break, which is replaced by the flat text if the group fits
+    def line(self, flat: str = " ") -> None:
+        self._tokens.append((LINE, flat))
+
+    def begin(self) -> None:
+        self._tokens.append((BEGIN, None))
+        self._depth += 1
+
+    def end(self) -> None:
+        self._tokens.append((END, None))
+        self._depth -= 1
+
+    #
+    # False once the outermost group has ended, text may still follow it on the same line
+    def is_open(self) -> bool:
+        return self._depth > 0
+
+    def nest(self, prefix: str) -> None:
+        self._tokens.append((NEST, prefix))
+
+    def unnest(self) -> None:
+        self._tokens.append((UNNEST, None))
+
+    def indent(self, prefix: str) -> None:
+        self._tokens.append((INDENT, prefix))
+
+    def dedent(self) -> None:
+        self._tokens.append((DEDENT, None))
+
+    def render(self, write: Callable[[str], None], indent: Callable[[str], None], dedent: Callable[[], None]) -> None:
+        tokens = self._tokens
+        sizes, ends, following = self._measure()
+        column = self._column
+        flat = []  # type: List[bool]
+        nests = [self._nest]
+        margins = [self._margin]
+        # the text between changes of the indentation is written at once
+        out = []  # type: List[str]
+
+        for i, (kind, value) in enumerate(tokens):
+            if kind == TEXT:
+                out.append(value)
+                column = column + len(value) if "\n" not in value else margins[-1] + len(value) - value.rfind("\n") - 1
+            elif kind == LINE:
+                if len(flat) > 0 and flat[-1]:
+                    out.append(value)
+                    column += len(value)
+                else:
+                    out.append("\n")
+                    out.append(nests[-1])
+                    column = margins[-1] + len(nests[-1])
+            elif kind == BEGIN:
+                if len(flat) > 0 and flat[-1]:
+                    flat.append(True)
+                else:
+                    flat.append(column + sizes[i] + following[ends[i]] <= self._width)
+            elif kind == END:
+                flat.pop()
+            elif kind == NEST:
+                nests.append(nests[-1] + value)
+            elif kind == UNNEST:
+                nests.pop()
+            else:
+                if len(out) > 0:
+                    write("".join(out))
+                    out = []
+
+                if kind == INDENT:
+                    indent(value)
+                    margins.append(margins[-1] + len(value))
+                else:
+                    dedent()
+                    margins.pop()
+
+        if len(out) > 0:
+            write("".join(out))
+
+    #
+    # the flat width and the end of every group, and the width of the text following every end up to the next line
+    def _measure(self) -> Tuple[List[int], List[int], List[int]]:
+        tokens = self._tokens
+        sizes = [0] * len(tokens)
+        ends = [0] * len(tokens)
+        following = [0] * len(tokens)
+        stack = []  # type: List[Tuple[int, int, int]]
+        total = 0
+        hard = 0
+
+        for i, (kind, value) in enumerate(tokens):
+            if kind == TEXT:
+                total += len(value)
+
+                if "\n" in value:
+                    hard += 1
+            elif kind == LINE:
+                total += len(value)
+            elif kind == BEGIN:
+                stack.append((i, total, hard))
+            elif kind == END:
+                begin, begin_total, begin_hard = stack.pop()
+                sizes[begin] = total - begin_total if hard == begin_hard else UNFITTABLE
+                ends[begin] = i
+
+        running = 0
+
+        for i in range(len(tokens) - 1, -1, -1):
+            kind, value = tokens[i]
+
+            if kind == TEXT:
+                running = running + len(value) if "\n" not in value else value.index("\n")
+            elif kind == LINE:
+                running = 0
+            elif kind == END:
+                following[i] = running
+
+        return sizes, ends, following
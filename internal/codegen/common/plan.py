@@ -0,0 +1,245 @@
+import re
+from copy import copy
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple, Union
+
+from internal.codegen.common.cache import PRIMITIVES, is_opaque, named_attributes, reset_transients
+
+SENTINEL = re.compile("\x00([0-9]+)\x01")
+
+# (name of the sink method, arguments), the arguments of "write" are literal chunks and indices of strings
+Op = Tuple[str, List[Union[str, int]]]
+
+
+#
+# the paths from the node to its strings in the order substitute() visits them,
+# a step is (True, name) for an attribute and (False, key) for an item of a list or a dict
+def string_paths(value: Any, path: Tuple = (), out: List[Tuple] = None) -> List[Tuple]:
+    if out is None:
+        out = []
+
+    clazz = type(value)
+
+    if clazz is str:
+        out.append(path)
+    elif clazz in PRIMITIVES or is_opaque(value):
+        pass
+    elif clazz is list or clazz is tuple:
+        for i, elem in enumerate(value):
+            string_paths(elem, path + ((False, i),), out)
+    elif clazz is dict:
+        for key, elem in value.items():
+            string_paths(elem, path + ((False, key),), out)
+    else:
+        for name, elem in named_attributes(value):
+            if elem is not value:
+                string_paths(elem, path + ((True, name),), out)
+
+    return out
+
+
+#
+# a function which follows the path, consecutive attributes are looked up by a single attrgetter
+def getter(path: Tuple) -> Callable[[Any], Any]:
+    fns = []  # type: List[Callable[[Any], Any]]
+    names = []  # type: List[str]
+
+    for is_attribute, key in path:
+        if is_attribute:
+            names.append(key)
+            continue
+
+        if len(names) > 0:
+            fns.append(attrgetter(".".join(names)))
+            names = []
+
+        fns.append(itemgetter(key))
+
+    if len(names) > 0:
+        fns.append(attrgetter(".".join(names)))
+
+    if len(fns) == 1:
+        return fns[0]
+
+    def get(value: Any) -> Any:
+        for fn in fns:
+            value = fn(value)
+
+        return value
+
+    return get
+
+
+#
+# a copy of the node in which every string is replaced in the order of string_paths(),
+# nodes shared between parents are copied per occurrence
+def substitute(value: Any, fn: Callable[[str], str]) -> Any:
+    clazz = type(value)
+
+    if clazz is str:
+        return fn(value)
+
+    if clazz in PRIMITIVES or is_opaque(value):
+        return value
+
+    if clazz is list or clazz is tuple:
+        return clazz([substitute(elem, fn) for elem in value])
+
+    if clazz is dict:
+        return {key: substitute(elem, fn) for key, elem in value.items()}
+
+    clone = copy(value)
+
+    for name, elem in named_attributes(value):
+        if elem is not value:
+            setattr(clone, name, substitute(elem, fn))
+
+    # the copy is neither adopted by the parents of the node nor shares what the node derived from itself
+    reset_transients(clone)
+
+    return clone
+
+
+def sentinel(index: int) -> str:
+    return "\x00{0}\x01".format(index)
+
+
+#
+# the sink operations of a printer with the strings of its node left as slots,
+# only the strings which are actually written are looked up in a node
+class Plan:
+    def __init__(self, ops: List[Op], getters: List[Callable[[Any], Any]]):
+        self._ops = ops
+        self._getters = getters
+
+    #
+    # compiles the operations recorded while printing a copy of a node whose strings were replaced by sentinels,
+    # the paths lead to the strings of the node. None if a string ended up elsewhere than in the written text
+    @staticmethod
+    def compile(ops: List[Op], paths: List[Tuple]) -> Optional['Plan']:
+        compiled = []  # type: List[Op]
+        # the index of the slot of every string which is written
+        slots = {}  # type: Dict[int, int]
+
+        for name, args in ops:
+            if name != "write":
+                if any(isinstance(arg, str) and "\x00" in arg for arg in args):
+                    return None
+
+                compiled.append((name, args))
+                continue
+
+            parts = []  # type: List[Union[str, int]]
+            text = "".join(args)
+            start = 0
+
+            for match in SENTINEL.finditer(text):
+                if match.start() > start:
+                    parts.append(text[start:match.start()])
+
+                parts.append(slots.setdefault(int(match.group(1)), len(slots)))
+                start = match.end()
+
+            if start < len(text):
+                parts.append(text[start:])
+
+            if any(type(part) is str and "\x00" in part for part in parts):
+                return None
+
+            compiled.append((name, parts))
+
+        getters = [None] * len(slots)  # type: List[Callable[[Any], Any]]
+
+        for index, slot in slots.items():
+            getters[slot] = getter(paths[index])
+
+        return Plan(compiled, getters)
+
+    def values(self, node: Any) -> List[str]:
+        return [get(node) for get in self._getters]
+
+    #
+    # the operations with the strings of the node filled in, every write in one piece
+    def ops(self, node: Any) -> List[Op]:
+        values = self.values(node)
+
+        return [(name, [fill(args, values)] if name == "write" else args) for name, args in self._ops]
+
+    def execute(self, node: Any, sink: Any) -> None:
+        values = self.values(node)
+
+        for name, args in self._ops:
+            if name == "write":
+                sink.write(fill(args, values))
+            else:
+                getattr(sink, name)(*args)
+
+
+def fill(parts: List[Union[str, int]], values: List[str]) -> str:
+    return "".join([part if type(part) is str else values[part] for part in parts])
+
+
+class RenderPlansStats:
+    def __init__(self, hits: int, compiled: int, rejected: int):
+        self._hits = hits
+        self._compiled = compiled
+        self._rejected = rejected
+
+    def hits(self) -> int:
+        return self._hits
+
+    def compiled(self) -> int:
+        return self._compiled
+
+    #
+    # shapes whose output depends on more than the position of their strings, they are always printed
+    def rejected(self) -> int:
+        return self._rejected
+
+    def __str__(self):
+        return "{0} hit(s), {1} plan(s) compiled, {2} shape(s) rejected".format(
+            self._hits, self._compiled, self._rejected
+        )
+
+
+#
+# render plans per shape of node, see Printer.plan_key(). a plan is compiled the second time a shape is printed,
+# so that shapes which only occur once cost nothing. like a render cache, plans should only be used with
+# one set of middlewares
+class RenderPlans:
+    def __init__(self):
+        self._plans = {}  # type: Dict[Hashable, Optional[Plan]]
+        self._seen = set()  # type: Set[Hashable]
+        self._hits = 0
+        self._compiled = 0
+        self._rejected = 0
+
+    def get(self, key: Hashable) -> Optional[Plan]:
+        plan = self._plans.get(key)
+
+        if plan is not None:
+            self._hits += 1
+
+        return plan
+
+    def should_compile(self, key: Hashable) -> bool:
+        if key in self._plans:
+            return False
+
+        if key in self._seen:
+            return True
+
+        self._seen.add(key)
+
+        return False
+
+    def put(self, key: Hashable, plan: Optional[Plan]) -> None:
+        self._plans[key] = plan
+
+        if plan is None:
+            self._rejected += 1
+        else:
+            self._compiled += 1
+
+    def stats(self) -> RenderPlansStats:
+        return RenderPlansStats(self._hits, self._compiled, self._rejected)
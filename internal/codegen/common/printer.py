@@ -1,7 +1,12 @@
-from typing import List, Callable, Optional, Any
+from typing import List, Callable, Optional, Any, IO, Dict, Tuple, Iterator, Type, TypeVar, Hashable
 from abc import ABC, abstractmethod
-from copy import copy
+from string import Formatter
 
+from internal.codegen.common.ast import Versioned
+from internal.codegen.common.cache import RenderCache, IncrementalCache
+from internal.codegen.common.layout import Layout
+from internal.codegen.common.plan import RenderPlans, Plan, string_paths, substitute, sentinel
+from internal.codegen.common.profile import PrintProfiler
 from internal.codegen.common.util import ListCollection
 
 
@@ -26,19 +31,31 @@ class IndentStyle:
         multiple = size // self._span
         return self._filler * multiple
 
+    def key(self) -> Hashable:
+        return self._filler, self._span
+
 
 class Indent:
     def __init__(self, size: int, style: IndentStyle):
         self._size = size
         self._style = style
+        self._prefixes = {}  # type: Dict[int, str]
 
     def process(self, n: int) -> str:
-        return self._style.process(self._size * n)
+        if n not in self._prefixes:
+            self._prefixes[n] = self._style.process(self._size * n)
+
+        return self._prefixes[n]
+
+    def key(self) -> Hashable:
+        return self._size, self._style.key()
 
 
 class PrinterConfig:
-    def __init__(self, indent: Indent):
+    def __init__(self, indent: Indent, iterative: bool = False, width: int = 80):
         self._indent = indent
+        self._iterative = iterative
+        self._width = width
 
     @staticmethod
     def default() -> 'PrinterConfig':
@@ -47,11 +64,421 @@ class PrinterConfig:
     def indent(self) -> Indent:
         return self._indent
 
+    #
+    # whether iterative printers are traversed with an explicit stack instead of recursion, which is slower
+    # on ordinary trees and is meant to be turned on for trees too deep for the recursion limit
+    def is_iterative(self) -> bool:
+        return self._iterative
+
+    #
+    # the number of columns a group is laid out into before its lines break
+    def width(self) -> int:
+        return self._width
+
     def clone(self) -> 'PrinterConfig':
-        return PrinterConfig(self._indent)
+        return PrinterConfig(self._indent, self._iterative, self._width)
+
+    def key(self) -> Hashable:
+        return self._indent.key(), self._width
+
+
+#
+# indents lines as they are written, every indented block behaves like
+# "\n".join(prefix + line for line in block.splitlines()) does:
+# each line of the block including blank ones is prefixed and a trailing line break is dropped.
+# line breaks and prefixes are held back until some text follows, so that they can still be dropped.
+# everything written into a group is laid out once the line on which the outermost group ends is complete,
+# since whether the group fits depends on the text which follows it, see Layout.
+# the column and the margin are where the output of the sink starts within the line and the width of the
+# indentation outside of the sink, for sinks whose output is written into another one
+class PrintSink(ABC):
+    __slots__ = ('_prefixes', '_starts', '_held', '_nests', '_layout', '_column', '_margin')
+
+    def __init__(self, column: int = 0, margin: int = 0):
+        self._prefixes = []  # type: List[str]
+        self._starts = []  # type: List[int]
+        self._held = []  # type: List[Tuple[int, Optional[str]]]
+        self._nests = [""]
+        self._layout = None  # type: Optional[Layout]
+        # the column after the last piece which has been passed to _write
+        self._column = column
+        self._margin = margin
+
+    def indent(self, prefix: str) -> None:
+        if self._in_layout():
+            self._layout.indent(prefix)
+        else:
+            self._push(prefix)
+
+    def dedent(self) -> None:
+        if self._in_layout():
+            self._layout.dedent()
+        else:
+            self._pop()
+
+    def write(self, chunk: str) -> None:
+        if self._layout is None:
+            self._put(chunk)
+        elif self._layout.is_open():
+            self._layout.text(chunk)
+        else:
+            end = chunk.find("\n")
+
+            if end < 0:
+                self._layout.text(chunk)
+                return
+
+            if end > 0:
+                self._layout.text(chunk[:end])
+
+            self.close()
+            self._put(chunk[end:])
+
+    #
+    # starts a group, which is printed on a single line if it fits into the width
+    def begin_group(self, width: int) -> None:
+        if self._layout is None:
+            self._layout = Layout(width, self._nests[-1], self.column(), self.margin())
+
+        self._layout.begin()
+
+    def end_group(self) -> None:
+        self._layout.end()
+
+    #
+    # True as well after the outermost group has ended, until the line is complete
+    def in_group(self) -> bool:
+        return self._layout is not None
+
+    #
+    # lays out the groups which have ended on the current line, the rest of the line is taken to be empty
+    def close(self) -> None:
+        if self._layout is not None:
+            layout = self._layout
+            self._layout = None
+            layout.render(self._put, self._push, self._pop)
+
+    #
+    # moves the groups which have ended on the current line to the sink which the output is written into,
+    # so that they are laid out along with what follows there. the output before them is complete afterwards
+    def hand_over(self, sink: 'PrintSink') -> None:
+        self._flush()
+        sink._adopt(self._layout)
+        self._layout = None
+
+    #
+    # the column at which the next chunk starts, including the indentation which is held back.
+    # inside of a group the column depends on the layout, which is not known until the group ends
+    def column(self) -> int:
+        column = self._column
+
+        for _, chunk in self._held:
+            column = self._margin if chunk is None else column + len(chunk)
+
+        return column
+
+    #
+    # the width of the indentation which starts every line
+    def margin(self) -> int:
+        return self._margin + sum(len(prefix) for prefix in self._prefixes)
+
+    #
+    # lines broken inside of a nest are prefixed by it, in addition to the indentation of the sink
+    def begin_nest(self, prefix: str) -> None:
+        if self._in_layout():
+            self._layout.nest(prefix)
+        else:
+            self._nests.append(self._nests[-1] + prefix)
+
+    def end_nest(self) -> None:
+        if self._in_layout():
+            self._layout.unnest()
+        else:
+            self._nests.pop()
+
+    #
+    # a line break, or the flat text if the group around it fits
+    def line(self, flat: str = " ") -> None:
+        if self._in_layout():
+            self._layout.line(flat)
+        else:
+            self._put("\n" + self._nests[-1])
+
+    def _adopt(self, layout: Layout) -> None:
+        self._layout = layout
+
+    #
+    # whether the operation belongs to an open group, outside of one the groups which have ended are laid out first
+    def _in_layout(self) -> bool:
+        if self._layout is None:
+            return False
+
+        if self._layout.is_open():
+            return True
+
+        self.close()
+
+        return False
+
+    def _push(self, prefix: str) -> None:
+        self._prefixes.append(prefix)
+        self._starts.append(len(self._held))
+        self._held.append((len(self._prefixes), prefix))
+
+    def _pop(self) -> None:
+        depth = len(self._prefixes)
+        start = self._starts.pop()
+        self._prefixes.pop()
+
+        held = self._held
+        lower = start if start >= 0 else 0
+        i = len(held) - 1
+
+        while i >= lower and held[i][1] is not None:
+            i -= 1
+
+        if i >= lower:
+            # the block ends with a line break followed by a blank line
+            if self._is_blank(i + 1, depth):
+                del held[i:]
+        elif start >= 0 and self._is_blank(start + 1, depth):
+            # nothing has been written into the block
+            del held[start]
+
+        if len(self._prefixes) == 0:
+            self._flush()
+
+    def _put(self, chunk: str) -> None:
+        if len(self._prefixes) == 0:
+            self._flush()
+            self._write(chunk)
+            end = chunk.rfind("\n")
+            self._column = self._column + len(chunk) if end < 0 else self._margin + len(chunk) - end - 1
+            return
+
+        start = 0
+
+        while True:
+            end = chunk.find("\n", start)
+
+            if end < 0:
+                if start < len(chunk):
+                    self._flush()
+                    self._write(chunk[start:] if start > 0 else chunk)
+                    self._column += len(chunk) - start
+                return
+
+            if end > start:
+                self._flush()
+                self._write(chunk[start:end])
+                self._column += end - start
+
+            self._held.append((len(self._prefixes), None))
+            self._held.extend((level + 1, prefix) for level, prefix in enumerate(self._prefixes))
+            start = end + 1
+
+    @abstractmethod
+    def _write(self, chunk: str) -> None:
+        pass
+
+    #
+    # whether the held back pieces from the position on are blank from the view of the block at the depth,
+    # the prefixes of the block and its ancestors are not part of the block itself
+    def _is_blank(self, position: int, depth: int) -> bool:
+        for level, chunk in self._held[position:]:
+            if level > depth and chunk:
+                return False
+
+        return True
+
+    def _flush(self) -> None:
+        if len(self._held) == 0:
+            return
+
+        self._column = self.column()
+
+        for _, chunk in self._held:
+            self._write("\n" if chunk is None else chunk)
+
+        self._held = []
+
+        for i in range(len(self._starts)):
+            self._starts[i] = -1
+
+
+#
+# counts the characters written into a sink, not counting the indentation and the layout, and passes every
+# operation on to it. it is only put in place while a profiler is set, so that the output is not counted otherwise
+class CountingSink:
+    __slots__ = ('_sink', '_written')
+
+    def __init__(self, sink: PrintSink):
+        self._sink = sink
+        self._written = 0
+
+    def written(self) -> int:
+        return self._written
+
+    def indent(self, prefix: str) -> None:
+        self._sink.indent(prefix)
+
+    def dedent(self) -> None:
+        self._sink.dedent()
+
+    def write(self, chunk: str) -> None:
+        self._written += len(chunk)
+        self._sink.write(chunk)
+
+    def begin_group(self, width: int) -> None:
+        self._sink.begin_group(width)
+
+    def end_group(self) -> None:
+        self._sink.end_group()
+
+    def in_group(self) -> bool:
+        return self._sink.in_group()
+
+    def close(self) -> None:
+        self._sink.close()
+
+    def hand_over(self, sink: PrintSink) -> None:
+        self._sink.hand_over(sink)
+
+    def column(self) -> int:
+        return self._sink.column()
+
+    def margin(self) -> int:
+        return self._sink.margin()
+
+    def begin_nest(self, prefix: str) -> None:
+        self._sink.begin_nest(prefix)
+
+    def end_nest(self) -> None:
+        self._sink.end_nest()
+
+    def line(self, flat: str = " ") -> None:
+        self._sink.line(flat)
+
+    def _adopt(self, layout: Layout) -> None:
+        self._sink._adopt(layout)
+
+
+#
+# records the operations on a sink and passes every one on to it, so that they can be compiled into a render plan.
+# consecutive writes are kept together
+class RecordingSink:
+    __slots__ = ('_sink', '_ops', '_complete')
+
+    def __init__(self, sink: PrintSink):
+        self._sink = sink
+        self._ops = []  # type: List[Tuple[str, List]]
+        self._complete = True
+
+    def indent(self, prefix: str) -> None:
+        self._ops.append(("indent", [prefix]))
+        self._sink.indent(prefix)
+
+    def dedent(self) -> None:
+        self._ops.append(("dedent", []))
+        self._sink.dedent()
+
+    def write(self, chunk: str) -> None:
+        if len(self._ops) > 0 and self._ops[-1][0] == "write":
+            self._ops[-1][1].append(chunk)
+        else:
+            self._ops.append(("write", [chunk]))
+
+        self._sink.write(chunk)
+
+    def begin_group(self, width: int) -> None:
+        self._ops.append(("begin_group", [width]))
+        self._sink.begin_group(width)
+
+    def end_group(self) -> None:
+        self._ops.append(("end_group", []))
+        self._sink.end_group()
+
+    def in_group(self) -> bool:
+        return self._sink.in_group()
+
+    def close(self) -> None:
+        self._sink.close()
+
+    def hand_over(self, sink: PrintSink) -> None:
+        self._sink.hand_over(sink)
+
+    def column(self) -> int:
+        return self._sink.column()
+
+    def margin(self) -> int:
+        return self._sink.margin()
+
+    def begin_nest(self, prefix: str) -> None:
+        self._ops.append(("begin_nest", [prefix]))
+        self._sink.begin_nest(prefix)
+
+    def end_nest(self) -> None:
+        self._ops.append(("end_nest", []))
+        self._sink.end_nest()
+
+    def line(self, flat: str = " ") -> None:
+        self._ops.append(("line", [flat]))
+        self._sink.line(flat)
+
+    # the groups of a layout which is handed over were never recorded as operations
+    def _adopt(self, layout: Layout) -> None:
+        self._complete = False
+        self._sink._adopt(layout)
+
+    def is_complete(self) -> bool:
+        return self._complete
+
+    #
+    # the recorded operations, the chunks of every write are joined
+    def ops(self) -> List[Tuple[str, List]]:
+        return [(name, ["".join(args)] if name == "write" else args) for name, args in self._ops]
+
+    def raw_ops(self) -> List[Tuple[str, List]]:
+        return self._ops
+
+
+class ChunkSink(PrintSink):
+    __slots__ = ('_chunks',)
+
+    def __init__(self, column: int = 0, margin: int = 0):
+        super().__init__(column, margin)
+
+        self._chunks = []  # type: List[str]
+
+    def _write(self, chunk: str) -> None:
+        self._chunks.append(chunk)
+
+    #
+    # the chunks written so far, not including the groups which are still to be laid out
+    def chunks(self) -> List[str]:
+        return self._chunks
+
+    def getvalue(self) -> str:
+        self.close()
+
+        return "".join(self._chunks)
+
+
+class StreamSink(PrintSink):
+    __slots__ = ('_fp',)
+
+    def __init__(self, fp: IO):
+        super().__init__()
+
+        self._fp = fp
+
+    def _write(self, chunk: str) -> None:
+        self._fp.write(chunk)
 
 
 class Printer(ABC):
+    __slots__ = ('_parent', '_children', '_children_cache')
+
     def __init__(self, parent: 'Printer' = None, children: List['PrinterFactory'] = None):
         if children is None:
             children = []
@@ -72,22 +499,81 @@ class Printer(ABC):
     def match_children(self, fn: Callable[['Printer'], bool]) -> List['Printer']:
         return ListCollection(self.children()).filter(fn).elements()
 
-    @abstractmethod
+    #
+    # a printer implements either do_print or do_emit, each one falls back to the other,
+    # printers with children should implement do_emit so that the output of children is not copied
     def do_print(self, context: 'PrintContext') -> str:
-        pass
+        sink = ChunkSink()
+        self.do_emit(context, sink)
+
+        return sink.getvalue()
+
+    def do_emit(self, context: 'PrintContext', sink: PrintSink) -> None:
+        sink.write(self.do_print(context))
 
     def print(self, context: 'PrintContext') -> str:
-        context.set_printer(self)
+        sink = ChunkSink()
+        self.emit(context, sink)
 
-        for middleware in context.middlewares():
-            middleware.configure_context(context)
+        return sink.getvalue()
 
-        result = self.do_print(context)
+    def emit(self, context: 'PrintContext', sink: PrintSink) -> None:
+        emission = Emission(self, context, sink)
 
-        for middleware in context.middlewares():
-            result = middleware.transform(context, result)
+        if emission.is_pending():
+            self.do_emit(context, emission.sink())
 
-        return result
+        emission.end()
+
+    #
+    # the node whose structure determines the output of the printer, None if the output is not to be cached
+    def cache_node(self) -> Any:
+        return None
+
+    def cache_key(self, context: 'PrintContext') -> Optional[Hashable]:
+        node = self.cache_node()
+
+        if node is None:
+            return None
+
+        key = context.render_cache().key(node, context.state().indent_size(), context.config().key())
+        context_key = self.key_context()
+
+        return key if context_key is None else (key, context_key)
+
+    #
+    # what the output depends on besides the node, the state and the config, such as a property of the parent
+    def key_context(self) -> Optional[Hashable]:
+        return None
+
+    #
+    # the node and the context under which an incremental cache keeps the output, None if it is not to be kept
+    def incremental_key(self, context: 'PrintContext') -> Optional[Tuple[Versioned, Hashable]]:
+        node = self.cache_node()
+
+        if not isinstance(node, Versioned):
+            return None
+
+        return node, (type(self), context.state().indent_size(), context.config().key(), self.key_context())
+
+    #
+    # the node whose strings are filled into a render plan, None if the output is not to be planned
+    def plan_node(self) -> Any:
+        return None
+
+    #
+    # the shape of the plan node as the generator describes it, which is known without walking the node.
+    # nodes of the same shape must only differ in their strings: the output may contain them but not branch on them
+    def plan_shape(self) -> Optional[Hashable]:
+        return None
+
+    def plan_key(self, context: 'PrintContext') -> Optional[Hashable]:
+        shape = self.plan_shape()
+
+        if shape is None:
+            return None
+
+        return shape, type(self), context.state().indent_size(), context.config().key(), self.key_context()
 
     def _resolve_children(self) -> List['Printer']:
         if self._children_cache is None:
@@ -96,13 +582,259 @@ class Printer(ABC):
         return self._children_cache
 
 
-class PrinterFactory(ABC):
+PrintStep = Tuple[Printer, 'PrintContext', PrintSink]
+
+
+#
+# a printer which yields its children as steps instead of emitting them, so that deeply nested printers
+# are traversed with an explicit stack rather than one python frame per level
+class IterativePrinter(Printer, ABC):
+    __slots__ = ()
+
     #
-    # this method will be executed in parent printer in common
+    # writes to the sink and yields (child, child_context, child_sink) for every child in between,
+    # a step is completely emitted before the generator resumes
     @abstractmethod
-    def create_printer(self, parent: Printer) -> Printer:
+    def do_steps(self, context: 'PrintContext', sink: PrintSink) -> Iterator[PrintStep]:
         pass
 
+    def do_emit(self, context: 'PrintContext', sink: PrintSink) -> None:
+        if context.config().is_iterative():
+            run_steps(self.do_steps(context, sink))
+        else:
+            for child, child_context, child_sink in self.do_steps(context, sink):
+                child.emit(child_context, child_sink)
+
+
+#
+# what happens around do_emit: the middlewares, the caches, render plans and the buffer for transformations
+class Emission:
+    __slots__ = ('_printer', '_hooks', '_context', '_sink', '_profiler', '_buffer', '_transforms', '_key', '_memo',
+                 '_plan_key', '_recording', '_caches', '_pending')
+
+    def __init__(self, printer: Printer, context: 'PrintContext', sink: PrintSink):
+        profiler = context.profiler()
+
+        if profiler is not None:
+            if not isinstance(sink, CountingSink):
+                sink = CountingSink(sink)
+
+            profiler.enter(type(printer), sink.written())
+
+        context.set_printer(printer)
+        hooks = context.hooks()
+
+        for middleware in hooks.configure_context():
+            middleware.configure_context(context)
+
+        for middleware in hooks.enter():
+            middleware.enter(context, sink)
+
+        self._printer = printer
+        self._hooks = hooks
+        self._context = context
+        self._sink = sink
+        self._profiler = profiler
+        self._buffer = None  # type: Optional[ChunkSink]
+        self._transforms = []  # type: List[PrinterMiddleware]
+        self._key = None  # type: Optional[Hashable]
+        self._memo = None  # type: Optional[Tuple[Versioned, Hashable]]
+        self._plan_key = None  # type: Optional[Hashable]
+        self._recording = None  # type: Optional[RecordingSink]
+        self._caches = None  # type: Optional[Tuple[Optional[RenderCache], Optional[IncrementalCache]]]
+        self._pending = True
+
+        # inside of a group the layout of the output depends on what surrounds it, so it is not cached.
+        # outside of one it still depends on the column at which the output starts
+        if context.incremental_cache() is not None and not sink.in_group():
+            memo = printer.incremental_key(context)
+
+            if memo is not None:
+                self._memo = memo[0], (memo[1], sink.column())
+                content = context.incremental_cache().get(*self._memo)
+
+                if content is not None:
+                    sink.write(content)
+                    self._pending = False
+                    return
+
+        if context.render_cache() is not None and not sink.in_group():
+            key = printer.cache_key(context)
+
+            if key is not None:
+                self._key = key, sink.column()
+                content = context.render_cache().get(self._key)
+
+                if content is not None:
+                    sink.write(content)
+                    self._pending = False
+                    return
+
+        for middleware in hooks.transform():
+            if middleware.transforms(context):
+                self._transforms.append(middleware)
+
+        # only the output of printers which are cached or actually transformed is buffered
+        if self._key is not None or self._memo is not None or len(self._transforms) > 0:
+            self._buffer = ChunkSink(sink.column(), sink.margin())
+        elif context.render_plans() is not None:
+            self._plan_key = printer.plan_key(context)
+
+            if self._plan_key is not None:
+                plan = context.render_plans().get(self._plan_key)
+
+                if plan is not None:
+                    plan.execute(printer.plan_node(), sink)
+                    self._pending = False
+                    return
+
+                if context.render_plans().should_compile(self._plan_key):
+                    self._recording = RecordingSink(sink)
+                    # the output of the children is recorded as they print it, rather than as it was cached
+                    self._caches = context.render_cache(), context.incremental_cache()
+                    context.set_render_cache(None)
+                    context.set_incremental_cache(None)
+
+    #
+    # False if the output has been taken from a cache or a render plan
+    def is_pending(self) -> bool:
+        return self._pending
+
+    def sink(self) -> PrintSink:
+        if self._buffer is not None:
+            return self._buffer
+
+        return self._recording if self._recording is not None else self._sink
+
+    def end(self) -> None:
+        if self._pending and self._buffer is not None and len(self._transforms) == 0 and self._buffer.in_group():
+            # the groups which have ended on the last line are laid out along with what follows them,
+            # so the output is not final and it is not cached
+            buffer = self._buffer
+            self._buffer = None
+            self._sink.write("".join(buffer.chunks()))
+            buffer.hand_over(self._sink)
+
+        if self._pending and self._buffer is not None:
+            content = self._buffer.getvalue()
+
+            for middleware in self._transforms:
+                content = middleware.transform(self._context, content)
+
+            if self._key is not None:
+                self._context.render_cache().put(self._key, content)
+
+            if self._memo is not None:
+                self._context.incremental_cache().put(*self._memo, content)
+
+            self._sink.write(content)
+
+        if self._recording is not None:
+            self._context.set_render_cache(self._caches[0])
+            self._context.set_incremental_cache(self._caches[1])
+
+            if self._recording.is_complete():
+                self._context.render_plans().put(self._plan_key, self._compile())
+
+        for middleware in self._hooks.leave():
+            middleware.leave(self._context, self._sink)
+
+        if self._profiler is not None:
+            self._profiler.leave(self._sink.written())
+
+    #
+    # prints a copy of the node whose strings are replaced by sentinels, the plan is only kept
+    # if it reproduces what has just been recorded from the node itself
+    def _compile(self) -> Optional[Plan]:
+        node = self._printer.plan_node()
+        paths = string_paths(node)
+        indices = iter(range(len(paths)))
+        printer = substitute(node, lambda _: sentinel(next(indices))).create_printer(self._printer.parent())
+
+        if type(printer) is not type(self._printer):
+            return None
+
+        context = self._context.clone()
+        context.set_render_cache(None)
+        context.set_incremental_cache(None)
+        context.set_render_plans(None)
+        context.set_profiler(None)
+        context.set_printer(printer)
+
+        recording = RecordingSink(ChunkSink(self._sink.column(), self._sink.margin()))
+        printer.do_emit(context, recording)
+        plan = Plan.compile(recording.raw_ops(), paths)
+
+        if plan is None or plan.ops(node) != self._recording.ops():
+            return None
+
+        return plan
+
+
+def run_steps(steps: Iterator[PrintStep]) -> None:
+    stack = [steps]  # type: List[Iterator[PrintStep]]
+    emissions = [None]  # type: List[Optional[Emission]]
+
+    while len(stack) > 0:
+        for child, child_context, child_sink in stack[-1]:
+            if not isinstance(child, IterativePrinter):
+                child.emit(child_context, child_sink)
+                continue
+
+            emission = Emission(child, child_context, child_sink)
+
+            if emission.is_pending():
+                # descend, the current steps are resumed once the child is done
+                stack.append(child.do_steps(child_context, emission.sink()))
+                emissions.append(emission)
+                break
+
+            emission.end()
+        else:
+            stack.pop()
+            emission = emissions.pop()
+
+            if emission is not None:
+                emission.end()
+
+
+PRINTERS = {}  # type: Dict[type, type]
+
+
+#
+# the printer class is instantiated with (node, parent, children) by PrinterFactory.create_printer,
+# printer modules register their printers once they are loaded
+def register_printer(node_type: type, printer_type: type) -> None:
+    PRINTERS[node_type] = printer_type
+
+
+def printer_type_of(node_type: type) -> type:
+    printer_type = PRINTERS.get(node_type)
+
+    if printer_type is None:
+        # the printer of the nearest registered base class is remembered for the node class itself
+        for base in node_type.__mro__[1:]:
+            if base in PRINTERS:
+                printer_type = PRINTERS[node_type] = PRINTERS[base]
+                break
+        else:
+            raise ValueError("no printer is registered for '{0}'".format(node_type.__name__))
+
+    return printer_type
+
+
+class PrinterFactory(ABC):
+    __slots__ = ()
+
+    #
+    # this method will be executed in parent printer in common,
+    # by default the printer registered for the class of the node is created with printer_children()
+    def create_printer(self, parent: Printer) -> Printer:
+        return printer_type_of(type(self))(self, parent, self.printer_children())
+
+    def printer_children(self) -> List['PrinterFactory']:
+        return []
+
 
 class PrinterMiddleware:
     def configure_context(self, context: 'PrintContext') -> None:
@@ -111,11 +843,88 @@ class PrinterMiddleware:
     def configure_child_context(self, context: 'PrintContext', rule: 'PrintStateTransitionRule') -> None:
         pass
 
+    #
+    # called around the output of a printer, e.g. to indent the sink
+    def enter(self, context: 'PrintContext', sink: PrintSink) -> None:
+        pass
+
+    def leave(self, context: 'PrintContext', sink: PrintSink) -> None:
+        pass
+
+    #
+    # the output of a printer is buffered only if one of the middlewares transforms it
+    def transforms(self, context: 'PrintContext') -> bool:
+        return type(self).transform is not PrinterMiddleware.transform
+
     def transform(self, context: 'PrintContext', content: str) -> str:
         return content
 
+    #
+    # the printer types the middleware is called for, None for every printer
+    def applies_to(self) -> Optional[Tuple[type, ...]]:
+        return None
+
+    def overrides(self, hook: str) -> bool:
+        if hook == 'transform' and type(self).transforms is not PrinterMiddleware.transforms:
+            return True
+
+        return getattr(type(self), hook) is not getattr(PrinterMiddleware, hook)
+
+
+#
+# the middlewares which are called for each hook, those inheriting the no-op hook are left out
+class MiddlewareHooks:
+    def __init__(self, middlewares: List[PrinterMiddleware]):
+        self._configure_context = [m for m in middlewares if m.overrides('configure_context')]
+        self._configure_child_context = [m for m in middlewares if m.overrides('configure_child_context')]
+        self._enter = [m for m in middlewares if m.overrides('enter')]
+        self._leave = [m for m in middlewares[::-1] if m.overrides('leave')]
+        self._transform = [m for m in middlewares if m.overrides('transform')]
+
+    def configure_context(self) -> List[PrinterMiddleware]:
+        return self._configure_context
+
+    def configure_child_context(self) -> List[PrinterMiddleware]:
+        return self._configure_child_context
+
+    def enter(self) -> List[PrinterMiddleware]:
+        return self._enter
+
+    #
+    # in reverse order, so that the middlewares leave in the opposite order they entered
+    def leave(self) -> List[PrinterMiddleware]:
+        return self._leave
+
+    def transform(self) -> List[PrinterMiddleware]:
+        return self._transform
+
+
+#
+# the hooks per printer type, built once per set of middlewares and shared by every context of a print run
+class MiddlewareDispatch:
+    def __init__(self, middlewares: Tuple[PrinterMiddleware, ...]):
+        self._middlewares = middlewares
+        self._hooks = {}  # type: Dict[type, MiddlewareHooks]
+
+    def middlewares(self) -> Tuple[PrinterMiddleware, ...]:
+        return self._middlewares
+
+    def hooks(self, printer_type: type) -> MiddlewareHooks:
+        hooks = self._hooks.get(printer_type)
+
+        if hooks is None:
+            hooks = MiddlewareHooks([
+                middleware for middleware in self._middlewares
+                if middleware.applies_to() is None or issubclass(printer_type, middleware.applies_to())
+            ])
+            self._hooks[printer_type] = hooks
+
+        return hooks
+
 
 class PrintState:
+    __slots__ = ('_parent', '_indent_size')
+
     def __init__(self, parent: Optional['PrintState'], indent_size: int):
         self._parent = parent
         self._indent_size = indent_size
@@ -142,13 +951,16 @@ class PrintStateGenerator:
     def default():
         return PrintStateGenerator()
 
+    #
+    # the previous state is never modified, it is returned as is unless the rule changes it
     def generate(self, previous_state: PrintState, rule: 'PrintStateTransitionRule' = None) -> PrintState:
-        if rule is None:
-            rule = PrintStateTransitionRule.keep()
+        if rule is None or not rule.changes_state():
+            return previous_state
 
-        rule.apply(previous_state)
+        state = previous_state.clone()
+        rule.apply(state)
 
-        return previous_state.clone()
+        return state
 
 
 class PrintStateTransitionRule:
@@ -159,89 +971,215 @@ class PrintStateTransitionRule:
     def keep() -> 'PrintStateTransitionRule':
         return PrintStateTransitionRule()
 
+    def changes_state(self) -> bool:
+        return type(self).apply is not PrintStateTransitionRule.apply
+
     def apply(self, state: 'PrintState') -> None:
         pass
 
 
+P = TypeVar('P', bound=Printer)
+
+
+#
+# the printers being printed from the innermost one outwards, every frame is immutable and shared with the
+# contexts of the children, so that pushing a printer takes constant time
+class PrinterStack:
+    __slots__ = ('_printer', '_parent', '_depth')
+
+    def __init__(self, printer: Printer, parent: Optional['PrinterStack'] = None):
+        self._printer = printer
+        self._parent = parent
+        self._depth = parent.depth() + 1 if parent is not None else 1
+
+    def printer(self) -> Printer:
+        return self._printer
+
+    def parent(self) -> Optional['PrinterStack']:
+        return self._parent
+
+    def depth(self) -> int:
+        return self._depth
+
+    def nearest(self, kind: Type[P]) -> Optional[P]:
+        current = self
+
+        while current is not None:
+            if isinstance(current._printer, kind):
+                return current._printer
+
+            current = current._parent
+
+        return None
+
+    def __iter__(self) -> Iterator[Printer]:
+        current = self
+
+        while current is not None:
+            yield current._printer
+            current = current._parent
+
+
+#
+# config, middlewares, state generator, caches, render plans and profiler are resolved once and shared with
+# the children by reference, the state is shared as well until it is edited through edit_state()
 class PrintContext:
+    __slots__ = ('_parent', '_config', '_middlewares', '_dispatch', '_state_generator', '_state', '_owns_state',
+                 '_render_cache', '_profiler', '_render_plans', '_incremental_cache', '_printer', '_frame')
+
     def __init__(self, parent: Optional['PrintContext'], config: PrinterConfig = None,
                  middlewares: List[PrinterMiddleware] = None, state_generator: PrintStateGenerator = None,
-                 state: PrintState = None):
+                 state: PrintState = None, render_cache: RenderCache = None, profiler: PrintProfiler = None,
+                 render_plans: RenderPlans = None, incremental_cache: IncrementalCache = None):
         if parent is None:
+            if middlewares is None:
+                middlewares = []
             if state_generator is None:
                 state_generator = PrintStateGenerator.default()
             if state is None:
                 state = PrintState.initial()
+        else:
+            if config is None:
+                config = parent._config
+            if middlewares is None:
+                middlewares = parent._middlewares
+            if state_generator is None:
+                state_generator = parent._state_generator
+            if state is None:
+                state = parent._state
+            if render_cache is None:
+                render_cache = parent._render_cache
+            if profiler is None:
+                profiler = parent._profiler
+            if render_plans is None:
+                render_plans = parent._render_plans
+            if incremental_cache is None:
+                incremental_cache = parent._incremental_cache
 
         self._parent = parent
         self._config = config
-        self._middlewares = middlewares
+        self._middlewares = tuple(middlewares)
+        self._dispatch = parent._dispatch if parent is not None and self._middlewares is parent._middlewares \
+            else MiddlewareDispatch(self._middlewares)
         self._state_generator = state_generator
         self._state = state
+        self._owns_state = parent is None or state is not parent._state
+        self._render_cache = render_cache
+        self._profiler = profiler
+        self._render_plans = render_plans
+        self._incremental_cache = incremental_cache
         self._printer = None
+        # the frame of the nearest printer, which is the one of the parent until a printer is set
+        self._frame = parent._frame if parent is not None else None  # type: Optional[PrinterStack]
 
     @staticmethod
-    def initial(config: PrinterConfig, middlewares: List[PrinterMiddleware] = None) -> 'PrintContext':
-        return PrintContext(None, config, middlewares)
+    def initial(config: PrinterConfig, middlewares: List[PrinterMiddleware] = None,
+                render_cache: RenderCache = None, profiler: PrintProfiler = None,
+                render_plans: RenderPlans = None, incremental_cache: IncrementalCache = None) -> 'PrintContext':
+        return PrintContext(None, config, middlewares, render_cache=render_cache, profiler=profiler,
+                            render_plans=render_plans, incremental_cache=incremental_cache)
 
     def parent(self) -> Optional['PrintContext']:
         return self._parent
 
     def config(self) -> PrinterConfig:
-        return self._config if self._config is not None else self.parent().config()
+        return self._config
 
     def set_config(self, config: PrinterConfig):
         self._config = config
 
-    def middlewares(self) -> List[PrinterMiddleware]:
-        return copy(self._middlewares) if self._middlewares is not None else self.parent().middlewares()
+    def middlewares(self) -> Tuple[PrinterMiddleware, ...]:
+        return self._middlewares
 
-    def add_middleware(self, *middlewares: List[PrinterMiddleware]) -> None:
+    def add_middleware(self, *middlewares: PrinterMiddleware) -> None:
         if len(middlewares) == 0:
             return
 
-        if self._middlewares is None:
-            self._middlewares = []
-
-        self._middlewares.extend(middlewares)
+        self._middlewares = (*self._middlewares, *middlewares)
+        self._dispatch = MiddlewareDispatch(self._middlewares)
 
     def state_generator(self) -> PrintStateGenerator:
-        return self._state_generator if self._state_generator is not None else self.parent().state_generator()
+        return self._state_generator
 
     def set_state_generator(self, state_generator: PrintStateGenerator) -> None:
         self._state_generator = state_generator
 
+    def render_cache(self) -> Optional[RenderCache]:
+        return self._render_cache
+
+    def set_render_cache(self, render_cache: Optional[RenderCache]) -> None:
+        self._render_cache = render_cache
+
+    def profiler(self) -> Optional[PrintProfiler]:
+        return self._profiler
+
+    def set_profiler(self, profiler: Optional[PrintProfiler]) -> None:
+        self._profiler = profiler
+
+    def render_plans(self) -> Optional[RenderPlans]:
+        return self._render_plans
+
+    def set_render_plans(self, render_plans: Optional[RenderPlans]) -> None:
+        self._render_plans = render_plans
+
+    def incremental_cache(self) -> Optional[IncrementalCache]:
+        return self._incremental_cache
+
+    def set_incremental_cache(self, incremental_cache: Optional[IncrementalCache]) -> None:
+        self._incremental_cache = incremental_cache
+
+    #
+    # the state may be shared with the parent, it must not be modified, see edit_state()
     def state(self) -> PrintState:
         return self._state
 
+    def edit_state(self) -> PrintState:
+        if not self._owns_state:
+            self._state = self._state.clone()
+            self._owns_state = True
+
+        return self._state
+
     def set_state(self, state: PrintState) -> None:
         self._state = state
+        self._owns_state = True
 
     def printer(self) -> Printer:
         return self._printer
 
+    #
+    # the middlewares to be called for the current printer
+    def hooks(self) -> MiddlewareHooks:
+        return self._dispatch.hooks(type(self._printer))
+
     def set_printer(self, printer: Printer) -> None:
         self._printer = printer
+        self._frame = PrinterStack(printer, self._parent._frame if self._parent is not None else None)
 
-    def stack(self) -> List[Printer]:
-        stack = []
-        current = self
+    def in_printer(self, kind: Type[Printer]) -> bool:
+        return isinstance(self._printer, kind)
 
-        while current is not None:
-            stack.append(current.printer())
-            current = current.parent()
+    #
+    # the innermost printer of the kind, including the current one
+    def nearest(self, kind: Type[P]) -> Optional[P]:
+        return self._frame.nearest(kind) if self._frame is not None else None
+
+    def frame(self) -> Optional[PrinterStack]:
+        return self._frame
 
-        return stack
+    def stack(self) -> List[Printer]:
+        return list(self._frame) if self._frame is not None else []
 
     def clone(self) -> 'PrintContext':
-        return PrintContext(self._parent, self._config, self._middlewares, self._state_generator, self._state)
+        return PrintContext(self._parent, self._config, self._middlewares, self._state_generator, self._state,
+                            self._render_cache, self._profiler, self._render_plans, self._incremental_cache)
 
     def create_child(self, configure: Callable[['PrintContext'], None] = None,
                      rule: PrintStateTransitionRule = None) -> 'PrintContext':
-        child_state = self.state_generator().generate(self.state(), rule)
-        child = PrintContext(self, None, None, None, child_state)
+        child = PrintContext(self, self._config, self._middlewares, self._state_generator,
+                             self._state_generator.generate(self._state, rule))
 
-        for middleware in self.middlewares():
+        for middleware in self._dispatch.hooks(type(self._printer)).configure_child_context():
             middleware.configure_child_context(child, rule)
 
         if configure is not None:
@@ -251,6 +1189,8 @@ class PrintContext:
 
 
 class HighOrderPrinter(Printer):
+    __slots__ = ('_print_fn',)
+
     def __init__(self, print_fn: Callable[[Printer, PrintContext], str], parent: Printer = None,
                  children: List[PrinterFactory] = None):
         super().__init__(parent, children)
@@ -261,15 +1201,19 @@ class HighOrderPrinter(Printer):
         return self._print_fn(self, context)
 
 
-class PassThroughPrinter(Printer):
-    def do_print(self, context: PrintContext) -> str:
+class PassThroughPrinter(IterativePrinter):
+    __slots__ = ()
+
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
         if len(self.children()) > 1:
             raise ValueError('expect 1 child, but {0} children is given', len(self.children()))
 
-        return self.children()[0].print(context.create_child())
+        yield self.children()[0], context.create_child(), sink
 
 
 class PassThroughManyPrinter(Printer):
+    __slots__ = ('_print_fn',)
+
     def __init__(self, print_fn: Callable[[List[str]], str], parent: Printer = None,
                  children: List[PrinterFactory] = None):
         super().__init__(parent, children)
@@ -280,3 +1224,70 @@ class PassThroughManyPrinter(Printer):
         contents = [printer.print(context.create_child()) for printer in self.children()]
 
         return self._print_fn(contents)
+
+
+def emit_joined(separator: str, printers: List[Printer], context: PrintContext, sink: PrintSink,
+                configure: Callable[[PrintContext], None] = None) -> None:
+    for child, child_context, child_sink in joined_steps(separator, printers, context, sink, configure):
+        child.emit(child_context, child_sink)
+
+
+#
+# emits a template like "{0} = {1};", every placeholder is replaced by the output of the printer at that position
+def emit_template(template: str, printers: List[Printer], context: PrintContext, sink: PrintSink,
+                  configure: Callable[[PrintContext], None] = None) -> None:
+    for child, child_context, child_sink in template_steps(template, printers, context, sink, configure):
+        child.emit(child_context, child_sink)
+
+
+def joined_steps(separator: str, printers: List[Printer], context: PrintContext, sink: PrintSink,
+                 configure: Callable[[PrintContext], None] = None) -> Iterator[PrintStep]:
+    for i, printer in enumerate(printers):
+        if i > 0:
+            sink.write(separator)
+
+        yield printer, context.create_child(configure), sink
+
+
+#
+# the printers separated by the separator on a single line if they fit into the width of the config,
+# otherwise each one on a line of its own, indented by one level
+def grouped_steps(separator: str, printers: List[Printer], context: PrintContext, sink: PrintSink,
+                  configure: Callable[[PrintContext], None] = None) -> Iterator[PrintStep]:
+    sink.begin_group(context.config().width())
+    sink.begin_nest(context.config().indent().process(1))
+    sink.line("")
+
+    for i, printer in enumerate(printers):
+        if i > 0:
+            sink.write(separator)
+            sink.line()
+
+        yield printer, context.create_child(configure), sink
+
+    sink.end_nest()
+    sink.line("")
+    sink.end_group()
+
+
+def template_steps(template: str, printers: List[Printer], context: PrintContext, sink: PrintSink,
+                   configure: Callable[[PrintContext], None] = None) -> Iterator[PrintStep]:
+    for literal, index in parse_template(template):
+        if literal:
+            sink.write(literal)
+
+        if index is not None:
+            yield printers[index], context.create_child(configure), sink
+
+
+TEMPLATES = {}  # type: Dict[str, List[Tuple[str, Optional[int]]]]
+
+
+def parse_template(template: str) -> List[Tuple[str, Optional[int]]]:
+    if template not in TEMPLATES:
+        TEMPLATES[template] = [
+            (literal, int(field) if field is not None else None)
+            for literal, field, _, _ in Formatter().parse(template)
+        ]
+
+    return TEMPLATES[template]
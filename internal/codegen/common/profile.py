@@ -0,0 +1,117 @@
+import time
+from typing import Dict, List, Tuple
+
+
+class PrinterStats:
+    def __init__(self, name: str):
+        self._name = name
+        self._calls = 0
+        self._cumulative_time = 0.0
+        self._self_time = 0.0
+        self._output_size = 0
+        self._self_output_size = 0
+
+    def name(self) -> str:
+        return self._name
+
+    def calls(self) -> int:
+        return self._calls
+
+    #
+    # seconds spent in the printers of the class including their children
+    def cumulative_time(self) -> float:
+        return self._cumulative_time
+
+    #
+    # seconds spent in the printers of the class excluding their children
+    def self_time(self) -> float:
+        return self._self_time
+
+    #
+    # characters written by the printers of the class including their children
+    def output_size(self) -> int:
+        return self._output_size
+
+    def self_output_size(self) -> int:
+        return self._self_output_size
+
+    #
+    # cumulative figures are only added for the outermost printer of the class
+    def record(self, elapsed: float, self_time: float, size: int, self_size: int, outermost: bool) -> None:
+        self._calls += 1
+        self._self_time += self_time
+        self._self_output_size += self_size
+
+        if outermost:
+            self._cumulative_time += elapsed
+            self._output_size += size
+
+
+#
+# records calls, time and output per printer class. a printer is entered before its middlewares run
+# and left once its output is written, printers of the same class nested into each other are counted once
+# in the cumulative figures, the way cProfile does
+class PrintProfiler:
+    def __init__(self):
+        self._stats = {}  # type: Dict[type, PrinterStats]
+        self._active = {}  # type: Dict[type, int]
+        # (class, start time, start size, time of children, size of children) of every printer being printed
+        self._frames = []  # type: List[List]
+
+    def enter(self, printer_type: type, written: int) -> None:
+        self._active[printer_type] = self._active.get(printer_type, 0) + 1
+        self._frames.append([printer_type, time.perf_counter(), written, 0.0, 0])
+
+    def leave(self, written: int) -> None:
+        printer_type, start, start_written, children_time, children_written = self._frames.pop()
+        elapsed = time.perf_counter() - start
+        size = written - start_written
+
+        stats = self._stats.get(printer_type)
+
+        if stats is None:
+            stats = self._stats[printer_type] = PrinterStats(printer_type.__name__)
+
+        self._active[printer_type] -= 1
+        stats.record(elapsed, elapsed - children_time, size, size - children_written, self._active[printer_type] == 0)
+
+        if len(self._frames) > 0:
+            parent = self._frames[-1]
+            parent[3] += elapsed
+            parent[4] += size
+
+    #
+    # sorted by self time, the most expensive first
+    def stats(self) -> List[PrinterStats]:
+        return sorted(self._stats.values(), key=lambda stats: stats.self_time(), reverse=True)
+
+    def report(self, limit: int = None) -> str:
+        stats = self.stats()
+
+        if limit is not None:
+            stats = stats[:limit]
+
+        rows = [("printer", "calls", "cumulative", "self", "output", "self output")]  # type: List[Tuple[str, ...]]
+        rows.extend(
+            (
+                stats.name(),
+                str(stats.calls()),
+                "{0:.2f} ms".format(stats.cumulative_time() * 1000),
+                "{0:.2f} ms".format(stats.self_time() * 1000),
+                str(stats.output_size()),
+                str(stats.self_output_size()),
+            )
+            for stats in stats
+        )
+        name_width = max(len(row[0]) for row in rows)
+        widths = [max(len(row[i]) for row in rows) for i in range(1, len(rows[0]))]
+
+        return "\n".join(
+            " ".join([row[0].ljust(name_width), *[cell.rjust(width) for cell, width in zip(row[1:], widths)]])
+            for row in rows
+        )
+
+    def clear(self) -> None:
+        self._stats = {}
+        self._active = {}
+        self._frames = []
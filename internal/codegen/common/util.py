@@ -1,4 +1,4 @@
-from typing import Generic, TypeVar, List, Optional, Callable
+from typing import Generic, TypeVar, List, Optional, Callable, Iterable, Iterator
 
 T = TypeVar('T')
 R = TypeVar('R')
@@ -8,6 +8,8 @@ P1 = TypeVar('P1')
 
 
 class State(Generic[T]):
+    __slots__ = ('_state',)
+
     def __init__(self, state: T):
         self._state = state
 
@@ -20,35 +22,47 @@ class State(Generic[T]):
         return state
 
 
+#
+# a list which looks immutable to its readers: the list is shared with the readers of elements() and with clones,
+# and copied on the first modification after it has been shared. every operation is linear at most
 class ListCollection(Generic[T]):
+    __slots__ = ('_elements', '_shared', '__weakref__')
+
+    TRANSIENT = {'_shared': True}
+
     def __init__(self, elements: List[T]):
         self._elements = elements
+        # the list came from the caller, so it is not modified in place
+        self._shared = True
 
+    #
+    # the list itself rather than a copy of it, it must not be modified by the caller. it is shared with the
+    # collection until the next add() or remove(), which copies it first, so it keeps the elements it had when read
     def elements(self) -> List[T]:
-        return self._copy_elements()
+        self._shared = True
+
+        return self._elements
 
     def count(self) -> int:
         return len(self._elements)
 
     def is_empty(self) -> bool:
-        return self.count() == 0
+        return len(self._elements) == 0
 
     def add(self, element: T) -> None:
-        self._elements = self._copy_elements()
-        self._elements.append(element)
+        self._own_elements().append(element)
 
     def remove(self, element: T) -> None:
-        self._elements = self._copy_elements()
-        self._elements.remove(element)
+        self._own_elements().remove(element)
 
     def clone(self) -> 'ListCollection[T]':
-        return ListCollection(self._elements)
+        return ListCollection(self.elements())
 
     def first(self) -> Optional[T]:
-        return self._elements[0] if not self.is_empty() else None
+        return self._elements[0] if len(self._elements) > 0 else None
 
     def last(self) -> Optional[T]:
-        return self._elements[-1] if not self.is_empty() else None
+        return self._elements[-1] if len(self._elements) > 0 else None
 
     def head(self) -> Optional[T]:
         return self.first()
@@ -69,26 +83,36 @@ class ListCollection(Generic[T]):
         return False
 
     def match(self, fn: Callable[[T], bool]) -> bool:
-        return self.stateful_match(None, lambda _, elem: fn(elem))
+        for elem in self._elements:
+            if fn(elem):
+                return True
+
+        return False
 
     def map(self, fn: Callable[[T], R]) -> 'ListCollection[R]':
         return ListCollection([fn(elem) for elem in self._elements])
 
+    #
+    # every intermediate state, the last one is the result of reduce()
     def fold(self, initial_state: S, fn: Callable[[S, T], S]) -> 'ListCollection[S]':
-        state = State(initial_state)
-        return self.map(lambda elem: state.forward(fn(state.state(), elem)))
+        return ListCollection(fold_states(initial_state, fn, self._elements))
 
     def fold_right(self, initial_state: S, fn: Callable[[S, T], S]) -> 'ListCollection[S]':
-        return self.reverse().fold(initial_state, fn).reverse()
+        states = fold_states(initial_state, fn, reversed(self._elements))
+        states.reverse()
+
+        return ListCollection(states)
 
-    def reduce(self, initial_state: S, fn: Callable[[S, T], S]) -> S:
-        return self.fold(initial_state, fn).last()
+    #
+    # None for an empty collection, like the last state of an empty fold()
+    def reduce(self, initial_state: S, fn: Callable[[S, T], S]) -> Optional[S]:
+        return reduce_states(initial_state, fn, self._elements)
 
-    def reduce_right(self, initial_state: S, fn: Callable[[S, T], S]) -> S:
-        return self.fold_right(initial_state, fn).first()
+    def reduce_right(self, initial_state: S, fn: Callable[[S, T], S]) -> Optional[S]:
+        return reduce_states(initial_state, fn, reversed(self._elements))
 
     def filter(self, fn: Callable[[T], bool]) -> 'ListCollection[T]':
-        return ListCollection(self.reduce([], lambda state, elem: [*state, elem] if fn(elem) else state))
+        return ListCollection([elem for elem in self._elements if fn(elem)])
 
     def single(self, fn: Callable[[T], bool]) -> Optional[T]:
         for elem in self._elements:
@@ -97,8 +121,84 @@ class ListCollection(Generic[T]):
 
         return None
 
-    def _copy_elements(self) -> List[T]:
-        return self._elements.copy()
+    #
+    # chained map and filter without a list in between, see LazyCollection
+    def lazy(self) -> 'LazyCollection[T]':
+        return LazyCollection(self._elements)
+
+    def _own_elements(self) -> List[T]:
+        if self._shared:
+            self._elements = self._elements.copy()
+            self._shared = False
+
+        return self._elements
 
     def __str__(self):
         return self._elements.__str__()
+
+
+#
+# map and filter of a lazy collection are applied as its elements are consumed, by one of the terminal
+# operations. the elements can only be consumed once unless the collection is made from a list
+class LazyCollection(Generic[T]):
+    __slots__ = ('_source',)
+
+    def __init__(self, source: Iterable[T]):
+        self._source = source
+
+    def map(self, fn: Callable[[T], R]) -> 'LazyCollection[R]':
+        return LazyCollection(fn(elem) for elem in self._source)
+
+    def filter(self, fn: Callable[[T], bool]) -> 'LazyCollection[T]':
+        return LazyCollection(elem for elem in self._source if fn(elem))
+
+    def match(self, fn: Callable[[T], bool]) -> bool:
+        for elem in self._source:
+            if fn(elem):
+                return True
+
+        return False
+
+    def single(self, fn: Callable[[T], bool]) -> Optional[T]:
+        for elem in self._source:
+            if fn(elem):
+                return elem
+
+        return None
+
+    def first(self) -> Optional[T]:
+        for elem in self._source:
+            return elem
+
+        return None
+
+    def reduce(self, initial_state: S, fn: Callable[[S, T], S]) -> Optional[S]:
+        return reduce_states(initial_state, fn, self._source)
+
+    def collect(self) -> ListCollection[T]:
+        return ListCollection(list(self._source))
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._source)
+
+
+def fold_states(initial_state: S, fn: Callable[[S, T], S], elements: Iterable[T]) -> List[S]:
+    states = []
+    state = initial_state
+
+    for elem in elements:
+        state = fn(state, elem)
+        states.append(state)
+
+    return states
+
+
+def reduce_states(initial_state: S, fn: Callable[[S, T], S], elements: Iterable[T]) -> Optional[S]:
+    state = initial_state
+    empty = True
+
+    for elem in elements:
+        state = fn(state, elem)
+        empty = False
+
+    return None if empty else state
@@ -8,6 +8,8 @@ T = TypeVar('T')
 
 
 class Node(BaseNode[T], Generic[T], ABC):
+    __slots__ = ()
+
     def __init__(self, children: List['Node'] = None):
         super().__init__(self, children)
 
@@ -20,20 +22,26 @@ class Node(BaseNode[T], Generic[T], ABC):
 
 
 class PhysicalComponent(Node[T], Generic[T], ABC):
+    __slots__ = ()
+
     def is_logical(self) -> bool:
         return False
 
 
 class LogicalComponent(Node[T], Generic[T], ABC):
+    __slots__ = ()
+
     def is_logical(self) -> bool:
         return True
 
 
 class Container(ABC):
-    pass
+    __slots__ = ()
 
 
 class Identifier(PhysicalComponent['Identifier']):
+    __slots__ = ('_represent',)
+
     def __init__(self, represent: str):
         super().__init__()
 
@@ -47,6 +55,8 @@ class Identifier(PhysicalComponent['Identifier']):
 
 
 class Type(PhysicalComponent['Type']):
+    __slots__ = ('_represent',)
+
     def __init__(self, represent: str):
         super().__init__()
 
@@ -100,35 +110,39 @@ class Type(PhysicalComponent['Type']):
 
 
 class Statement(PhysicalComponent[T], PrinterFactory, Generic[T], ABC):
-    pass
+    __slots__ = ()
 
 
 class StatementBlock(Statement[T], Generic[T], ABC):
-    pass
+    __slots__ = ()
 
 
 class Expression(PhysicalComponent[T], PrinterFactory, Generic[T], ABC):
+    __slots__ = ()
+
     @abstractmethod
     def type(self) -> Type:
         pass
 
 
 class LeftValue(Expression[T], Generic[T], ABC):
-    pass
+    __slots__ = ()
 
 
 class RightValue(Expression[T], Generic[T], ABC):
-    pass
+    __slots__ = ()
 
 
 class Reference(LeftValue[T], RightValue[T], Generic[T], ABC):
-    pass
+    __slots__ = ()
 
 
 class Evaluation(RightValue[T], Generic[T], ABC):
-    pass
+    __slots__ = ()
 
 
 class Callable(Evaluation[T], Generic[T], ABC):
+    __slots__ = ()
+
     def type(self) -> Type:
         return Type.callable()
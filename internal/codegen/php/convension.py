@@ -2,6 +2,8 @@ from internal.codegen.php.ast import Type
 
 
 class AccessModifier:
+    __slots__ = ('_represent', '_public', '_protected', '_private')
+
     def __init__(self, represent: str, public: bool, protected: bool, private: bool):
         self._represent = represent
         self._public = public
@@ -34,6 +36,8 @@ class AccessModifier:
 
 
 class UnaryOperator:
+    __slots__ = ('_represent', '_type')
+
     def __init__(self, typ: Type, represent: str):
         self._represent = represent
         self._type = typ
@@ -2,10 +2,12 @@ from typing import List
 
 from internal.codegen.common.printer import PrinterFactory, PassThroughPrinter
 from internal.codegen.php.ast import Node, Identifier, Type, Evaluation
-from internal.codegen.php.printer.common import BasePrinter, Printer
+from internal.codegen.php.printer.common import BasePrinter
 
 
 class VariableDeclaration(Node['VariableDeclaration']):
+    __slots__ = ('_identifier', '_typ')
+
     def __init__(self, name: str, typ: Type):
         super().__init__()
 
@@ -23,6 +25,8 @@ class VariableDeclaration(Node['VariableDeclaration']):
 
 
 class ArgumentDeclaration(Node['ArgumentDeclaration'], PrinterFactory):
+    __slots__ = ('_identifier', '_type')
+
     def __init__(self, identifier: Identifier, typ: Type):
         super().__init__()
 
@@ -38,13 +42,10 @@ class ArgumentDeclaration(Node['ArgumentDeclaration'], PrinterFactory):
     def is_logical(self) -> bool:
         return True
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import ArgumentDeclarationPrinter
-
-        return ArgumentDeclarationPrinter(self, parent)
-
 
 class ArgumentListDeclaration(Node['ArgumentDeclarationList'], PrinterFactory):
+    __slots__ = ('_arguments',)
+
     def __init__(self, arguments: List[ArgumentDeclaration]):
         super().__init__(arguments)
 
@@ -63,13 +64,13 @@ class ArgumentListDeclaration(Node['ArgumentDeclarationList'], PrinterFactory):
     def is_logical(self) -> bool:
         return True
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import ArgumentListDeclarationPrinter
-
-        return ArgumentListDeclarationPrinter(self, parent, self.arguments())
+    def printer_children(self) -> List[PrinterFactory]:
+        return self.arguments()
 
 
 class FunctionDeclaration(Node['FunctionDeclaration']):
+    __slots__ = ('_identifier', '_return_type', '_argument_list')
+
     def __init__(self, identifier: Identifier, return_type: Type, argument_list: ArgumentListDeclaration):
         super().__init__()
 
@@ -91,6 +92,8 @@ class FunctionDeclaration(Node['FunctionDeclaration']):
 
 
 class Parameter(Node['Parameter'], PrinterFactory):
+    __slots__ = ('_index', '_evaluation')
+
     def __init__(self, index: int, evaluation: Evaluation):
         super().__init__([evaluation])
 
@@ -111,6 +114,8 @@ class Parameter(Node['Parameter'], PrinterFactory):
 
 
 class ParameterList(Node['ParameterList'], PrinterFactory):
+    __slots__ = ('_parameters',)
+
     def __init__(self, parameters: List[Evaluation]):
         super().__init__(parameters)
 
@@ -122,7 +127,5 @@ class ParameterList(Node['ParameterList'], PrinterFactory):
     def is_logical(self) -> bool:
         return True
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import ParameterListPrinter
-
-        return ParameterListPrinter(self, parent, self.parameters())
+    def printer_children(self) -> List[PrinterFactory]:
+        return self.parameters()
@@ -1,19 +1,60 @@
-from typing import List
+from typing import List, IO
 
-from internal.codegen.common.printer import HighOrderPrinter, PrintContext, Printer, PrinterConfig
+from internal.codegen.common.printer import HighOrderPrinter, PassThroughPrinter, PrintContext, Printer, \
+    PrinterConfig, PrintSink, ChunkSink, StreamSink
+from internal.codegen.common.cache import RenderCache, IncrementalCache
+from internal.codegen.common.plan import RenderPlans
+from internal.codegen.common.profile import PrintProfiler
 from internal.codegen.php.ast import StatementBlock
 from internal.codegen.php.util import StatementBlockCollection
 from internal.codegen.php.middleware import IndentMiddleware
 
 
 class SourceFile:
-    def __init__(self, statement_blocks: List[StatementBlock]):
+    def __init__(self, statement_blocks: List[StatementBlock], render_cache: RenderCache = None,
+                 profiler: PrintProfiler = None, render_plans: RenderPlans = None,
+                 incremental_cache: IncrementalCache = None):
         self._statement_blocks = StatementBlockCollection(statement_blocks)
+        self._render_cache = render_cache
+        self._profiler = profiler
+        self._render_plans = render_plans
+        self._incremental_cache = incremental_cache
 
     def print(self) -> str:
+        sink = ChunkSink()
+        self.emit(sink)
+
+        return sink.getvalue()
+
+    def write(self, fp: IO) -> None:
+        sink = StreamSink(fp)
+        self.emit(sink)
+        sink.close()
+
+    def emit(self, sink: PrintSink) -> None:
+        PassThroughPrinter(None, [self._statement_blocks]) \
+            .emit(PrintContext.initial(PrinterConfig.default(), [IndentMiddleware()], self._render_cache,
+                                         self._profiler, self._render_plans, self._incremental_cache), sink)
+
+
+class SourceFragment:
+    def __init__(self, statement_blocks: List[StatementBlock], indent_size: int = 0, render_cache: RenderCache = None,
+                 profiler: PrintProfiler = None, render_plans: RenderPlans = None,
+                 incremental_cache: IncrementalCache = None):
+        self._statement_blocks = StatementBlockCollection(statement_blocks)
+        self._indent_size = indent_size
+        self._render_cache = render_cache
+        self._profiler = profiler
+        self._render_plans = render_plans
+        self._incremental_cache = incremental_cache
+
+    def print(self) -> str:
+        def configure(ctx: PrintContext):
+            ctx.edit_state().set_indent_size(self._indent_size)
+
         def print_fn(printer: Printer, context: PrintContext) -> str:
-            components = [child.print(context.create_child()) for child in printer.children()]
-            return "\n".join(components)
+            return printer.children()[0].print(context.create_child(configure))
 
         return HighOrderPrinter(print_fn, None, [self._statement_blocks]) \
-            .print(PrintContext.initial(PrinterConfig.default(), [IndentMiddleware()]))
+            .print(PrintContext.initial(PrinterConfig.default(), [IndentMiddleware()], self._render_cache,
+                                         self._profiler, self._render_plans, self._incremental_cache))
@@ -6,6 +6,8 @@ from internal.codegen.php.grammer import MultiLineCommentStatement
 
 
 class DocCommentStatement(MultiLineCommentStatement):
+    __slots__ = ('_description', '_annotations')
+
     def __init__(self, description: Optional[str] = None, annotations: Optional[List['Annotation']] = None):
         super().__init__([])
 
@@ -35,6 +37,8 @@ class DocCommentStatement(MultiLineCommentStatement):
 
 
 class DocCommentStatementPrinter(Printer[DocCommentStatement]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         lines = [
             "/**"
@@ -56,6 +60,8 @@ class DocCommentStatementPrinter(Printer[DocCommentStatement]):
 
 
 class Annotation:
+    __slots__ = ('_name', '_value')
+
     def __init__(self, name: str, value: str):
         self._name = name
         self._value = value
@@ -1,13 +1,14 @@
-from typing import List, Optional, IO, Tuple
+from functools import partial
+from typing import List, Optional, IO, Tuple, Callable, Dict, Hashable
 from colorama import Fore
 
 from internal.codegen.php.convension import AccessModifier
-from internal.spec import Field, Spec, aggregate_groups_from_fields
-from internal.codegen import Generator
+from internal.spec import Field, Spec, Reference, GroupIndex, GroupBucket, SpecDiff
+from internal.codegen import Generator, collect_affected_fragments
 from internal.util import upper_first
 from internal.lang.php import Comment, VarAnnotation, ReturnAnnotation, ParamAnnotation
 from internal.codegen.php.ast import Type, Identifier, StatementBlock
-from internal.codegen.php.expr import SourceFile
+from internal.codegen.php.expr import SourceFile, SourceFragment
 from internal.codegen.php.element import VariableDeclaration, FunctionDeclaration, \
     ArgumentListDeclaration, ArgumentDeclaration, ParameterList, Parameter
 from internal.codegen.php.extension import DocCommentStatement, Annotation
@@ -76,6 +77,19 @@ def get_php_deserialize_func(typ: str) -> Optional[str]:
     return PHP_DESERIALIZE_FN[typ] if typ in PHP_DESERIALIZE_FN else None
 
 
+def get_php_reference_type(reference: Reference) -> str:
+    lang = reference.spec().lang().php()
+
+    return "\\{0}\\{1}".format(lang.namespace(), lang.clazz()) if lang.namespace() else "\\" + lang.clazz()
+
+
+def get_php_field_type(field: Field) -> str:
+    if field.reference() is not None:
+        return get_php_reference_type(field.reference())
+
+    return get_php_type(field.type())
+
+
 def generate_comment(comment: Comment) -> str:
     if not comment.needs_generate():
         return ""
@@ -102,7 +116,7 @@ def generate_comment(comment: Comment) -> str:
 
 def generate_member(field: Field) -> str:
     comment = Comment(field.comment(), [
-        VarAnnotation(get_php_type(field.type()))
+        VarAnnotation(get_php_field_type(field))
     ])
 
     s = ""
@@ -132,7 +146,7 @@ def generate_constructor(fields: List[Field]) -> str:
         assignments.append("$this->{0} = ${0};".format(field.name()))
 
     comment = Comment(None, [
-        ParamAnnotation(get_php_type(field.type()), field.name(), field.comment()) for field in fields
+        ParamAnnotation(get_php_field_type(field), field.name(), field.comment()) for field in fields
     ])
 
     s = ""
@@ -147,10 +161,11 @@ def generate_constructor(fields: List[Field]) -> str:
 
 
 class SerializingField:
-    def __init__(self, name: str, typ: str, serialized_name: str):
+    def __init__(self, name: str, typ: str, serialized_name: str, reference: Reference = None):
         self._name = name
         self._typ = typ
         self._serialized_name = serialized_name
+        self._reference = reference
 
     def name(self) -> str:
         return self._name
@@ -161,7 +176,13 @@ class SerializingField:
     def serialized_name(self) -> str:
         return self._serialized_name
 
+    def reference(self) -> Optional[Reference]:
+        return self._reference
+
     def convert_func(self) -> Optional[str]:
+        if self.reference() is not None:
+            return "{expr}->toArray()"
+
         return get_php_serialize_func(self.type())
 
 
@@ -197,10 +218,11 @@ def generate_simple_serialize_method(method_name: str, fields: List[SerializingF
 
 
 class DeserializingField:
-    def __init__(self, position: int, typ: str, serialized_name: str):
+    def __init__(self, position: int, typ: str, serialized_name: str, reference: Reference = None):
         self._position = position
         self._typ = typ
         self._serialized_name = serialized_name
+        self._reference = reference
 
     def position(self) -> int:
         return self._position
@@ -211,7 +233,13 @@ class DeserializingField:
     def serialized_name(self) -> str:
         return self._serialized_name
 
+    def reference(self) -> Optional[Reference]:
+        return self._reference
+
     def convert_func(self) -> Optional[str]:
+        if self.reference() is not None:
+            return get_php_reference_type(self.reference()) + "::fromArray({expr})"
+
         return get_php_deserialize_func(self.type())
 
 
@@ -250,7 +278,7 @@ def generate_simple_deserialize_method(method_name: str, clazz: str, n: int, fie
 
 def generate_to_array_method(fields: List[Field]) -> str:
     return generate_simple_serialize_method('toArray', [
-        SerializingField(x.name(), x.type(), x.name()) for x in fields
+        SerializingField(x.name(), x.type(), x.name(), x.reference()) for x in fields
     ])
 
 
@@ -258,32 +286,31 @@ def generate_from_array_method(clazz: str, fields: List[Field]) -> str:
     n = len(fields)
 
     return generate_simple_deserialize_method("fromArray", clazz, n, [
-        DeserializingField(pos, fields[pos].type(), fields[pos].name()) for pos in range(n)
+        DeserializingField(pos, fields[pos].type(), fields[pos].name(), fields[pos].reference()) for pos in range(n)
     ])
 
 
-def generate_group_serialize_methods(fields: List[Field]) -> List[str]:
-    aggregate = aggregate_groups_from_fields(fields)
+def generate_group_serialize_methods(index: GroupIndex) -> List[str]:
     methods = []
 
-    for item in aggregate:
+    for item in index.groups():
         group_name = item[1]
         fields = item[2]
 
         method_name = 'to' + upper_first(group_name)
 
         methods.append(generate_simple_serialize_method(method_name, [
-            SerializingField(field[1].name(), field[1].type(), field[2].member()) for field in fields
+            SerializingField(field[1].name(), field[1].type(), field[2].member(), field[1].reference())
+            for field in fields
         ]))
 
     return methods
 
 
-def generate_group_deserialize_methods(clazz: str, fields: List[Field]) -> List[str]:
-    aggregate = aggregate_groups_from_fields(fields)
+def generate_group_deserialize_methods(clazz: str, index: GroupIndex) -> List[str]:
     methods = []
 
-    for item in aggregate:
+    for item in index.groups():
         n = item[0]
         group_name = item[1]
         fields = item[2]
@@ -291,7 +318,8 @@ def generate_group_deserialize_methods(clazz: str, fields: List[Field]) -> List[
         method_name = 'from' + upper_first(group_name)
 
         methods.append(generate_simple_deserialize_method(method_name, clazz, n, [
-            DeserializingField(field[0], field[1].type(), field[2].member()) for field in fields
+            DeserializingField(field[0], field[1].type(), field[2].member(), field[1].reference())
+            for field in fields
         ]))
 
     return methods
@@ -300,7 +328,7 @@ def generate_group_deserialize_methods(clazz: str, fields: List[Field]) -> List[
 def generate_serialize_methods(spec: Spec) -> str:
     methods = [
         generate_to_array_method(spec.fields()),
-        *generate_group_serialize_methods(spec.fields()),
+        *generate_group_serialize_methods(spec.group_index()),
     ]
 
     return '\n\n'.join(methods)
@@ -309,24 +337,32 @@ def generate_serialize_methods(spec: Spec) -> str:
 def generate_deserialize_methods(spec: Spec) -> str:
     methods = [
         generate_from_array_method(spec.lang().php().clazz(), spec.fields()),
-        *generate_group_deserialize_methods(spec.lang().php().clazz(), spec.fields()),
+        *generate_group_deserialize_methods(spec.lang().php().clazz(), spec.group_index()),
     ]
 
     return '\n\n'.join(methods)
 
 
-def v1_generate_members(spec: Spec) -> List[StatementBlock]:
-    class_fields = []
+def v1_generate_member(field: Field) -> List[StatementBlock]:
+    typ = field.type() if field.reference() is None else get_php_reference_type(field.reference())
 
-    for field in spec.fields():
-        class_fields.append(DocCommentStatement(
+    return [
+        DocCommentStatement(
             field.comment(), [
-                Annotation.types(field.type())
+                Annotation.types(typ)
             ]
-        ))
-        class_fields.append(MemberDeclaration(
+        ),
+        MemberDeclaration(
             Identifier(field.name()), Type(field.type()), AccessModifier.public(), False
-        ))
+        )
+    ]
+
+
+def v1_generate_members(spec: Spec) -> List[StatementBlock]:
+    class_fields = []
+
+    for field in spec.fields():
+        class_fields.extend(v1_generate_member(field))
 
     return class_fields
 
@@ -413,7 +449,7 @@ def v1_generate_simple_deserialize_method(
 
 def v1_generate_to_array_method(fields: List[Field]) -> List[StatementBlock]:
     return v1_generate_simple_serialize_method('toArray', [
-        SerializingField(x.name(), x.type(), x.name()) for x in fields
+        SerializingField(x.name(), x.type(), x.name(), x.reference()) for x in fields
     ])
 
 
@@ -421,45 +457,81 @@ def v1_generate_from_array_method(clazz: str, fields: List[Field]) -> List[State
     n = len(fields)
 
     return v1_generate_simple_deserialize_method("fromArray", clazz, n, [
-        DeserializingField(pos, fields[pos].type(), fields[pos].name()) for pos in range(n)
+        DeserializingField(pos, fields[pos].type(), fields[pos].name(), fields[pos].reference()) for pos in range(n)
     ])
 
 
-def v1_generate_group_serializing_methods(fields: List[Field]) -> List[StatementBlock]:
-    aggregation = aggregate_groups_from_fields(fields)
-    stmts = []
+def v1_generate_group_serializing_method(bucket: GroupBucket) -> List[StatementBlock]:
+    group_name = bucket[1]
+    fields = bucket[2]
 
-    for item in aggregation:
-        group_name = item[1]
-        fields = item[2]
+    method_name = 'to' + upper_first(group_name)
 
-        method_name = 'to' + upper_first(group_name)
+    return v1_generate_simple_serialize_method(method_name, [
+        SerializingField(field[1].name(), field[1].type(), field[2].member(), field[1].reference())
+        for field in fields
+    ])
 
-        stmts.extend(v1_generate_simple_serialize_method(method_name, [
-            SerializingField(field[1].name(), field[1].type(), field[2].member()) for field in fields
-        ]))
+
+def v1_generate_group_serializing_methods(index: GroupIndex) -> List[StatementBlock]:
+    stmts = []
+
+    for item in index.groups():
+        stmts.extend(v1_generate_group_serializing_method(item))
 
     return stmts
 
 
-def v1_generate_group_deserializing_methods(clazz: str, fields: List[Field]) -> List[StatementBlock]:
-    aggregation = aggregate_groups_from_fields(fields)
-    stmts = []
+def v1_generate_group_deserializing_method(clazz: str, bucket: GroupBucket) -> List[StatementBlock]:
+    n = bucket[0]
+    group_name = bucket[1]
+    fields = bucket[2]
 
-    for item in aggregation:
-        n = item[0]
-        group_name = item[1]
-        fields = item[2]
+    method_name = 'from' + upper_first(group_name)
 
-        method_name = 'from' + upper_first(group_name)
+    return v1_generate_simple_deserialize_method(method_name, clazz, n, [
+        DeserializingField(field[0], field[1].type(), field[2].member(), field[1].reference())
+        for field in fields
+    ])
 
-        stmts.extend(v1_generate_simple_deserialize_method(method_name, clazz, n, [
-            DeserializingField(field[0], field[1].type(), field[2].member()) for field in fields
-        ]))
+
+def v1_generate_group_deserializing_methods(clazz: str, index: GroupIndex) -> List[StatementBlock]:
+    stmts = []
+
+    for item in index.groups():
+        stmts.extend(v1_generate_group_deserializing_method(clazz, item))
 
     return stmts
 
 
+#
+# the class body in order, as named fragments which are built on demand:
+# members are named after their field, methods are named like 'fromArray()'
+def v1_fragment_builders(spec: Spec) -> List[Tuple[str, Callable[[], List[StatementBlock]]]]:
+    clazz = spec.lang().php().clazz()
+    index = spec.group_index()
+
+    return [
+        *[(field.name(), partial(v1_generate_member, field)) for field in spec.fields()],
+        ("fromArray()", partial(v1_generate_from_array_method, clazz, spec.fields())),
+        *[("from{0}()".format(upper_first(item[1])), partial(v1_generate_group_deserializing_method, clazz, item))
+          for item in index.groups()],
+        ("toArray()", partial(v1_generate_to_array_method, spec.fields())),
+        *[("to{0}()".format(upper_first(item[1])), partial(v1_generate_group_serializing_method, item))
+          for item in index.groups()],
+    ]
+
+
+#
+# what the structure of the class depends on besides its strings: which fields are commented
+# and the size of every group. it is known without building the class, see ClassDeclaration.shape()
+def v1_class_shape(spec: Spec) -> Hashable:
+    return (
+        tuple([field.comment() is not None for field in spec.fields()]),
+        tuple([(item[0], len(item[2])) for item in spec.group_index().groups()]),
+    )
+
+
 class PHPGenerator(Generator):
     @staticmethod
     def get_extension() -> str:
@@ -473,14 +545,35 @@ class PHPGenerator(Generator):
         file = SourceFile([
             NamespaceDeclaration(spec.lang().php().namespace()),
             ClassDeclaration(Identifier(spec.lang().php().clazz()), [
-                *v1_generate_members(spec),
-                *v1_generate_from_array_method(spec.lang().php().clazz(), spec.fields()),
-                *v1_generate_group_deserializing_methods(spec.lang().php().clazz(), spec.fields()),
-                *v1_generate_to_array_method(spec.fields()),
-                *v1_generate_group_serializing_methods(spec.fields())
-            ])
-        ])
-        print(file.print())
+                stmt for _, build in v1_fragment_builders(spec) for stmt in build()
+            ], v1_class_shape(spec))
+        ], self.render_cache(), self.profiler(), self.render_plans(), self.incremental_cache())
+        file.write(fp)
+        fp.write("\n")
+
+    def fragment_names(self, spec: Spec) -> List[str]:
+        return [name for name, _ in v1_fragment_builders(spec)]
+
+    def affected_fragments(self, diff: SpecDiff) -> Optional[List[str]]:
+        old_lang = diff.old().lang().php()
+        new_lang = diff.new().lang().php()
+
+        if old_lang.namespace() != new_lang.namespace() or old_lang.clazz() != new_lang.clazz():
+            return None
+
+        return collect_affected_fragments(diff, "Array")
+
+    #
+    # renders the requested fragments as they appear in the class body, fragments which no longer exist are skipped
+    def generate_fragments(self, spec: Spec, names: List[str]) -> Dict[str, str]:
+        wanted = set(names)
+
+        return {
+            name: SourceFragment(
+                build(), 1, self.render_cache(), self.profiler(), self.render_plans(), self.incremental_cache()
+            ).print()
+            for name, build in v1_fragment_builders(spec) if name in wanted
+        }
 
     def generate_old(self, spec: Spec, fp: IO) -> None:
         print(
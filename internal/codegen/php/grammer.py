@@ -1,18 +1,20 @@
 from abc import ABC, abstractmethod
-from typing import List, TypeVar, Generic
+from typing import List, TypeVar, Generic, Hashable, Optional
 
 from internal.codegen.common.printer import PassThroughPrinter
 from internal.codegen.php.convension import AccessModifier, UnaryOperator
-from internal.codegen.php.printer.common import BasePrinter, Printer, PrinterFactory
+from internal.codegen.php.printer.common import BasePrinter, PrinterFactory
 from internal.codegen.php.ast import Identifier, Type, StatementBlock, LeftValue, RightValue, Evaluation, Reference, \
     Callable, Node, LogicalComponent
 from internal.codegen.php.element import ParameterList, ArgumentListDeclaration
-from internal.codegen.php.util import StatementBlockCollection
+from internal.codegen.php.util import StatementBlockCollection, StatementBlockCollectionBuilder
 
 T = TypeVar('T')
 
 
 class NamespaceDeclaration(StatementBlock['NamespaceDeclaration']):
+    __slots__ = ('_name',)
+
     def __init__(self, name: str):
         super().__init__()
 
@@ -24,13 +26,10 @@ class NamespaceDeclaration(StatementBlock['NamespaceDeclaration']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import NamespacePrinter
-
-        return NamespacePrinter(self, parent)
-
 
 class UseStatement(StatementBlock['UseStatement']):
+    __slots__ = ('_qualified_name',)
+
     def __init__(self, qualified_name: str):
         super().__init__()
 
@@ -42,13 +41,10 @@ class UseStatement(StatementBlock['UseStatement']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import UsePrinter
-
-        return UsePrinter(self, parent)
-
 
 class SingleLineCommentStatement(StatementBlock['SingleLineCommentStatement']):
+    __slots__ = ('_content',)
+
     def __init__(self, content: str):
         super().__init__()
 
@@ -60,13 +56,10 @@ class SingleLineCommentStatement(StatementBlock['SingleLineCommentStatement']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import SingleLineCommentPrinter
-
-        return SingleLineCommentPrinter(self, parent)
-
 
 class MultiLineCommentStatement(StatementBlock['MultiLineCommentStatement']):
+    __slots__ = ('_content',)
+
     def __init__(self, lines: List[str]):
         super().__init__()
 
@@ -78,38 +71,47 @@ class MultiLineCommentStatement(StatementBlock['MultiLineCommentStatement']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import MultiLineCommentPrinter
 
-        return MultiLineCommentPrinter(self, parent)
+class ClassDeclaration(StatementBlock['ClassDeclaration']):
+    __slots__ = ('_identifier', '_fields', '_shape')
 
+    # the shape describes the class rather than being part of it
+    TRANSIENT = {'_shape': None}
 
-class ClassDeclaration(StatementBlock['ClassDeclaration']):
-    def __init__(self, identifier: Identifier, fields: List['StatementBlock']):
+    def __init__(self, identifier: Identifier, fields: List['StatementBlock'], shape: Hashable = None):
         super().__init__(fields)
 
         self._identifier = identifier
-        self._fields = StatementBlockCollection(fields)
+        self._fields = StatementBlockCollectionBuilder(fields)
+        self._shape = shape
+        self.adopt(self._fields)
 
     def identifier(self) -> Identifier:
         return self._identifier
 
     def fields(self) -> StatementBlockCollection:
-        return self._fields.clone()
+        return self._fields.build()
+
+    #
+    # the shape of the class as the generator which built it describes it, None if it is not known.
+    # classes of the same shape only differ in their strings, see Printer.plan_shape()
+    def shape(self) -> Optional[Hashable]:
+        return self._shape
 
     def add_field(self, stmt: StatementBlock):
         self._fields.add(stmt)
+        self._shape = None
 
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import ClassDeclarationPrinter
-
-        return ClassDeclarationPrinter(self, parent, [self.fields()])
+    def printer_children(self) -> List[PrinterFactory]:
+        return [self.fields()]
 
 
 class ClassField(StatementBlock[T], Generic[T], ABC):
+    __slots__ = ()
+
     @abstractmethod
     def access_modifier(self) -> AccessModifier:
         pass
@@ -129,6 +131,8 @@ class ClassField(StatementBlock[T], Generic[T], ABC):
 
 
 class MemberDeclaration(ClassField['MethodDeclaration']):
+    __slots__ = ('_identifier', '_type', '_access_modifier', '_static')
+
     def __init__(self, identifier: Identifier, typ: Type, access_modifier: AccessModifier, static: bool):
         super().__init__()
 
@@ -152,17 +156,15 @@ class MemberDeclaration(ClassField['MethodDeclaration']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import MemberDeclarationPrinter
-
-        return MemberDeclarationPrinter(self, parent)
-
 
 class MethodBody(LogicalComponent['MethodBody'], PrinterFactory):
+    __slots__ = ('_statement_blocks',)
+
     def __init__(self, statement_blocks: List[StatementBlock]):
         super().__init__(statement_blocks)
 
         self._statement_blocks = StatementBlockCollection(statement_blocks)
+        self.adopt(self._statement_blocks)
 
     def statement_blocks(self) -> StatementBlockCollection:
         return self._statement_blocks
@@ -172,6 +174,8 @@ class MethodBody(LogicalComponent['MethodBody'], PrinterFactory):
 
 
 class MethodDeclaration(ClassField['MethodDeclaration']):
+    __slots__ = ('_identifier', '_return_type', '_access_modifier', '_static', '_argument_list', '_body')
+
     def __init__(self, identifier: Identifier, return_type: Type, access_modifier: AccessModifier, static: bool,
                  argument_list: ArgumentListDeclaration, body: MethodBody):
         super().__init__([body])
@@ -204,13 +208,13 @@ class MethodDeclaration(ClassField['MethodDeclaration']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import MethodPrinter
-
-        return MethodPrinter(self, parent, [self.argument_list(), self.body()])
+    def printer_children(self) -> List[PrinterFactory]:
+        return [self.argument_list(), self.body()]
 
 
 class UnaryEvaluation(Evaluation['UnaryEvaluation']):
+    __slots__ = ('_operator', '_left', '_right')
+
     def __init__(self, operator: UnaryOperator, left: Evaluation, right: Evaluation):
         super().__init__([operator, left, right])
 
@@ -233,15 +237,15 @@ class UnaryEvaluation(Evaluation['UnaryEvaluation']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import UnaryEvaluationPrinter
-
-        return UnaryEvaluationPrinter(self, parent, [
+    def printer_children(self) -> List[PrinterFactory]:
+        return [
             self.left(), self.operator(), self.right()
-        ])
+        ]
 
 
 class UnaryAssignmentStatement(StatementBlock['UnaryAssignmentStatement']):
+    __slots__ = ('_left', '_right')
+
     def __init__(self, left: LeftValue, right: RightValue):
         super().__init__([left, right])
 
@@ -260,15 +264,15 @@ class UnaryAssignmentStatement(StatementBlock['UnaryAssignmentStatement']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import UnaryAssignmentPrinter
-
-        return UnaryAssignmentPrinter(self, parent, [
+    def printer_children(self) -> List[PrinterFactory]:
+        return [
             self.left(), self.right()
-        ])
+        ]
 
 
 class AnyEvaluation(Evaluation['AnyEvaluation']):
+    __slots__ = ('_expression', '_type')
+
     def __init__(self, expression: str, typ: Type):
         super().__init__()
 
@@ -284,13 +288,10 @@ class AnyEvaluation(Evaluation['AnyEvaluation']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import AnyEvaluationPrinter
-
-        return AnyEvaluationPrinter(self, parent)
-
 
 class Accessor(Reference['Accessor']):
+    __slots__ = ('_name', '_type', '_parent')
+
     def __init__(self, name: str, typ: Type, parent: 'Accessor' = None):
         super().__init__()
 
@@ -324,19 +325,19 @@ class Accessor(Reference['Accessor']):
     def parent(self) -> 'Accessor':
         return self._parent
 
+    # the output of an accessor includes its parents, so it is touched along with them
     def set_parent(self, parent: 'Accessor') -> None:
         self._parent = parent
+        self.adopt(parent)
+        self.touch()
 
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import AccessorPrinter
-
-        return AccessorPrinter(self, parent)
-
 
 class Scope:
+    __slots__ = ('_type',)
+
     def __init__(self, typ: Type):
         self._type = typ
 
@@ -345,6 +346,8 @@ class Scope:
 
 
 class ThisAccessor(Accessor):
+    __slots__ = ('_scope',)
+
     def __init__(self, scope: Scope):
         super().__init__("$this", scope.type())
 
@@ -355,6 +358,8 @@ class ThisAccessor(Accessor):
 
 
 class ReturnStatement(StatementBlock['ReturnStatement']):
+    __slots__ = ('_evaluation',)
+
     def __init__(self, evaluation: Evaluation):
         super().__init__([evaluation])
 
@@ -366,13 +371,13 @@ class ReturnStatement(StatementBlock['ReturnStatement']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import ReturnPrinter
-
-        return ReturnPrinter(self, parent, [self.evaluation()])
+    def printer_children(self) -> List[PrinterFactory]:
+        return [self.evaluation()]
 
 
 class NamedCallableReference(Callable['NamedCallableReference']):
+    __slots__ = ('_name',)
+
     def __init__(self, name: str):
         super().__init__()
 
@@ -384,13 +389,10 @@ class NamedCallableReference(Callable['NamedCallableReference']):
     def is_logical(self) -> bool:
         return True
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import NamedCallableReferencePrinter
-
-        return NamedCallableReferencePrinter(self, parent)
-
 
 class ArrayElementDeclaration(Node, PrinterFactory):
+    __slots__ = ('_key', '_value')
+
     def __init__(self, key: str, value: Evaluation):
         super().__init__()
         self._key = key
@@ -405,13 +407,13 @@ class ArrayElementDeclaration(Node, PrinterFactory):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import ArrayElementDeclarationPrinter
-
-        return ArrayElementDeclarationPrinter(self, parent, [self.value()])
+    def printer_children(self) -> List[PrinterFactory]:
+        return [self.value()]
 
 
 class ArrayDeclaration(Evaluation['ArrayDeclaration']):
+    __slots__ = ('_as_dictionary', '_elements')
+
     def __init__(self, is_dictionary: bool, elements: List[ArrayElementDeclaration]):
         super().__init__(elements)
 
@@ -430,13 +432,13 @@ class ArrayDeclaration(Evaluation['ArrayDeclaration']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import ArrayDeclarationPrinter
-
-        return ArrayDeclarationPrinter(self, parent, self.elements())
+    def printer_children(self) -> List[PrinterFactory]:
+        return self.elements()
 
 
 class InvocationStatement(Evaluation['InvocationStatement']):
+    __slots__ = ('_callable', '_type', '_parameters')
+
     def __init__(self, call: Callable, typ: Type, parameters: ParameterList):
         super().__init__()
 
@@ -456,17 +458,12 @@ class InvocationStatement(Evaluation['InvocationStatement']):
     def is_logical(self) -> bool:
         return False
 
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import InvocationPrinter
-
-        return InvocationPrinter(self, parent, [self.callable(), self.parameters()])
+    def printer_children(self) -> List[PrinterFactory]:
+        return [self.callable(), self.parameters()]
 
 
 class BlankLineStatement(StatementBlock['BlankLineStatement']):
+    __slots__ = ()
+
     def is_logical(self) -> bool:
         return False
-
-    def create_printer(self, parent: BasePrinter) -> Printer:
-        from internal.codegen.php.printer.grammer import BlankLinePrinter
-
-        return BlankLinePrinter(self, parent)
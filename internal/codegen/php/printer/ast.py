@@ -4,10 +4,14 @@ from internal.codegen.php.printer.common import Printer
 
 
 class IdentifierPrinter(Printer[Identifier]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return self.node().represent()
 
 
 class TypePrinter(Printer[Type]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return self.node().represent()
@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import Generic, TypeVar, List
+from typing import Generic, TypeVar, List, Any
 
 from internal.codegen.common.printer import Printer as BasePrinter, PrinterFactory
 
@@ -7,6 +7,8 @@ T = TypeVar('T')
 
 
 class Printer(BasePrinter, Generic[T], ABC):
+    __slots__ = ('_node',)
+
     def __init__(self, node: T, parent: BasePrinter = None, children: List[PrinterFactory] = None):
         super().__init__(parent, children)
 
@@ -14,3 +16,6 @@ class Printer(BasePrinter, Generic[T], ABC):
 
     def node(self) -> T:
         return self._node
+
+    def cache_node(self) -> Any:
+        return self._node
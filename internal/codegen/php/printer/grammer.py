@@ -1,7 +1,7 @@
-from typing import TypeVar
+from typing import TypeVar, Any, Optional, Hashable, Iterator
 
-from internal.codegen.common.printer import PrintContext
-from internal.codegen.common.util import ListCollection
+from internal.codegen.common.printer import PrintContext, PrintSink, IterativePrinter, PrintStep, grouped_steps, \
+    template_steps, register_printer
 from internal.codegen.php.element import ArgumentDeclaration, ArgumentListDeclaration, ParameterList, Parameter
 from internal.codegen.php.grammer import SingleLineCommentStatement, MultiLineCommentStatement, ClassDeclaration, \
     MemberDeclaration, MethodDeclaration, UnaryEvaluation, UnaryAssignmentStatement, AnyEvaluation, Accessor, \
@@ -13,35 +13,45 @@ T = TypeVar('T')
 
 
 class ArgumentDeclarationPrinter(Printer[ArgumentDeclaration]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         identifier = self.node().identifier().represent()
 
         return "${0}".format(identifier)
 
 
-class ArgumentListDeclarationPrinter(Printer[ArgumentListDeclaration]):
-    def do_print(self, context: PrintContext) -> str:
-        components = [printer.print(context.create_child()) for printer in self.children()]
+class ArgumentListDeclarationPrinter(Printer[ArgumentListDeclaration], IterativePrinter):
+    __slots__ = ()
 
-        return ", ".join(components)
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return grouped_steps(",", self.children(), context, sink)
 
 
 class NamespacePrinter(Printer[NamespaceDeclaration]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return "namespace {0};".format(self.node().name())
 
 
 class UsePrinter(Printer[UseStatement]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return "use {0};".format(self.node().qualified_name())
 
 
 class SingleLineCommentPrinter(Printer[SingleLineCommentStatement]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return "// {0}".format(self.node().content())
 
 
 class MultiLineCommentPrinter(Printer[MultiLineCommentStatement]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         s = ""
         s += "/**\n"
@@ -50,17 +60,32 @@ class MultiLineCommentPrinter(Printer[MultiLineCommentStatement]):
         return s
 
 
-class ClassDeclarationPrinter(Printer[ClassDeclaration]):
-    def do_print(self, context: PrintContext) -> str:
+class ClassDeclarationPrinter(Printer[ClassDeclaration], IterativePrinter):
+    __slots__ = ()
+
+    # a class is printed once, caching it would only hold a copy of the whole body
+    def cache_node(self) -> Any:
+        return None
+
+    # classes of the same shape still share a plan, which only holds the literal text of one class
+    def plan_node(self) -> Any:
+        return self.node()
+
+    def plan_shape(self) -> Optional[Hashable]:
+        return self.node().shape()
+
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
         def configure(ctx: PrintContext):
-            ctx.state().set_indent_size(1)
+            ctx.edit_state().set_indent_size(1)
 
-        return "class {0} {{\n{1}\n}}".format(self.node().identifier().represent(), *[
-            printer.print(context.create_child(configure)) for printer in self.children()
-        ])
+        sink.write("class {0} {{\n".format(self.node().identifier().represent()))
+        yield from template_steps("{0}", self.children(), context, sink, configure)
+        sink.write("\n}")
 
 
 class MemberDeclarationPrinter(Printer[MemberDeclaration]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         access_modifier = self.node().access_modifier().represent()
         static_modifier = " static" if self.node().is_static() else ""
@@ -71,46 +96,51 @@ class MemberDeclarationPrinter(Printer[MemberDeclaration]):
         )
 
 
-class MethodBodyPrinter(Printer[MethodBody]):
-    def do_print(self, context: PrintContext) -> str:
+class MethodBodyPrinter(Printer[MethodBody], IterativePrinter):
+    __slots__ = ()
+
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
         block_printer = self.children()[0]
 
-        return block_printer.print(context.create_child())
+        yield block_printer, context.create_child(), sink
 
 
-class MethodPrinter(Printer[MethodDeclaration]):
-    def do_print(self, context: PrintContext) -> str:
+class MethodPrinter(Printer[MethodDeclaration], IterativePrinter):
+    __slots__ = ()
+
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
         access_modifier = self.node().access_modifier().represent()
         static_modifier = " static" if self.node().is_static() else ""
         identifier = self.node().identifier().represent()
-        argument_list = self.children()[0].print(context.create_child())
-        body = self.children()[1].print(context.create_child())
 
-        return "{0}{1} function {2}({3}) {{\n{4}\n}}".format(
-            access_modifier, static_modifier, identifier, argument_list, body
-        )
+        sink.write("{0}{1} function {2}(".format(access_modifier, static_modifier, identifier))
+        yield from template_steps("{0}) {{\n{1}\n}}", self.children(), context, sink)
 
 
-class UnaryEvaluationPrinter(Printer[UnaryEvaluation]):
-    def do_print(self, context: PrintContext) -> str:
-        return "{0} {1} {2}".format(*[
-            printer.print(context.create_child()) for printer in self.children()
-        ])
+class UnaryEvaluationPrinter(Printer[UnaryEvaluation], IterativePrinter):
+    __slots__ = ()
 
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return template_steps("{0} {1} {2}", self.children(), context, sink)
 
-class UnaryAssignmentPrinter(Printer[UnaryAssignmentStatement]):
-    def do_print(self, context: PrintContext) -> str:
-        return "{0} = {1};".format(*[
-            printer.print(context.create_child()) for printer in self.children()
-        ])
+
+class UnaryAssignmentPrinter(Printer[UnaryAssignmentStatement], IterativePrinter):
+    __slots__ = ()
+
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return template_steps("{0} = {1};", self.children(), context, sink)
 
 
 class AnyEvaluationPrinter(Printer[AnyEvaluation]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return self.node().expression()
 
 
 class AccessorPrinter(Printer[Accessor]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         current = self.node()
         accessors = []
@@ -122,65 +152,94 @@ class AccessorPrinter(Printer[Accessor]):
         return '->'.join([accessor.name() for accessor in accessors[::-1]])
 
 
-class ReturnPrinter(Printer[ReturnStatement]):
-    def do_print(self, context: PrintContext) -> str:
-        eval_printer = self.children()[0]
+class ReturnPrinter(Printer[ReturnStatement], IterativePrinter):
+    __slots__ = ()
 
-        return "return {0};".format(eval_printer.print(context.create_child()))
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return template_steps("return {0};", self.children(), context, sink)
 
 
 class NamedCallableReferencePrinter(Printer[NamedCallableReference]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return self.node().name()
 
 
-class ParameterPrinter(Printer[Parameter]):
-    def do_print(self, context: PrintContext) -> str:
+class ParameterPrinter(Printer[Parameter], IterativePrinter):
+    __slots__ = ()
+
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
         evaluation_printer = self.children()[0]
 
-        return evaluation_printer.print(context.create_child())
+        yield evaluation_printer, context.create_child(), sink
 
 
-class ParameterListPrinter(Printer[ParameterList]):
-    def do_print(self, context: PrintContext) -> str:
-        parameter_printers = self.children()
-        return ", ".join([printer.print(context.create_child()) for printer in parameter_printers])
+class ParameterListPrinter(Printer[ParameterList], IterativePrinter):
+    __slots__ = ()
 
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return grouped_steps(",", self.children(), context, sink)
 
-class InvocationPrinter(Printer[InvocationStatement]):
-    def do_print(self, context: PrintContext) -> str:
-        fn_printer, parameter_list_printer = self.children()
 
-        return "{0}({1})".format(
-            fn_printer.print(context.create_child()), parameter_list_printer.print(context.create_child())
-        )
+class InvocationPrinter(Printer[InvocationStatement], IterativePrinter):
+    __slots__ = ()
+
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return template_steps("{0}({1})", self.children(), context, sink)
+
 
+class ArrayElementDeclarationPrinter(Printer[ArrayElementDeclaration], IterativePrinter):
+    __slots__ = ()
 
-class ArrayElementDeclarationPrinter(Printer[ArrayElementDeclaration]):
-    def do_print(self, context: 'PrintContext') -> str:
+    def key_context(self) -> Optional[Hashable]:
+        parent_printer = self.parent()  # type: Printer[ArrayDeclaration]
+
+        return parent_printer.node().is_dictionary()
+
+    def do_steps(self, context: 'PrintContext', sink: PrintSink) -> Iterator[PrintStep]:
         parent_printer = self.parent()  # type: Printer[ArrayDeclaration]
         value_printer = self.children()[0]
 
         if parent_printer.node().is_dictionary():
-            return '"{0}" => {1}'.format(self.node().key(), value_printer.print(context.create_child()))
-        else:
-            return "{0}".format(value_printer.print(context.create_child()))
+            sink.write('"{0}" => '.format(self.node().key()))
 
+        yield value_printer, context.create_child(), sink
 
-class ArrayDeclarationPrinter(Printer[ArrayDeclaration]):
-    def do_print(self, context: 'PrintContext') -> str:
-        element_printers = self.children()
-        exprs = [printer.print(context.create_child()) for printer in element_printers]
 
-        needs_wrap = ListCollection(exprs).reduce(0, lambda n, elem: n + len(elem)) > 80
-        indent = context.config().indent().process(1)
+class ArrayDeclarationPrinter(Printer[ArrayDeclaration], IterativePrinter):
+    __slots__ = ()
 
-        if needs_wrap:
-            return "array(\n{0}{1}\n)".format(indent, ",\n{0}".format(indent).join(exprs))
-        else:
-            return "array({0})".format(", ".join(exprs))
+    def do_steps(self, context: 'PrintContext', sink: PrintSink) -> Iterator[PrintStep]:
+        sink.write("array(")
+        yield from grouped_steps(",", self.children(), context, sink)
+        sink.write(")")
 
 
 class BlankLinePrinter(Printer[BlankLineStatement]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return "\n"
+
+
+register_printer(ArgumentDeclaration, ArgumentDeclarationPrinter)
+register_printer(ArgumentListDeclaration, ArgumentListDeclarationPrinter)
+register_printer(ParameterList, ParameterListPrinter)
+register_printer(NamespaceDeclaration, NamespacePrinter)
+register_printer(UseStatement, UsePrinter)
+register_printer(SingleLineCommentStatement, SingleLineCommentPrinter)
+register_printer(MultiLineCommentStatement, MultiLineCommentPrinter)
+register_printer(ClassDeclaration, ClassDeclarationPrinter)
+register_printer(MemberDeclaration, MemberDeclarationPrinter)
+register_printer(MethodDeclaration, MethodPrinter)
+register_printer(UnaryEvaluation, UnaryEvaluationPrinter)
+register_printer(UnaryAssignmentStatement, UnaryAssignmentPrinter)
+register_printer(AnyEvaluation, AnyEvaluationPrinter)
+register_printer(Accessor, AccessorPrinter)
+register_printer(ReturnStatement, ReturnPrinter)
+register_printer(NamedCallableReference, NamedCallableReferencePrinter)
+register_printer(ArrayElementDeclaration, ArrayElementDeclarationPrinter)
+register_printer(ArrayDeclaration, ArrayDeclarationPrinter)
+register_printer(InvocationStatement, InvocationPrinter)
+register_printer(BlankLineStatement, BlankLinePrinter)
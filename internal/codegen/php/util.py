@@ -1,13 +1,17 @@
-from typing import List, TypeVar, Generic
+from typing import List, TypeVar, Generic, Iterator, Optional
 
+from internal.codegen.common.ast import Versioned
 from internal.codegen.common.util import ListCollection
 from internal.codegen.php.ast import StatementBlock
-from internal.codegen.common.printer import Printer, PrinterFactory, PrintContext
+from internal.codegen.common.printer import Printer, PrinterFactory, PrintContext, PrintSink, IterativePrinter, \
+    PrintStep, joined_steps
 
 T = TypeVar('T')
 
 
 class Collection(Generic[T]):
+    __slots__ = ('_elements',)
+
     def __init__(self, elements: List[T]):
         self._elements = elements
 
@@ -18,22 +22,88 @@ class Collection(Generic[T]):
         return len(self.elements())
 
 
-class StatementBlockCollection(ListCollection[StatementBlock[T]], PrinterFactory, Generic[T]):
-    def __init__(self, statement_blocks: List[StatementBlock[T]]):
+class StatementBlockCollection(ListCollection[StatementBlock[T]], PrinterFactory, Versioned, Generic[T]):
+    __slots__ = ('_source', '_version', '_parents')
+
+    # the builder a collection was frozen from, see StatementBlockCollectionBuilder
+    TRANSIENT = {'_source': None}
+
+    def __init__(self, statement_blocks: List[StatementBlock[T]], source: Versioned = None):
         super().__init__(statement_blocks)
 
+        self._source = source  # type: Optional[Versioned]
+
+        # a frozen collection does not adopt the blocks, which were adopted by its builder already.
+        # the blocks touch the builder instead, whose version is therefore part of the version of the collection
+        if source is None:
+            self.adopt(*statement_blocks)
+
+    def version(self) -> int:
+        if self._source is None:
+            return super().version()
+
+        return super().version() + self._source.version()
+
+    def add(self, element: StatementBlock[T]) -> None:
+        super().add(element)
+        self.adopt(element)
+        self.touch()
+
+    def remove(self, element: StatementBlock[T]) -> None:
+        super().remove(element)
+        self.touch()
+
     def clone(self) -> 'StatementBlockCollection[T]':
-        return StatementBlockCollection[T](self._elements)
+        return StatementBlockCollection[T](self.elements(), self._source)
 
     def create_printer(self, parent: Printer) -> Printer:
         return StatementBlockCollectionPrinter(self, parent, self.elements())
 
 
-class StatementBlockCollectionPrinter(Printer):
+#
+# collects statement blocks with amortized constant appends. the blocks are frozen into a collection when they are
+# read, which is kept until the next modification, so that readers never see later modifications
+class StatementBlockCollectionBuilder(Versioned):
+    __slots__ = ('_statement_blocks', '_frozen', '_version', '_parents', '__weakref__')
+
+    TRANSIENT = {'_frozen': None}
+
+    def __init__(self, statement_blocks: List[StatementBlock[T]] = None):
+        if statement_blocks is None:
+            statement_blocks = []
+
+        self._statement_blocks = list(statement_blocks)
+        self._frozen = None  # type: Optional[StatementBlockCollection]
+        self.adopt(*statement_blocks)
+
+    def add(self, element: StatementBlock[T]) -> None:
+        self._statement_blocks.append(element)
+        self._frozen = None
+        self.adopt(element)
+        self.touch()
+
+    def remove(self, element: StatementBlock[T]) -> None:
+        self._statement_blocks.remove(element)
+        self._frozen = None
+        self.touch()
+
+    def count(self) -> int:
+        return len(self._statement_blocks)
+
+    def build(self) -> StatementBlockCollection[T]:
+        if self._frozen is None:
+            self._frozen = StatementBlockCollection(self._statement_blocks.copy(), self)
+
+        return self._frozen.clone()
+
+
+class StatementBlockCollectionPrinter(IterativePrinter):
+    __slots__ = ('_node',)
+
     def __init__(self, node: StatementBlockCollection, parent: Printer = None, children: List[PrinterFactory] = None):
         super().__init__(parent, children)
 
         self._node = node
 
-    def do_print(self, context: PrintContext) -> str:
-        return "\n".join(printer.print(context.create_child()) for printer in self.children())
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return joined_steps("\n", self.children(), context, sink)
@@ -1 +1,3 @@
 from .generator import *
+# the printers register themselves for the nodes they print once they are loaded
+from . import printer as printers
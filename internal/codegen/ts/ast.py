@@ -1,9 +1,18 @@
 from typing import List
 
+from internal.codegen.common.ast import Versioned
 from internal.codegen.common.printer import PrinterFactory, Printer, PrintContext
 
 
-class Identifier(PrinterFactory):
+#
+# lays out the attributes of Versioned once for every node, so that nodes can derive from more than one base
+class Node(PrinterFactory, Versioned):
+    __slots__ = ('_version', '_parents', '__weakref__')
+
+
+class Identifier(Node):
+    __slots__ = ('_represent',)
+
     def __init__(self, represent: str):
         self._represent = represent
 
@@ -15,6 +24,8 @@ class Identifier(PrinterFactory):
 
 
 class IdentifierPrinter(Printer):
+    __slots__ = ('_node',)
+
     def __init__(self, node: Identifier, parent: Printer = None, children: List[PrinterFactory] = None):
         super().__init__(parent, children)
 
@@ -24,7 +35,9 @@ class IdentifierPrinter(Printer):
         return self._node.represent()
 
 
-class Type(PrinterFactory):
+class Type(Node):
+    __slots__ = ('_represent',)
+
     def __init__(self, represent: str):
         self._represent = represent
 
@@ -64,6 +77,8 @@ class Type(PrinterFactory):
 
 
 class TypePrinter(Printer):
+    __slots__ = ('_node',)
+
     def __init__(self, node: Type, parent: Printer = None, children: List[PrinterFactory] = None):
         super().__init__(parent, children)
 
@@ -73,51 +88,44 @@ class TypePrinter(Printer):
         return self._node.represent()
 
 
-class Expression(PrinterFactory):
-    def type(self) -> Type:
-        raise NotImplementedError()
+class Expression(Node):
+    __slots__ = ()
 
-    def create_printer(self, parent: Printer) -> Printer:
+    def type(self) -> Type:
         raise NotImplementedError()
 
 
-class Statement(PrinterFactory):
-    def create_printer(self, parent: Printer) -> Printer:
-        raise NotImplementedError()
+class Statement(Node):
+    __slots__ = ()
 
 
 class StatementBlock(Statement):
-    def create_printer(self, parent: Printer) -> Printer:
-        raise NotImplementedError()
+    __slots__ = ()
 
 
-class LeftValue(PrinterFactory):
-    def type(self) -> Type:
-        raise NotImplementedError()
+class LeftValue(Node):
+    __slots__ = ()
 
-    def create_printer(self, parent: Printer) -> Printer:
+    def type(self) -> Type:
         raise NotImplementedError()
 
 
 class RightValue(Expression):
-    def type(self) -> Type:
-        raise NotImplementedError()
+    __slots__ = ()
 
-    def create_printer(self, parent: Printer) -> Printer:
+    def type(self) -> Type:
         raise NotImplementedError()
 
 
 class Evaluation(RightValue):
-    def type(self) -> Type:
-        raise NotImplementedError()
+    __slots__ = ()
 
-    def create_printer(self, parent: Printer) -> Printer:
+    def type(self) -> Type:
         raise NotImplementedError()
 
 
 class Reference(Evaluation, LeftValue):
-    def type(self) -> Type:
-        raise NotImplementedError()
+    __slots__ = ()
 
-    def create_printer(self, parent: Printer) -> Printer:
+    def type(self) -> Type:
         raise NotImplementedError()
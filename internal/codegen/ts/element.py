@@ -1,10 +1,13 @@
-from typing import List
+from typing import List, Iterator
 
 from internal.codegen.ts.ast import Identifier, Type
-from internal.codegen.common.printer import Printer, PrinterFactory, PrintContext
+from internal.codegen.common.printer import Printer, PrinterFactory, PrintContext, PrintSink, IterativePrinter, \
+    PrintStep, grouped_steps, template_steps
 
 
 class VariableDeclaration:
+    __slots__ = ('_identifier', '_typ')
+
     def __init__(self, name: str, typ: Type):
         self._identifier = Identifier(name)
         self._typ = typ
@@ -17,6 +20,8 @@ class VariableDeclaration:
 
 
 class Argument(PrinterFactory):
+    __slots__ = ('_identifier', '_type')
+
     def __init__(self, name: str, typ: Type):
         self._identifier = Identifier(name)
         self._type = typ
@@ -31,18 +36,21 @@ class Argument(PrinterFactory):
         return ArgumentPrinter(self, parent, [self.identifier(), self.type()])
 
 
-class ArgumentPrinter(Printer):
+class ArgumentPrinter(IterativePrinter):
+    __slots__ = ('_node',)
+
     def __init__(self, node: Argument, parent: Printer = None, children: List[PrinterFactory] = None):
         super().__init__(parent, children)
 
         self._node = node
 
-    def do_print(self, context: PrintContext) -> str:
-        components = [printer.print(context.create_child()) for printer in self.children()]
-        return "{0}: {1}".format(*components)
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return template_steps("{0}: {1}", self.children(), context, sink)
 
 
 class ArgumentList(PrinterFactory):
+    __slots__ = ('_arguments',)
+
     def __init__(self, arguments: List[Argument]):
         self._arguments = arguments
 
@@ -60,18 +68,21 @@ class ArgumentList(PrinterFactory):
         return ArgumentListPrinter(self, parent, self.arguments())
 
 
-class ArgumentListPrinter(Printer):
+class ArgumentListPrinter(IterativePrinter):
+    __slots__ = ('_node',)
+
     def __init__(self, node: ArgumentList, parent: Printer = None, children: List[PrinterFactory] = None):
         super().__init__(parent, children)
 
         self._node = node
 
-    def do_print(self, context: PrintContext) -> str:
-        components = [printer.print(context.create_child()) for printer in self.children()]
-        return ", ".join(components)
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return grouped_steps(",", self.children(), context, sink)
 
 
 class FunctionDeclaration:
+    __slots__ = ('_identifier', '_return_type', '_argument_list')
+
     def __init__(self, name: str, return_type: Type, argument_list: ArgumentList):
         self._identifier = Identifier(name)
         self._return_type = return_type
@@ -88,6 +99,8 @@ class FunctionDeclaration:
 
 
 class Modifier(PrinterFactory):
+    __slots__ = ('_represent',)
+
     def __init__(self, represent: str):
         self._represent = represent
 
@@ -99,6 +112,8 @@ class Modifier(PrinterFactory):
 
 
 class ModifierPrinter(Printer):
+    __slots__ = ('_node',)
+
     def __init__(self, node: Modifier, parent: Printer = None, children: List[PrinterFactory] = None):
         super().__init__(parent, children)
 
@@ -109,6 +124,8 @@ class ModifierPrinter(Printer):
 
 
 class AccessModifier(Modifier):
+    __slots__ = ()
+
     @staticmethod
     def public() -> 'AccessModifier':
         return AccessModifier("public")
@@ -123,10 +140,14 @@ class AccessModifier(Modifier):
 
 
 class StaticModifier(Modifier):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__("static")
 
 
 class ReadonlyModifier(Modifier):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__("readonly")
@@ -4,6 +4,8 @@ from internal.codegen.ts.grammer import MultiLineComment
 
 
 class DocComment(MultiLineComment):
+    __slots__ = ('_description', '_annotations')
+
     def __init__(self, description: str, annotations: List['Annotation']):
         super().__init__([])
 
@@ -24,6 +26,8 @@ class DocComment(MultiLineComment):
 
 
 class Annotation:
+    __slots__ = ('_name', '_value')
+
     def __init__(self, name: str, value: str):
         self._name = name
         self._value = value
@@ -1,9 +1,10 @@
-from typing import IO, List, Optional
+from functools import partial
+from typing import IO, List, Optional, Tuple, Callable, Dict
 from colorama import Fore
 
 from internal.lang.ts import Comment, ParamAnnotation
-from internal.spec import Spec, Field, aggregate_groups_from_fields
-from internal.codegen import Generator
+from internal.spec import Spec, Field, Reference, GroupIndex, GroupBucket, SpecDiff
+from internal.codegen import Generator, collect_affected_fragments
 from internal.util import upper_first
 from internal.codegen.ts.ast import Type
 from internal.codegen.ts.expr import SourceFile
@@ -70,6 +71,17 @@ def get_ts_deserialize_func(typ: str) -> Optional['str']:
     return TS_DESERIALIZE_FN[typ] if typ in TS_DESERIALIZE_FN else None
 
 
+def get_ts_reference_type(reference: Reference) -> 'str':
+    return reference.spec().lang().ts().clazz()
+
+
+def get_ts_field_type(field: Field) -> 'str':
+    if field.reference() is not None:
+        return get_ts_reference_type(field.reference())
+
+    return get_ts_type(field.type())
+
+
 def generate_comment(comment: Comment) -> str:
     if not comment.needs_generate():
         return ""
@@ -84,7 +96,7 @@ def generate_comment(comment: Comment) -> str:
             lines.append("")
 
         for annotation in comment.annotations():
-            lines.append("@{0} {1}".format(annotation.identifier(), annotation.value()))
+            lines.append("@{0} {1}".format(annotation.name(), annotation.value()))
 
     s = ""
     s += "/**\n"
@@ -102,7 +114,7 @@ def generate_member(field: Field) -> 'str':
         s += generate_comment(comment)
         s += "\n"
 
-    s += "public {0}: {1};".format(field.name(), get_ts_type(field.type()))
+    s += "public {0}: {1};".format(field.name(), get_ts_field_type(field))
 
     return s
 
@@ -121,7 +133,7 @@ def generate_constructor(fields: List[Field]):
     assignments = []
 
     for field in fields:
-        arguments.append("{0}: {1}".format(field.name(), get_ts_type(field.type())))
+        arguments.append("{0}: {1}".format(field.name(), get_ts_field_type(field)))
         assignments.append("this.{0} = {0};".format(field.name()))
 
     comment = Comment(None, [
@@ -140,10 +152,11 @@ def generate_constructor(fields: List[Field]):
 
 
 class SerializingField:
-    def __init__(self, name: str, typ: str, serialized_name: str):
+    def __init__(self, name: str, typ: str, serialized_name: str, reference: Reference = None):
         self._name = name
         self._typ = typ
         self._serialized_name = serialized_name
+        self._reference = reference
 
     def name(self) -> str:
         return self._name
@@ -154,7 +167,13 @@ class SerializingField:
     def serialized_name(self) -> str:
         return self._serialized_name
 
+    def reference(self) -> Optional[Reference]:
+        return self._reference
+
     def convert_func(self) -> Optional[str]:
+        if self.reference() is not None:
+            return "{expr}.toObject()"
+
         return get_ts_serialize_func(self.type())
 
 
@@ -181,10 +200,11 @@ def generate_simple_serialize_method(method_name: str, fields: List[SerializingF
 
 
 class DeserializingField:
-    def __init__(self, position: int, typ: str, serialized_name: str):
+    def __init__(self, position: int, typ: str, serialized_name: str, reference: Reference = None):
         self._position = position
         self._typ = typ
         self._serialized_name = serialized_name
+        self._reference = reference
 
     def position(self) -> int:
         return self._position
@@ -195,7 +215,13 @@ class DeserializingField:
     def serialized_name(self) -> str:
         return self._serialized_name
 
+    def reference(self) -> Optional[Reference]:
+        return self._reference
+
     def convert_func(self) -> Optional[str]:
+        if self.reference() is not None:
+            return get_ts_reference_type(self.reference()) + ".fromObject({expr})"
+
         return get_ts_deserialize_func(self.type())
 
 
@@ -226,7 +252,7 @@ def generate_simple_deserialize_method(method_name: str, clazz: str, n: int, fie
 
 def generate_to_array_method(fields: List[Field]) -> str:
     return generate_simple_serialize_method('toObject', [
-        SerializingField(x.name(), x.type(), x.name()) for x in fields
+        SerializingField(x.name(), x.type(), x.name(), x.reference()) for x in fields
     ])
 
 
@@ -234,41 +260,49 @@ def generate_from_array_method(clazz: str, fields: List[Field]) -> str:
     n = len(fields)
 
     return generate_simple_deserialize_method("fromObject", clazz, n, [
-        DeserializingField(pos, fields[pos].type(), fields[pos].name()) for pos in range(n)
+        DeserializingField(pos, fields[pos].type(), fields[pos].name(), fields[pos].reference()) for pos in range(n)
     ])
 
 
-def generate_group_serialize_methods(fields: List[Field]) -> List[str]:
-    aggregate = aggregate_groups_from_fields(fields)
-    methods = []
+def generate_group_serialize_method(bucket: GroupBucket) -> str:
+    group_name = bucket[1]
+    fields = bucket[2]
 
-    for item in aggregate:
-        group_name = item[1]
-        fields = item[2]
+    method_name = 'to' + upper_first(group_name)
 
-        method_name = 'to' + upper_first(group_name)
+    return generate_simple_serialize_method(method_name, [
+        SerializingField(field[1].name(), field[1].type(), field[2].member(), field[1].reference())
+        for field in fields
+    ])
 
-        methods.append(generate_simple_serialize_method(method_name, [
-            SerializingField(field[1].name(), field[1].type(), field[2].member()) for field in fields
-        ]))
+
+def generate_group_serialize_methods(index: GroupIndex) -> List[str]:
+    methods = []
+
+    for item in index.groups():
+        methods.append(generate_group_serialize_method(item))
 
     return methods
 
 
-def generate_group_deserialize_methods(clazz: str, fields: List[Field]) -> List[str]:
-    aggregate = aggregate_groups_from_fields(fields)
-    methods = []
+def generate_group_deserialize_method(clazz: str, bucket: GroupBucket) -> str:
+    n = bucket[0]
+    group_name = bucket[1]
+    fields = bucket[2]
 
-    for item in aggregate:
-        n = item[0]
-        group_name = item[1]
-        fields = item[2]
+    method_name = 'from' + upper_first(group_name)
 
-        method_name = 'from' + upper_first(group_name)
+    return generate_simple_deserialize_method(method_name, clazz, n, [
+        DeserializingField(field[0], field[1].type(), field[2].member(), field[1].reference())
+        for field in fields
+    ])
+
+
+def generate_group_deserialize_methods(clazz: str, index: GroupIndex) -> List[str]:
+    methods = []
 
-        methods.append(generate_simple_deserialize_method(method_name, clazz, n, [
-            DeserializingField(field[0], field[1].type(), field[2].member()) for field in fields
-        ]))
+    for item in index.groups():
+        methods.append(generate_group_deserialize_method(clazz, item))
 
     return methods
 
@@ -276,7 +310,7 @@ def generate_group_deserialize_methods(clazz: str, fields: List[Field]) -> List[
 def generate_serialize_methods(spec: Spec) -> str:
     methods = [
         generate_to_array_method(spec.fields()),
-        *generate_group_serialize_methods(spec.fields()),
+        *generate_group_serialize_methods(spec.group_index()),
     ]
 
     return '\n\n'.join(methods)
@@ -285,12 +319,31 @@ def generate_serialize_methods(spec: Spec) -> str:
 def generate_deserialize_methods(spec: Spec) -> str:
     methods = [
         generate_from_array_method(spec.lang().ts().clazz(), spec.fields()),
-        *generate_group_deserialize_methods(spec.lang().ts().clazz(), spec.fields()),
+        *generate_group_deserialize_methods(spec.lang().ts().clazz(), spec.group_index()),
     ]
 
     return '\n\n'.join(methods)
 
 
+#
+# the class body in order, as named fragments which are built on demand:
+# members are named after their field, methods are named like 'fromObject()'
+def fragment_builders(spec: Spec) -> List[Tuple[str, Callable[[], str]]]:
+    clazz = spec.lang().ts().clazz()
+    index = spec.group_index()
+
+    return [
+        *[(field.name(), partial(generate_member, field)) for field in spec.fields()],
+        ("constructor()", partial(generate_constructor, spec.fields())),
+        ("fromObject()", partial(generate_from_array_method, clazz, spec.fields())),
+        *[("from{0}()".format(upper_first(item[1])), partial(generate_group_deserialize_method, clazz, item))
+          for item in index.groups()],
+        ("toObject()", partial(generate_to_array_method, spec.fields())),
+        *[("to{0}()".format(upper_first(item[1])), partial(generate_group_serialize_method, item))
+          for item in index.groups()],
+    ]
+
+
 class TSGenerator(Generator):
     @staticmethod
     def get_extension() -> str:
@@ -302,6 +355,7 @@ class TSGenerator(Generator):
 
     def generate(self, spec: Spec, fp: IO) -> None:
         file = SourceFile([
+            # the class does not depend on the spec yet, so every one is of the same shape
             Class("MyClass", [
                 DocComment("Member", [
                     Annotation.param("myProperty1", "This is a description")
@@ -330,9 +384,31 @@ class TSGenerator(Generator):
                             ]), AnyEvaluation("123", Type.number()))
                     ]
                 )
-            ])
-        ])
-        print(file.print())
+            ], ())
+        ], self.render_cache(), self.profiler(), self.render_plans(), self.incremental_cache())
+        file.write(fp)
+        fp.write("\n")
+
+    def fragment_names(self, spec: Spec) -> List[str]:
+        return [name for name, _ in fragment_builders(spec)]
+
+    def affected_fragments(self, diff: SpecDiff) -> Optional[List[str]]:
+        if diff.old().lang().ts().clazz() != diff.new().lang().ts().clazz():
+            return None
+
+        names = collect_affected_fragments(diff, "Object")
+
+        if diff.fields_changed() or len(diff.recommented()) > 0:
+            names.append("constructor()")
+
+        return names
+
+    #
+    # renders the requested fragments as they appear in the class body, fragments which no longer exist are skipped
+    def generate_fragments(self, spec: Spec, names: List[str]) -> Dict[str, str]:
+        wanted = set(names)
+
+        return {name: build() for name, build in fragment_builders(spec) if name in wanted}
 
     def generate_old(self, spec: Spec, fp: IO) -> None:
         print(
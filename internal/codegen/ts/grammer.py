@@ -1,90 +1,97 @@
-from typing import List
+from typing import List, Hashable, Optional
 
-from internal.codegen.common.printer import Printer, PrinterFactory
+from internal.codegen.common.printer import PrinterFactory
 from internal.codegen.ts.ast import Identifier, Type, StatementBlock, LeftValue, RightValue, Evaluation, Reference
 from internal.codegen.ts.element import VariableDeclaration, FunctionDeclaration, Modifier
 from internal.codegen.ts.util import StatementBlockCollection, ModifierList
 
 
 class Comment(StatementBlock):
-    def create_printer(self, parent: Printer) -> Printer:
-        raise NotImplementedError()
+    __slots__ = ()
 
 
 class SingleLineComment(Comment):
+    __slots__ = ('_content',)
+
     def __init__(self, content: str):
         self._content = content
 
     def content(self) -> str:
         return self._content
 
-    def create_printer(self, parent: Printer) -> Printer:
-        from internal.codegen.ts.printer import SingleLineCommentPrinter
-
-        return SingleLineCommentPrinter(self, parent)
-
 
 class MultiLineComment(Comment):
+    __slots__ = ('_content',)
+
     def __init__(self, lines: List[str]):
         self._content = lines
 
     def lines(self) -> List[str]:
         return self._content
 
-    def create_printer(self, parent: Printer) -> Printer:
-        from internal.codegen.ts.printer import MultiLineCommentPrinter
 
-        return MultiLineCommentPrinter(self, parent)
+class Class(StatementBlock):
+    __slots__ = ('_identifier', '_statement_blocks', '_shape')
 
+    # the shape describes the class rather than being part of it
+    TRANSIENT = {'_shape': None}
 
-class Class(StatementBlock):
-    def __init__(self, name: str, statement_blocks: List[StatementBlock]):
+    def __init__(self, name: str, statement_blocks: List[StatementBlock], shape: Hashable = None):
         self._identifier = Identifier(name)
         self._statement_blocks = StatementBlockCollection(statement_blocks)
+        self._shape = shape
+        self.adopt(self._statement_blocks)
 
     def identifier(self) -> Identifier:
         return self._identifier
 
+    #
+    # the shape of the class as the generator which built it describes it, None if it is not known.
+    # classes of the same shape only differ in their strings, see Printer.plan_shape()
+    def shape(self) -> Optional[Hashable]:
+        return self._shape
+
     def type(self) -> Type:
         return Type(self.identifier().represent())
 
-    def create_printer(self, parent: Printer) -> Printer:
-        from internal.codegen.ts.printer import ClassPrinter
-
-        return ClassPrinter(self, parent, [self.identifier(), self._statement_blocks])
+    def printer_children(self) -> List[PrinterFactory]:
+        return [self.identifier(), self._statement_blocks]
 
 
 class Member(StatementBlock):
+    __slots__ = ('_modifiers', '_declaration')
+
     def __init__(self, modifiers: List[Modifier], declaration: VariableDeclaration):
         self._modifiers = ModifierList(modifiers)
         self._declaration = declaration
 
-    def create_printer(self, parent: Printer) -> Printer:
-        from internal.codegen.ts.printer import MemberPrinter
-
-        return MemberPrinter(self, parent, [
+    def printer_children(self) -> List[PrinterFactory]:
+        return [
             self._modifiers, self._declaration.identifier(), self._declaration.type()
-        ])
+        ]
 
 
 class Method(StatementBlock):
+    __slots__ = ('_modifiers', '_declaration', '_statement_blocks')
+
     def __init__(self, modifiers: List[Modifier], declaration: FunctionDeclaration,
                  statement_blocks: List[StatementBlock]):
         self._modifiers = ModifierList(modifiers)
         self._declaration = declaration
         self._statement_blocks = StatementBlockCollection(statement_blocks)
+        self.adopt(self._statement_blocks)
 
-    def create_printer(self, parent: Printer) -> Printer:
-        from internal.codegen.ts.printer import MethodPrinter
-
+    def printer_children(self) -> List[PrinterFactory]:
         decl = self._declaration
 
-        return MethodPrinter(self, parent, [
+        return [
             self._modifiers, decl.identifier(), decl.argument_list(), decl.return_type(), self._statement_blocks
-        ])
+        ]
 
 
 class UnaryOperator(PrinterFactory):
+    __slots__ = ('_represent', '_type')
+
     def __init__(self, represent: str, typ: Type):
         self._represent = represent
         self._type = typ
@@ -131,13 +138,10 @@ class UnaryOperator(PrinterFactory):
     def type(self) -> Type:
         return self._type
 
-    def create_printer(self, parent: Printer) -> Printer:
-        from internal.codegen.ts.printer import UnaryOperatorPrinter
-
-        return UnaryOperatorPrinter(self, parent)
-
 
 class UnaryEvaluation(Evaluation):
+    __slots__ = ('_operator', '_left', '_right')
+
     def __init__(self, operator: UnaryOperator, left: Evaluation, right: Evaluation):
         self._operator = operator
         self._left = left
@@ -155,15 +159,15 @@ class UnaryEvaluation(Evaluation):
     def type(self) -> Type:
         return self.operator().type()
 
-    def create_printer(self, parent: Printer) -> Printer:
-        from internal.codegen.ts.printer import UnaryEvaluationPrinter
-
-        return UnaryEvaluationPrinter(self, parent, [
+    def printer_children(self) -> List[PrinterFactory]:
+        return [
             self.left(), self.operator(), self.right()
-        ])
+        ]
 
 
 class UnaryAssignment(StatementBlock):
+    __slots__ = ('_left', '_right')
+
     def __init__(self, left: LeftValue, right: RightValue):
         self._left = left
         self._right = right
@@ -177,15 +181,15 @@ class UnaryAssignment(StatementBlock):
     def type(self) -> Type:
         return self.right().type()
 
-    def create_printer(self, parent: Printer) -> Printer:
-        from internal.codegen.ts.printer import UnaryAssignmentPrinter
-
-        return UnaryAssignmentPrinter(self, parent, [
+    def printer_children(self) -> List[PrinterFactory]:
+        return [
             self.left(), self.right()
-        ])
+        ]
 
 
 class AnyEvaluation(Evaluation):
+    __slots__ = ('_expression', '_type')
+
     def __init__(self, expression: str, typ: Type):
         self._expression = expression
         self._type = typ
@@ -196,13 +200,10 @@ class AnyEvaluation(Evaluation):
     def type(self) -> Type:
         return self._type
 
-    def create_printer(self, parent: Printer) -> Printer:
-        from internal.codegen.ts.printer import AnyEvaluationPrinter
-
-        return AnyEvaluationPrinter(self, parent)
-
 
 class Accessor(Reference):
+    __slots__ = ('_name', '_type', '_parent')
+
     def __init__(self, name: str, typ: Type, parent: 'Accessor' = None):
         self._name = name
         self._type = typ
@@ -244,16 +245,16 @@ class Accessor(Reference):
 
         return '.'.join([accessor.name() for accessor in accessors[::-1]])
 
+    # the output of an accessor includes its parents, so it is touched along with them
     def set_parent(self, parent: 'Accessor') -> None:
         self._parent = parent
-
-    def create_printer(self, parent: Printer) -> Printer:
-        from internal.codegen.ts.printer import AccessorPrinter
-
-        return AccessorPrinter(self, parent)
+        self.adopt(parent)
+        self.touch()
 
 
 class Scope:
+    __slots__ = ('_type',)
+
     def __init__(self, typ: Type):
         self._type = typ
 
@@ -262,6 +263,8 @@ class Scope:
 
 
 class ThisAccessor(Accessor):
+    __slots__ = ('_scope',)
+
     def __init__(self, scope: Scope):
         super().__init__("this", scope.type())
 
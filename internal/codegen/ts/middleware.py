@@ -1,13 +1,15 @@
-from internal.codegen.common.printer import PrinterMiddleware, PrintContext
+from typing import Optional, Tuple
+
+from internal.codegen.common.printer import PrinterMiddleware, PrintContext, PrintSink
 from internal.codegen.ts.util import StatementBlockCollectionPrinter
 
 
 class IndentMiddleware(PrinterMiddleware):
-    def transform(self, context: PrintContext, content: str) -> str:
-        if not isinstance(context.stack()[0], StatementBlockCollectionPrinter):
-            return content
+    def applies_to(self) -> Optional[Tuple[type, ...]]:
+        return StatementBlockCollectionPrinter,
 
-        n = context.state().indent_size()
-        prefix = context.config().indent().process(n)
+    def enter(self, context: PrintContext, sink: PrintSink) -> None:
+        sink.indent(context.config().indent().process(context.state().indent_size()))
 
-        return "\n".join(prefix + line for line in content.splitlines())
+    def leave(self, context: PrintContext, sink: PrintSink) -> None:
+        sink.dedent()
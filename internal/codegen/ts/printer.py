@@ -1,6 +1,7 @@
-from typing import List, Generic, TypeVar
+from typing import List, Generic, TypeVar, Any, Iterator, Optional, Hashable
 
-from internal.codegen.common.printer import Printer, PrinterFactory, PrintContext
+from internal.codegen.common.printer import Printer, PrinterFactory, PrintContext, PrintSink, IterativePrinter, \
+    PrintStep, template_steps, register_printer
 from internal.codegen.ts.grammer import SingleLineComment, MultiLineComment, Class, Member, Method, UnaryOperator, \
     UnaryEvaluation, UnaryAssignment, AnyEvaluation, Accessor
 
@@ -8,6 +9,8 @@ T = TypeVar('T')
 
 
 class NodePrinter(Generic[T], Printer):
+    __slots__ = ('_node',)
+
     def __init__(self, node: T, parent: Printer = None, children: List[PrinterFactory] = None):
         super().__init__(parent, children)
 
@@ -16,16 +19,23 @@ class NodePrinter(Generic[T], Printer):
     def node(self) -> T:
         return self._node
 
+    def cache_node(self) -> Any:
+        return self._node
+
     def do_print(self, context: PrintContext) -> str:
         raise NotImplementedError()
 
 
 class SingleLineCommentPrinter(NodePrinter[SingleLineComment]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return "// {0}".format(self.node().content())
 
 
 class MultiLineCommentPrinter(NodePrinter[MultiLineComment]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         s = ""
         s += "/**\n"
@@ -34,54 +44,83 @@ class MultiLineCommentPrinter(NodePrinter[MultiLineComment]):
         return s
 
 
-class ClassPrinter(NodePrinter[Class]):
-    def do_print(self, context: PrintContext) -> str:
+class ClassPrinter(NodePrinter[Class], IterativePrinter):
+    __slots__ = ()
+
+    # a class is printed once, caching it would only hold a copy of the whole body
+    def cache_node(self) -> Any:
+        return None
+
+    # classes of the same shape still share a plan, which only holds the literal text of one class
+    def plan_node(self) -> Any:
+        return self.node()
+
+    def plan_shape(self) -> Optional[Hashable]:
+        return self.node().shape()
+
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
         def configure(ctx: PrintContext):
-            ctx.state().set_indent_size(1)
+            ctx.edit_state().set_indent_size(1)
 
-        return "class {0} {{\n{1}\n}}".format(*[
-            printer.print(context.create_child(configure)) for printer in self.children()
-        ])
+        return template_steps("class {0} {{\n{1}\n}}", self.children(), context, sink, configure)
 
 
-class MemberPrinter(NodePrinter[Member]):
-    def do_print(self, context: PrintContext) -> str:
-        return "{0} {1}: {2};".format(*[
-            printer.print(context.create_child()) for printer in self.children()
-        ])
+class MemberPrinter(NodePrinter[Member], IterativePrinter):
+    __slots__ = ()
 
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return template_steps("{0} {1}: {2};", self.children(), context, sink)
 
-class MethodPrinter(NodePrinter[Method]):
-    def do_print(self, context: PrintContext) -> str:
-        return "{0} {1}({2}): {3} {{\n{4}\n}}".format(*[
-            printer.print(context.create_child()) for printer in self.children()
-        ])
+
+class MethodPrinter(NodePrinter[Method], IterativePrinter):
+    __slots__ = ()
+
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return template_steps("{0} {1}({2}): {3} {{\n{4}\n}}", self.children(), context, sink)
 
 
 class UnaryOperatorPrinter(NodePrinter[UnaryOperator]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return self.node().represent()
 
 
-class UnaryEvaluationPrinter(NodePrinter[UnaryEvaluation]):
-    def do_print(self, context: PrintContext) -> str:
-        return "{0} {1} {2}".format(*[
-            printer.print(context.create_child()) for printer in self.children()
-        ])
+class UnaryEvaluationPrinter(NodePrinter[UnaryEvaluation], IterativePrinter):
+    __slots__ = ()
 
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return template_steps("{0} {1} {2}", self.children(), context, sink)
 
-class UnaryAssignmentPrinter(NodePrinter[UnaryAssignment]):
-    def do_print(self, context: PrintContext) -> str:
-        return "{0} = {1};".format(*[
-            printer.print(context.create_child()) for printer in self.children()
-        ])
+
+class UnaryAssignmentPrinter(NodePrinter[UnaryAssignment], IterativePrinter):
+    __slots__ = ()
+
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return template_steps("{0} = {1};", self.children(), context, sink)
 
 
 class AnyEvaluationPrinter(NodePrinter[AnyEvaluation]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return self.node().expression()
 
 
 class AccessorPrinter(NodePrinter[Accessor]):
+    __slots__ = ()
+
     def do_print(self, context: PrintContext) -> str:
         return self.node().represent()
+
+
+register_printer(SingleLineComment, SingleLineCommentPrinter)
+register_printer(MultiLineComment, MultiLineCommentPrinter)
+register_printer(Class, ClassPrinter)
+register_printer(Member, MemberPrinter)
+register_printer(Method, MethodPrinter)
+register_printer(UnaryOperator, UnaryOperatorPrinter)
+register_printer(UnaryEvaluation, UnaryEvaluationPrinter)
+register_printer(UnaryAssignment, UnaryAssignmentPrinter)
+register_printer(AnyEvaluation, AnyEvaluationPrinter)
+register_printer(Accessor, AccessorPrinter)
@@ -1,6 +1,8 @@
-from typing import List, TypeVar, Generic
+from typing import List, TypeVar, Generic, Iterator
 
-from internal.codegen.common.printer import Printer, PrinterFactory, PrintContext
+from internal.codegen.common.ast import Versioned
+from internal.codegen.common.printer import Printer, PrinterFactory, PrintContext, PrintSink, IterativePrinter, \
+    PrintStep, joined_steps
 from internal.codegen.ts.ast import StatementBlock
 from internal.codegen.ts.element import Modifier
 
@@ -8,6 +10,8 @@ T = TypeVar('T')
 
 
 class Collection(Generic[T]):
+    __slots__ = ('_elements',)
+
     def __init__(self, elements: List[T]):
         self._elements = elements
 
@@ -18,25 +22,33 @@ class Collection(Generic[T]):
         return len(self.elements())
 
 
-class StatementBlockCollection(PrinterFactory, Collection[StatementBlock]):
+class StatementBlockCollection(PrinterFactory, Collection[StatementBlock], Versioned):
+    __slots__ = ('_version', '_parents', '__weakref__')
+
     def __init__(self, statement_blocks: List[StatementBlock]):
         super().__init__(statement_blocks)
 
+        self.adopt(*statement_blocks)
+
     def create_printer(self, parent: Printer) -> Printer:
         return StatementBlockCollectionPrinter(self, parent, self.elements())
 
 
-class StatementBlockCollectionPrinter(Printer):
+class StatementBlockCollectionPrinter(IterativePrinter):
+    __slots__ = ('_node',)
+
     def __init__(self, node: StatementBlockCollection, parent: Printer = None, children: List[PrinterFactory] = None):
         super().__init__(parent, children)
 
         self._node = node
 
-    def do_print(self, context: PrintContext) -> str:
-        return "\n".join(printer.print(context.create_child()) for printer in self.children())
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return joined_steps("\n", self.children(), context, sink)
 
 
 class ModifierList(PrinterFactory, Collection[Modifier]):
+    __slots__ = ()
+
     def __init__(self, modifiers: List[Modifier]):
         super().__init__(modifiers)
 
@@ -44,11 +56,13 @@ class ModifierList(PrinterFactory, Collection[Modifier]):
         return ModifierListPrinter(self, parent, self.elements())
 
 
-class ModifierListPrinter(Printer):
+class ModifierListPrinter(IterativePrinter):
+    __slots__ = ('_node',)
+
     def __init__(self, node: ModifierList, parent: Printer = None, children: List[PrinterFactory] = None):
         super().__init__(parent, children)
 
         self._node = node
 
-    def do_print(self, context: PrintContext) -> str:
-        return " ".join(printer.print(context.create_child()) for printer in self.children())
+    def do_steps(self, context: PrintContext, sink: PrintSink) -> Iterator[PrintStep]:
+        return joined_steps(" ", self.children(), context, sink)
@@ -0,0 +1,254 @@
+from os import path
+from typing import Dict, List, Tuple, Set, Union, Iterator
+
+from internal.spec import Spec, Fragment, Field, iter_file, merge_fields
+
+Key = Tuple[str, int]
+
+
+#
+# only the documents which take part in references are held: the specs which reference other specs,
+# and the documents which are referenced, extended or mixed in, which are read again when they are needed
+class SpecResolver:
+    def __init__(self):
+        self._documents = {}  # type: Dict[Key, Union[Spec, Fragment]]
+        self._flattened = {}  # type: Dict[Key, List[Field]]
+        self._linearized = {}  # type: Dict[Key, List[Key]]
+        self._specs = {}  # type: Dict[Key, Spec]
+        self._dependencies = {}  # type: Dict[Key, List[Key]]
+        self._roots = []  # type: List[Key]
+        self._root_keys = set()  # type: Set[Key]
+        self._streamed = set()  # type: Set[Key]
+
+    #
+    # yields the specs of a file which do not reference other specs as soon as they are read and flattened,
+    # the specs which do are kept until order()
+    def stream(self, spec_file: str) -> Iterator[Spec]:
+        spec_file = path.abspath(spec_file)
+
+        for index, document in enumerate(iter_file(spec_file)):
+            key = (spec_file, index)
+
+            if not isinstance(document, Spec) or key in self._root_keys or key in self._streamed:
+                continue
+
+            self._documents[key] = document
+            fields = self.flatten(*key)
+
+            if any(field.reference() is not None for field in fields):
+                self._roots.append(key)
+                self._root_keys.add(key)
+                continue
+
+            # the document is read again if another one references or extends it
+            del self._documents[key]
+            del self._flattened[key]
+            del self._linearized[key]
+            self._streamed.add(key)
+
+            yield document if fields is document.fields() else document.flatten(fields)
+
+    def resolve(self, spec_file: str, index: int = 0) -> Spec:
+        key = (path.abspath(spec_file), index)
+        pending = [key]
+        resolved = []
+
+        while len(pending) > 0:
+            current = pending.pop()
+
+            if current in self._specs:
+                continue
+
+            document = self._document(current)
+
+            if not isinstance(document, Spec):
+                raise ValueError("'{0}' is a fragment and could not be referenced".format(describe(current)))
+
+            fields = self.flatten(*current)
+            spec = document if fields is document.fields() else document.flatten(fields)
+            dependencies = []
+
+            for field in fields:
+                if field.reference() is None:
+                    continue
+
+                target = locate(field.reference().origin(), field.reference().path(), field.reference().index())
+
+                if target not in dependencies:
+                    dependencies.append(target)
+                    pending.append(target)
+
+            self._specs[current] = spec
+            self._dependencies[current] = dependencies
+            resolved.append(current)
+
+        # bind once every target is flattened, so that references see the final spec
+        for current in resolved:
+            for field in self._specs[current].fields():
+                reference = field.reference()
+
+                if reference is not None and not reference.is_resolved():
+                    reference.bind(self._specs[locate(reference.origin(), reference.path(), reference.index())])
+
+        return self._specs[key]
+
+    #
+    # merges the fields of the bases and mixins into the fields of a document, see linearize().
+    # every document is flattened once no matter how many specs extend it
+    def flatten(self, spec_file: str, index: int = 0) -> List[Field]:
+        key = (path.abspath(spec_file), index)
+        trail = []  # type: List[Key]
+
+        return self._flatten(key, trail)
+
+    def dependencies(self, spec_file: str, index: int = 0) -> List[Spec]:
+        key = (path.abspath(spec_file), index)
+        self.resolve(*key)
+
+        return [self._specs[target] for target in self._dependencies[key]]
+
+    #
+    # returns every spec kept by stream() and its dependencies, each one after all of the specs it references.
+    # the specs which were yielded by stream() already are left out
+    def order(self) -> List[Spec]:
+        ordered = []  # type: List[Key]
+        done = set()  # type: Set[Key]
+
+        for root in self._roots:
+            self.resolve(*root)
+
+        for root in self._roots:
+            if root in done:
+                continue
+
+            trail = [root]
+            visiting = {root}
+            stack = [iter(self._dependencies[root])]
+
+            while len(stack) > 0:
+                target = next(stack[-1], None)
+
+                if target is None:
+                    key = trail.pop()
+                    visiting.remove(key)
+                    stack.pop()
+                    done.add(key)
+                    ordered.append(key)
+                elif target in visiting:
+                    cycle = trail[trail.index(target):] + [target]
+                    raise ValueError("cyclic reference: {0}".format(" -> ".join(describe(x) for x in cycle)))
+                elif target not in done:
+                    trail.append(target)
+                    visiting.add(target)
+                    stack.append(iter(self._dependencies[target]))
+
+        return [self._specs[key] for key in ordered if key not in self._streamed]
+
+    #
+    # the document and its ancestors, each one once, in the order in which their own fields take precedence:
+    # the document first, then later bases before earlier ones, the way extends is followed by the mixins.
+    # a shared ancestor comes after every document which derives from it, so it could not override them
+    def linearize(self, spec_file: str, index: int = 0) -> List[Key]:
+        key = (path.abspath(spec_file), index)
+        trail = []  # type: List[Key]
+
+        return self._linearize(key, trail)
+
+    def _flatten(self, key: Key, trail: List[Key]) -> List[Field]:
+        if key in self._flattened:
+            return self._flattened[key]
+
+        linearization = self._linearize(key, trail)
+
+        if len(linearization) == 1:
+            fields = self._own_fields(key)
+        else:
+            fields = merge_fields([self._own_fields(ancestor) for ancestor in reversed(linearization)])
+
+        self._flattened[key] = fields
+
+        return fields
+
+    #
+    # C3 linearization, as Python orders the bases of a class, with the bases taken in reverse order
+    def _linearize(self, key: Key, trail: List[Key]) -> List[Key]:
+        if key in self._linearized:
+            return self._linearized[key]
+
+        if key in trail:
+            cycle = trail[trail.index(key):] + [key]
+            raise ValueError("cyclic inheritance: {0}".format(" -> ".join(describe(x) for x in cycle)))
+
+        bases = [locate(key[0], *split(base)) for base in reversed(self._document(key).bases())]
+
+        trail.append(key)
+        sequences = [list(self._linearize(base, trail)) for base in bases]
+        trail.pop()
+
+        sequences.append(list(bases))
+        linearization = [key]
+
+        while any(len(sequence) > 0 for sequence in sequences):
+            for sequence in sequences:
+                if len(sequence) == 0:
+                    continue
+
+                head = sequence[0]
+
+                if not any(head in other[1:] for other in sequences):
+                    break
+            else:
+                raise ValueError("inconsistent inheritance of '{0}', its bases could not be ordered".format(
+                    describe(key)
+                ))
+
+            linearization.append(head)
+
+            for sequence in sequences:
+                if len(sequence) > 0 and sequence[0] == head:
+                    del sequence[0]
+
+        self._linearized[key] = linearization
+
+        return linearization
+
+    #
+    # the fields which the document declares itself, the references of which are relative to its file
+    def _own_fields(self, key: Key) -> List[Field]:
+        document = self._document(key)
+
+        for field in document.fields():
+            if field.reference() is not None:
+                field.reference().set_origin(key[0])
+
+        return document.fields()
+
+    #
+    # the file is read up to the document, only the document itself is kept
+    def _document(self, key: Key) -> Union[Spec, Fragment]:
+        if key not in self._documents:
+            for index, document in enumerate(iter_file(key[0])):
+                if index == key[1]:
+                    self._documents[key] = document
+                    break
+            else:
+                raise ValueError("could not find spec '{0}'".format(describe(key)))
+
+        return self._documents[key]
+
+
+def split(target: str) -> Tuple[str, int]:
+    spec_file, _, index = target.partition("#")
+
+    if index and not index.isdigit():
+        raise ValueError("'{0}' has an invalid index".format(target))
+
+    return spec_file, int(index) if index else 0
+
+
+def locate(origin: str, spec_file: str, index: int = 0) -> Key:
+    return path.abspath(path.join(path.dirname(origin), spec_file)), index
+
+
+def describe(key: Key) -> str:
+    return "{0}#{1}".format(*key)
@@ -1,8 +1,11 @@
+import hashlib
 import json
-from copy import deepcopy
-from typing import List, Optional, Tuple, Dict
+from sys import intern
+from weakref import WeakValueDictionary
+from typing import List, Optional, Tuple, Dict, Iterator, Union, Set
 
-from internal.util import check_key
+from internal.stream import JSONStream
+from internal.util import check_key, intern_key
 
 
 class PHPLang:
@@ -15,7 +18,7 @@ class PHPLang:
         check_key(conf, "namespace")
         check_key(conf, "clazz")
 
-        return PHPLang(conf["namespace"], conf["clazz"])
+        return PHPLang(intern_key(conf, "namespace"), intern_key(conf, "clazz"))
 
     def namespace(self) -> str:
         return self._namespace
@@ -23,6 +26,18 @@ class PHPLang:
     def clazz(self) -> str:
         return self._clazz
 
+    def canonical(self) -> dict:
+        return {"namespace": self._namespace, "clazz": self._clazz}
+
+    #
+    # the canonical form of a block which has not been parsed, it is the same as the one of the parsed block
+    @staticmethod
+    def canonical_conf(conf: Optional[dict]) -> Optional[dict]:
+        if not isinstance(conf, dict):
+            return conf
+
+        return {"namespace": conf.get("namespace"), "clazz": conf.get("clazz")}
+
 
 class TSLang:
     def __init__(self, clazz: str):
@@ -32,37 +47,68 @@ class TSLang:
     def parse(conf: dict) -> 'TSLang':
         check_key(conf, 'clazz')
 
-        return TSLang(conf['clazz'])
+        return TSLang(intern_key(conf, 'clazz'))
 
     def clazz(self) -> 'str':
         return self._clazz
 
+    def canonical(self) -> dict:
+        return {"clazz": self._clazz}
+
+    @staticmethod
+    def canonical_conf(conf: Optional[dict]) -> Optional[dict]:
+        if not isinstance(conf, dict):
+            return conf
+
+        return {"clazz": conf.get("clazz")}
+
 
 class Lang:
-    def __init__(self, php: PHPLang = None, ts: TSLang = None):
+    def __init__(self, php: PHPLang = None, ts: TSLang = None, php_conf: dict = None, ts_conf: dict = None):
         self._php = php
         self._ts = ts
+        self._php_conf = php_conf
+        self._ts_conf = ts_conf
 
+    #
+    # each block is parsed on first access, so a run only validates the language it targets
     @staticmethod
     def parse(conf: dict) -> 'Lang':
         if "php" not in conf:
             conf["php"] = None
-        else:
-            conf["php"] = PHPLang.parse(conf["php"])
 
         if "ts" not in conf:
             conf["ts"] = None
-        else:
-            conf["ts"] = TSLang.parse(conf["ts"])
 
-        return Lang(conf["php"], conf["ts"])
+        return Lang(None, None, conf["php"], conf["ts"])
 
     def php(self) -> 'PHPLang':
+        if self._php is None and self._php_conf is not None:
+            self._php = PHPLang.parse(self._php_conf)
+            self._php_conf = None
+
         return self._php
 
     def ts(self) -> 'TSLang':
+        if self._ts is None and self._ts_conf is not None:
+            self._ts = TSLang.parse(self._ts_conf)
+            self._ts_conf = None
+
         return self._ts
 
+    #
+    # the blocks which have not been parsed yet are not parsed for this, so an invalid block of a language
+    # which is never generated does not raise
+    def canonical(self) -> dict:
+        return {
+            "php": self._php.canonical() if self._php is not None else PHPLang.canonical_conf(self._php_conf),
+            "ts": self._ts.canonical() if self._ts is not None else TSLang.canonical_conf(self._ts_conf),
+        }
+
+
+# a group is kept only as long as some field joins it
+SHARED_GROUPS = WeakValueDictionary()  # type: WeakValueDictionary
+
 
 class Group:
     def __init__(self, name: str, member: str):
@@ -74,7 +120,20 @@ class Group:
         check_key(conf, "name")
         check_key(conf, "member")
 
-        return Group(conf["name"], conf["member"])
+        return Group.shared(intern_key(conf, "name"), intern_key(conf, "member"))
+
+    #
+    # groups are immutable, so every field joining the same group under the same member shares one instance
+    @staticmethod
+    def shared(name: str, member: str) -> 'Group':
+        key = (name, member)
+        group = SHARED_GROUPS.get(key)
+
+        if group is None:
+            group = Group(intern(name), intern(member))
+            SHARED_GROUPS[key] = group
+
+        return group
 
     def name(self) -> str:
         return self._name
@@ -82,6 +141,61 @@ class Group:
     def member(self) -> str:
         return self._member
 
+    def canonical(self) -> dict:
+        return {"name": self._name, "member": self._member}
+
+
+REFERENCE_PREFIX = "ref:"
+
+
+class Reference:
+    def __init__(self, path: str, index: int = 0):
+        self._path = path
+        self._index = index
+        self._origin = None  # type: Optional[str]
+        self._spec = None  # type: Optional[Spec]
+
+    @staticmethod
+    def parse(typ: str) -> Optional['Reference']:
+        if not typ.startswith(REFERENCE_PREFIX):
+            return None
+
+        path, _, index = typ[len(REFERENCE_PREFIX):].partition("#")
+
+        if not path:
+            raise ValueError("reference '{0}' has no path".format(typ))
+
+        if index and not index.isdigit():
+            raise ValueError("reference '{0}' has an invalid index".format(typ))
+
+        return Reference(path, int(index) if index else 0)
+
+    def path(self) -> str:
+        return self._path
+
+    def index(self) -> int:
+        return self._index
+
+    #
+    # the spec file declaring this reference, the path is relative to it
+    def origin(self) -> Optional[str]:
+        return self._origin
+
+    def set_origin(self, origin: str) -> None:
+        self._origin = origin
+
+    def is_resolved(self) -> bool:
+        return self._spec is not None
+
+    def spec(self) -> 'Spec':
+        if self._spec is None:
+            raise ValueError("reference '{0}#{1}' is not resolved".format(self._path, self._index))
+
+        return self._spec
+
+    def bind(self, spec: 'Spec') -> None:
+        self._spec = spec
+
 
 class Field:
     def __init__(self, name: str, typ: str, comment: str = None, groups: List[Group] = None) -> None:
@@ -89,6 +203,7 @@ class Field:
         self._typ = typ
         self._comment = comment
         self._groups = groups
+        self._reference = Reference.parse(typ)
 
     @staticmethod
     def parse(conf: dict) -> 'Field':
@@ -103,7 +218,7 @@ class Field:
         else:
             conf["groups"] = [Group.parse(x) for x in conf["groups"]]
 
-        return Field(conf["name"], conf["type"], conf["comment"], conf["groups"])
+        return Field(intern_key(conf, "name"), intern_key(conf, "type"), conf["comment"], conf["groups"])
 
     def name(self) -> str:
         return self._name
@@ -117,23 +232,175 @@ class Field:
     def groups(self) -> Optional[List[Group]]:
         return self._groups
 
+    def reference(self) -> Optional[Reference]:
+        return self._reference
+
+    #
+    # a resolved reference includes the fingerprint of its target, so that a change of the class or namespace
+    # of the referenced spec changes the fingerprint of the referencing one
+    def canonical(self) -> dict:
+        canonical = {
+            "name": self._name,
+            "type": self._typ,
+            "comment": self._comment,
+            "groups": [group.canonical() for group in self._groups] if self._groups is not None else None,
+        }
+
+        if self._reference is not None and self._reference.is_resolved():
+            canonical["target"] = self._reference.spec().fingerprint()
+
+        return canonical
+
+
+GroupEntry = Tuple[int, Field, Group]
+GroupBucket = Tuple[int, str, List[GroupEntry]]
+
+
+class GroupIndex:
+    def __init__(self, buckets: Dict[str, GroupBucket], members: Dict[str, Dict[str, GroupEntry]]):
+        self._buckets = buckets
+        self._members = members
+        self._groups = list(buckets.values())
+
+    @staticmethod
+    def build(fields: List[Field]) -> 'GroupIndex':
+        buckets = {}  # type: Dict[str, GroupBucket]
+        members = {}  # type: Dict[str, Dict[str, GroupEntry]]
+
+        n = len(fields)
+        for pos in range(n):
+            field = fields[pos]
+
+            if field.groups() is not None:
+                for group in field.groups():
+                    if group.name() not in buckets:
+                        buckets[group.name()] = (n, group.name(), [])
+                        members[group.name()] = {}
+
+                    entries = buckets[group.name()][2]
+
+                    if len(entries) > 0 and entries[-1][0] == pos:
+                        raise ValueError("field '{0}' joins group '{1}' more than once".format(
+                            field.name(), group.name()
+                        ))
+
+                    if group.member() in members[group.name()]:
+                        raise ValueError("duplicate member '{0}' in group '{1}', used by '{2}' and '{3}'".format(
+                            group.member(), group.name(), members[group.name()][group.member()][1].name(),
+                            field.name()
+                        ))
+
+                    entry = (pos, field, group)
+                    entries.append(entry)
+                    members[group.name()][group.member()] = entry
+
+        return GroupIndex(buckets, members)
+
+    #
+    # buckets are ordered by the first field joining each group, entries by field position
+    def groups(self) -> List[GroupBucket]:
+        return self._groups
+
+    def group(self, name: str) -> Optional[GroupBucket]:
+        return self._buckets.get(name)
+
+    def member(self, name: str, member: str) -> Optional[GroupEntry]:
+        return self._members[name].get(member) if name in self._members else None
+
+    def names(self) -> List[str]:
+        return list(self._buckets.keys())
+
+
+def index_fields(fields: List[Field]) -> Dict[str, int]:
+    positions = {}  # type: Dict[str, int]
+
+    for pos, field in enumerate(fields):
+        if field.name() in positions:
+            raise ValueError("duplicate field '{0}' at positions {1} and {2}".format(
+                field.name(), positions[field.name()], pos
+            ))
+
+        positions[field.name()] = pos
+
+    return positions
+
+
+class Fragment:
+    def __init__(self, fields: List[Field], extends: str = None, mixins: List[str] = None) -> None:
+        self._fields = fields
+        self._positions = index_fields(fields)
+        self._extends = extends
+        self._mixins = mixins
+
+    #
+    # 'fields' may be given when they were already parsed while reading the document
+    @staticmethod
+    def parse(conf: dict, fields: List[Field] = None) -> 'Fragment':
+        if fields is None:
+            check_key(conf, "fields")
+
+            fields = list(Field.parse(x) for x in conf["fields"])
+
+        if "extends" not in conf:
+            conf["extends"] = None
+
+        if "mixins" not in conf:
+            conf["mixins"] = None
+
+        return Fragment(fields, conf["extends"], conf["mixins"])
+
+    def fields(self) -> List[Field]:
+        return self._fields
+
+    def position(self, name: str) -> Optional[int]:
+        return self._positions.get(name)
+
+    def field(self, name: str) -> Optional[Field]:
+        return self._fields[self._positions[name]] if name in self._positions else None
+
+    def extends(self) -> Optional[str]:
+        return self._extends
+
+    def mixins(self) -> Optional[List[str]]:
+        return self._mixins
+
+    #
+    # the base comes first, then each mixin in order
+    def bases(self) -> List[str]:
+        bases = []
+
+        if self._extends is not None:
+            bases.append(self._extends)
+
+        if self._mixins is not None:
+            bases.extend(self._mixins)
+
+        return bases
+
+
+class Spec(Fragment):
+    def __init__(self, out_dir: str, lang: Lang, fields: List[Field], extends: str = None,
+                 mixins: List[str] = None) -> None:
+        super().__init__(fields, extends, mixins)
 
-class Spec:
-    def __init__(self, out_dir: str, lang: Lang, fields: List[Field]) -> None:
         self._out_dir = out_dir
         self._lang = lang
-        self._fields = fields
+        self._group_index = GroupIndex.build(fields)
+        self._fingerprint = None  # type: Optional[str]
 
     @staticmethod
-    def parse(conf: dict) -> 'Spec':
+    def parse(conf: dict, fields: List[Field] = None) -> 'Spec':
         check_key(conf, "outDir")
         check_key(conf, "lang")
-        check_key(conf, "fields")
+
+        fragment = Fragment.parse(conf, fields)
 
         return Spec(
             conf["outDir"],
             Lang.parse(conf["lang"]),
-            list(Field.parse(x) for x in conf["fields"])
+            fragment.fields(),
+            fragment.extends(),
+            fragment.mixins()
         )
 
     def out_dir(self) -> str:
@@ -142,29 +409,250 @@ class Spec:
     def lang(self) -> Lang:
         return self._lang
 
-    def fields(self) -> List[Field]:
-        return self._fields
+    def group_index(self) -> GroupIndex:
+        return self._group_index
+
+    def canonical(self) -> dict:
+        return {
+            "outDir": self._out_dir,
+            "lang": self._lang.canonical(),
+            "fields": [field.canonical() for field in self._fields],
+        }
+
+    #
+    # a hash of the semantic content, independent of formatting and key order of the spec file,
+    # inherited fields are included as they were flattened into this spec. it is cached once every reference
+    # of the spec is resolved, before that the unresolved references are hashed as they are written
+    def fingerprint(self) -> str:
+        if self._fingerprint == "":
+            raise ValueError("could not fingerprint a spec which references itself")
+
+        if self._fingerprint is None:
+            # marks the spec as being fingerprinted, so that a cycle of references is reported
+            self._fingerprint = ""
+            content = json.dumps(self.canonical(), sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+            fingerprint = hashlib.sha256(content.encode("ascii")).hexdigest()
+
+            if all(field.reference() is None or field.reference().is_resolved() for field in self._fields):
+                self._fingerprint = fingerprint
+            else:
+                self._fingerprint = None
+
+            return fingerprint
+
+        return self._fingerprint
+
+    def flatten(self, fields: List[Field]) -> 'Spec':
+        return Spec(self._out_dir, self._lang, fields, self._extends, self._mixins)
+
 
+#
+# a document marked with '"fragment": true' only provides fields to other specs through 'extends' or 'mixins',
+# it has no 'outDir' and 'lang'. any other document is a spec, so a misspelled key of a spec is reported
+def parse_document(conf: dict, fields: List[Field] = None) -> Union[Spec, Fragment]:
+    if conf.get("fragment", False) is True:
+        if "outDir" in conf or "lang" in conf:
+            raise ValueError("a fragment could not have 'outDir' or 'lang'")
 
-def parse_file(spec_file: str):
+        return Fragment.parse(conf, fields)
+
+    if "outDir" not in conf and "lang" not in conf:
+        raise ValueError("the document has neither 'outDir' nor 'lang', "
+                         "a document which only provides fields must be marked with '\"fragment\": true'")
+
+    return Spec.parse(conf, fields)
+
+
+#
+# reads the document at the current position of the stream, building each field as soon as it is decoded,
+# so that the raw field objects of a wide spec are never held all at once
+def read_document(stream: JSONStream) -> Tuple[dict, Optional[List[Field]]]:
+    conf = {}
+    fields = None
+
+    for key in stream.members():
+        if key == "fields":
+            fields = [Field.parse(stream.decode()) for _ in stream.elements()]
+        else:
+            conf[key] = stream.decode()
+
+    return conf, fields
+
+
+def parse_file(spec_file: str) -> Spec:
     with open(spec_file, "r", encoding='utf8') as fp:
-        spec_json = json.load(fp)
+        return Spec.parse(*read_document(JSONStream(fp)))
 
-    return Spec.parse(deepcopy(spec_json))
+
+def iter_file(spec_file: str) -> Iterator[Union[Spec, Fragment]]:
+    with open(spec_file, "r", encoding='utf8') as fp:
+        stream = JSONStream(fp)
+
+        for _ in stream.documents():
+            yield parse_document(*read_document(stream))
+
+
+#
+# later fields replace earlier ones with the same name, keeping the earlier position
+def merge_fields(field_lists: List[List[Field]]) -> List[Field]:
+    merged = []  # type: List[Field]
+    positions = {}  # type: Dict[str, int]
+
+    for fields in field_lists:
+        for field in fields:
+            if field.name() in positions:
+                merged[positions[field.name()]] = field
+            else:
+                positions[field.name()] = len(merged)
+                merged.append(field)
+
+    return merged
 
 
 def aggregate_groups_from_fields(fields: List[Field]) -> List[Tuple[int, str, List[Tuple[int, Field, Group]]]]:
-    bucket = {}  # type: Dict[str, Tuple[int, str, List[Tuple[int, Field, Group]]]]
+    return GroupIndex.build(fields).groups()
+
+
+class SpecDiff:
+    def __init__(self, old: Spec, new: Spec, added: List[str], removed: List[str], retyped: List[str],
+                 recommented: List[str], regrouped: List[str], moved: List[str], serializing_groups: Set[str],
+                 deserializing_groups: Set[str]):
+        self._old = old
+        self._new = new
+        self._added = added
+        self._removed = removed
+        self._retyped = retyped
+        self._recommented = recommented
+        self._regrouped = regrouped
+        self._moved = moved
+        self._serializing_groups = serializing_groups
+        self._deserializing_groups = deserializing_groups
+
+    def old(self) -> Spec:
+        return self._old
+
+    def new(self) -> Spec:
+        return self._new
+
+    def added(self) -> List[str]:
+        return self._added
+
+    def removed(self) -> List[str]:
+        return self._removed
+
+    def retyped(self) -> List[str]:
+        return self._retyped
+
+    def recommented(self) -> List[str]:
+        return self._recommented
+
+    def regrouped(self) -> List[str]:
+        return self._regrouped
+
+    #
+    # fields kept by both versions whose position changed
+    def moved(self) -> List[str]:
+        return self._moved
+
+    #
+    # whether the ordered names and types of the fields changed, which affects the whole-object (de)serializers
+    def fields_changed(self) -> bool:
+        return len(self._added) > 0 or len(self._removed) > 0 or len(self._retyped) > 0 or len(self._moved) > 0
+
+    #
+    # groups whose serializer output changed, including groups that were added or removed
+    def serializing_groups(self) -> Set[str]:
+        return self._serializing_groups
+
+    #
+    # groups whose deserializer output changed, including groups that were added or removed
+    def deserializing_groups(self) -> Set[str]:
+        return self._deserializing_groups
+
+    def out_dir_changed(self) -> bool:
+        return self._old.out_dir() != self._new.out_dir()
+
+    def is_empty(self) -> bool:
+        return not self.fields_changed() and len(self._recommented) == 0 and len(self._regrouped) == 0 \
+            and len(self._serializing_groups) == 0 and len(self._deserializing_groups) == 0 \
+            and not self.out_dir_changed()
+
+
+def diff(old: Spec, new: Spec) -> SpecDiff:
+    added = [field.name() for field in new.fields() if old.position(field.name()) is None]
+    removed = [field.name() for field in old.fields() if new.position(field.name()) is None]
+    retyped = []
+    recommented = []
+    regrouped = []
+    moved = []
+    # the groups a regrouped field left or joined, both of which are rendered differently
+    moved_groups = set()  # type: Set[str]
+
+    for pos, field in enumerate(new.fields()):
+        old_pos = old.position(field.name())
+
+        if old_pos is None:
+            continue
+
+        old_field = old.fields()[old_pos]
+
+        if type_signature(old_field) != type_signature(field):
+            retyped.append(field.name())
+
+        if old_field.comment() != field.comment():
+            recommented.append(field.name())
+
+        if group_members(old_field) != group_members(field):
+            regrouped.append(field.name())
+            moved_groups.update(name for name, _ in group_members(old_field))
+            moved_groups.update(name for name, _ in group_members(field))
+
+        if old_pos != pos:
+            moved.append(field.name())
+
+    serializing_groups = set(moved_groups)
+    deserializing_groups = set(moved_groups)
+
+    for name in set(old.group_index().names()) | set(new.group_index().names()):
+        old_bucket = old.group_index().group(name)
+        new_bucket = new.group_index().group(name)
+
+        if serializing_signature(old_bucket) != serializing_signature(new_bucket):
+            serializing_groups.add(name)
+
+        if deserializing_signature(old_bucket) != deserializing_signature(new_bucket):
+            deserializing_groups.add(name)
+
+    return SpecDiff(
+        old, new, added, removed, retyped, recommented, regrouped, moved, serializing_groups, deserializing_groups
+    )
+
+
+#
+# the type of a field along with the class of the spec it references, if it is resolved,
+# so that retargeting a reference by changing the referenced spec is a change of the type
+def type_signature(field: Field) -> tuple:
+    reference = field.reference()
+
+    if reference is None or not reference.is_resolved():
+        return field.type(), None
+
+    return field.type(), json.dumps(reference.spec().lang().canonical(), sort_keys=True)
+
+
+def group_members(field: Field) -> List[Tuple[str, str]]:
+    return [(group.name(), group.member()) for group in field.groups()] if field.groups() is not None else []
+
+
+def serializing_signature(bucket: Optional[GroupBucket]) -> Optional[list]:
+    if bucket is None:
+        return None
 
-    n = len(fields)
-    for pos in range(n):
-        field = fields[pos]
+    return [(field.name(), type_signature(field), group.member()) for _, field, group in bucket[2]]
 
-        if field.groups() is not None:
-            for group in field.groups():
-                if group.name() not in bucket:
-                    bucket[group.name()] = (n, group.name(), [])
 
-                bucket[group.name()][2].append((pos, field, group))
+def deserializing_signature(bucket: Optional[GroupBucket]) -> Optional[tuple]:
+    if bucket is None:
+        return None
 
-    return list(bucket.values())
+    return bucket[0], [(pos, type_signature(field), group.member()) for pos, field, group in bucket[2]]
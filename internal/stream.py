@@ -0,0 +1,124 @@
+import json
+import re
+from typing import IO, Any, Iterator, Optional
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class JSONStream:
+    def __init__(self, fp: IO, chunk_size: int = 65536):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def peek(self) -> Optional[str]:
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+
+            if not self._fill():
+                return None
+
+    def accept(self, char: str) -> bool:
+        if self.peek() != char:
+            return False
+
+        self._pos += 1
+
+        return True
+
+    def expect(self, char: str) -> None:
+        if not self.accept(char):
+            raise ValueError("expect '{0}', but '{1}' is given".format(char, self.peek()))
+
+    def decode(self) -> Any:
+        if self.peek() is None:
+            raise ValueError("unexpected end of stream")
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # a number at the end of the buffer may be continued by the next chunk
+            if end == len(self._buffer) and not self._eof and not isinstance(value, (dict, list, str)):
+                self._fill()
+                continue
+
+            self._pos = end
+
+            return value
+
+    #
+    # yields once per element of the array at the current position,
+    # the caller is expected to consume exactly one value on each step
+    def elements(self) -> Iterator[None]:
+        self.expect('[')
+
+        if self.accept(']'):
+            return
+
+        while True:
+            yield None
+
+            if not self.accept(','):
+                self.expect(']')
+                return
+
+    #
+    # yields the key of each member of the object at the current position,
+    # the caller is expected to consume exactly one value on each step
+    def members(self) -> Iterator[str]:
+        self.expect('{')
+
+        if self.accept('}'):
+            return
+
+        while True:
+            key = self.decode()
+
+            if not isinstance(key, str):
+                raise ValueError("expect a string key, but '{0}' is given".format(key))
+
+            self.expect(':')
+
+            yield key
+
+            if not self.accept(','):
+                self.expect('}')
+                return
+
+    #
+    # yields once per top-level document, a stream may hold a single document,
+    # an array of documents, or documents separated by whitespace (JSON Lines)
+    def documents(self) -> Iterator[None]:
+        while self.peek() is not None:
+            if self.peek() == '[':
+                yield from self.elements()
+            else:
+                yield None
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+
+        # read at least as much as is pending, so that re-decoding a large value is amortized
+        pending = len(self._buffer) - self._pos
+        chunk = self._fp.read(max(self._chunk_size, pending))
+
+        if not chunk:
+            self._eof = True
+            return False
+
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+
+        return True
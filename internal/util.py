@@ -1,3 +1,4 @@
+from sys import intern
 
 
 def upper_first(s: str):
@@ -10,3 +11,17 @@ def check_key(d: dict, key: str, desc: str = None) -> None:
 
     if key not in d:
         raise KeyError("'{0}' is missing".format(desc))
+
+
+#
+# the string under the key, interned so that equal strings of all of the specs share one object
+def intern_key(d: dict, key: str, desc: str = None) -> str:
+    if desc is None:
+        desc = key
+
+    value = d[key]
+
+    if not isinstance(value, str):
+        raise ValueError("'{0}' must be a string, but {1} is given".format(desc, type(value).__name__))
+
+    return intern(value)
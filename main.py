@@ -4,14 +4,31 @@ from os import path
 from glob import glob
 from colorama import Fore
 
-from internal import spec
+from internal.resolver import SpecResolver
+from internal.spec import Spec
+from internal.codegen import Generator
+from internal.codegen.common.cache import RenderCache, IncrementalCache
+from internal.codegen.common.plan import RenderPlans
+from internal.codegen.common.profile import PrintProfiler
 from internal.codegen.php import PHPGenerator
 from internal.codegen.ts import TSGenerator
 
 
 def main():
-    lang = sys.argv[1] if len(sys.argv) >= 2 else ''
-    spec_dir = sys.argv[2] if len(sys.argv) >= 3 else ''
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+
+    lang = args[0] if len(args) >= 1 else ''
+    spec_dir = args[1] if len(args) >= 2 else ''
+
+    # reuse the output of structurally identical nodes across all of the files generated by this run
+    render_cache = RenderCache() if "--cache" in options else None
+    # time and output of every printer class across all of the generated files
+    profiler = PrintProfiler() if "--profile" in options else None
+    # print classes of a shape which has been printed before by filling their strings into a plan
+    render_plans = RenderPlans() if "--plans" in options else None
+    # reuse the output of nodes which have not been modified since they were last printed
+    incremental_cache = IncrementalCache() if "--incremental" in options else None
 
     if not lang:
         print(
@@ -24,9 +41,9 @@ def main():
         return
 
     if lang == 'php':
-        gen = PHPGenerator()
+        gen = PHPGenerator(render_cache, profiler, render_plans, incremental_cache)
     elif lang == "ts":
-        gen = TSGenerator()
+        gen = TSGenerator(render_cache, profiler, render_plans, incremental_cache)
     else:
         print(
             Fore.RED + "[FAIL] unsupported lang '{0}'".format(lang) + Fore.RESET)
@@ -34,30 +51,54 @@ def main():
 
     spec_dir = path.abspath(spec_dir)
 
-    spec_pattern = path.join(spec_dir, "**", "*.json")
-    print(Fore.GREEN +
-          "[DEBUG] using pattern '{0}' for search".format(spec_pattern) + Fore.RESET)
+    spec_patterns = [path.join(spec_dir, "**", "*.json"), path.join(spec_dir, "**", "*.jsonl")]
+    spec_files = []
+
+    for spec_pattern in spec_patterns:
+        print(Fore.GREEN +
+              "[DEBUG] using pattern '{0}' for search".format(spec_pattern) + Fore.RESET)
 
-    spec_files = glob(spec_pattern, recursive=True)
+        spec_files.extend(glob(spec_pattern, recursive=True))
 
     print(Fore.CYAN +
-          "[INFO] {0} spec(s) was found".format(len(spec_files)) + Fore.RESET)
+          "[INFO] {0} spec file(s) was found".format(len(spec_files)) + Fore.RESET)
     for spec_file in spec_files:
         print(Fore.CYAN + "       {0}".format(spec_file) + Fore.RESET)
 
+    resolver = SpecResolver()
+
+    # specs without references are generated as they are read, the others once every file has been read
     for spec_file in spec_files:
-        sp = spec.parse_file(spec_file)
+        for sp in resolver.stream(spec_file):
+            generate(gen, sp)
+
+    for sp in resolver.order():
+        generate(gen, sp)
+
+    if render_cache is not None:
+        print(Fore.GREEN + "[DEBUG] render cache: {0}".format(render_cache.stats()) + Fore.RESET)
 
-        if not path.isdir(sp.out_dir()):
-            os.makedirs(sp.out_dir())
-            print(
-                Fore.YELLOW + "[WARN] output directory '{0}' has been created".format(sp.out_dir()) + Fore.RESET)
+    if render_plans is not None:
+        print(Fore.GREEN + "[DEBUG] render plans: {0}".format(render_plans.stats()) + Fore.RESET)
+
+    if incremental_cache is not None:
+        print(Fore.GREEN + "[DEBUG] incremental cache: {0}".format(incremental_cache.stats()) + Fore.RESET)
+
+    if profiler is not None:
+        print(Fore.GREEN + "[DEBUG] printer profile:\n{0}".format(profiler.report()) + Fore.RESET)
+
+
+def generate(gen: Generator, sp: Spec) -> None:
+    if not path.isdir(sp.out_dir()):
+        os.makedirs(sp.out_dir())
+        print(
+            Fore.YELLOW + "[WARN] output directory '{0}' has been created".format(sp.out_dir()) + Fore.RESET)
 
-        out_dir = path.abspath(sp.out_dir())
-        out_file = path.join(out_dir, "{0}{1}".format(gen.get_clazz(sp), gen.get_extension()))
+    out_dir = path.abspath(sp.out_dir())
+    out_file = path.join(out_dir, "{0}{1}".format(gen.get_clazz(sp), gen.get_extension()))
 
-        with open(out_file, "w", encoding="utf-8") as fp:
-            gen.generate(sp, fp)
+    with open(out_file, "w", encoding="utf-8") as fp:
+        gen.generate(sp, fp)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,51 @@
+import unittest
+
+from internal.codegen.common.util import ListCollection
+
+
+class ListCollectionTest(unittest.TestCase):
+    def test_elements_keep_their_contents_after_add(self):
+        collection = ListCollection([1, 2])
+        elements = collection.elements()
+        collection.add(3)
+
+        self.assertEqual([1, 2], elements)
+        self.assertEqual([1, 2, 3], collection.elements())
+
+    def test_elements_keep_their_contents_after_remove(self):
+        collection = ListCollection([1, 2, 3])
+        elements = collection.elements()
+        collection.remove(2)
+
+        self.assertEqual([1, 2, 3], elements)
+        self.assertEqual([1, 3], collection.elements())
+
+    def test_list_of_the_caller_is_not_modified(self):
+        source = [1, 2]
+        collection = ListCollection(source)
+        collection.add(3)
+
+        self.assertEqual([1, 2], source)
+
+    def test_clones_are_modified_independently(self):
+        collection = ListCollection([1])
+        clone = collection.clone()
+        collection.add(2)
+        clone.add(3)
+
+        self.assertEqual([1, 2], collection.elements())
+        self.assertEqual([1, 3], clone.elements())
+
+    def test_elements_are_shared_until_modified(self):
+        collection = ListCollection([1, 2])
+
+        self.assertIs(collection.elements(), collection.elements())
+
+    def test_lazy_map_and_filter(self):
+        collection = ListCollection([1, 2, 3, 4])
+
+        self.assertEqual([20, 40], collection.lazy().filter(lambda x: x % 2 == 0).map(lambda x: x * 10).collect().elements())
+
+
+if __name__ == '__main__':
+    unittest.main()
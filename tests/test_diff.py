@@ -0,0 +1,80 @@
+import unittest
+
+from internal.spec import Spec, diff
+
+
+def spec(fields: list, out_dir: str = "out") -> Spec:
+    return Spec.parse({"outDir": out_dir, "lang": {"php": {"namespace": "A", "clazz": "S"}}, "fields": fields})
+
+
+def field(name: str, typ: str = "integer", comment: str = None, groups: list = None) -> dict:
+    conf = {"name": name, "type": typ, "comment": comment}
+
+    if groups is not None:
+        conf["groups"] = [{"name": group, "member": member} for group, member in groups]
+
+    return conf
+
+
+class DiffTest(unittest.TestCase):
+    def test_identical_specs(self):
+        changes = diff(spec([field("a"), field("b")]), spec([field("a"), field("b")]))
+
+        self.assertTrue(changes.is_empty())
+        self.assertFalse(changes.fields_changed())
+
+    def test_added_and_removed(self):
+        changes = diff(spec([field("a"), field("b")]), spec([field("a"), field("c")]))
+
+        self.assertEqual(["c"], changes.added())
+        self.assertEqual(["b"], changes.removed())
+        self.assertTrue(changes.fields_changed())
+
+    def test_retyped(self):
+        changes = diff(spec([field("a"), field("b")]), spec([field("a"), field("b", "string")]))
+
+        self.assertEqual(["b"], changes.retyped())
+        self.assertEqual([], changes.added())
+        self.assertTrue(changes.fields_changed())
+
+    def test_recommented(self):
+        changes = diff(spec([field("a")]), spec([field("a", comment="the a")]))
+
+        self.assertEqual(["a"], changes.recommented())
+        self.assertFalse(changes.fields_changed())
+        self.assertFalse(changes.is_empty())
+
+    def test_moved(self):
+        changes = diff(spec([field("a"), field("b"), field("c")]), spec([field("b"), field("a"), field("c")]))
+
+        self.assertEqual(["b", "a"], changes.moved())
+        self.assertEqual([], changes.added() + changes.removed() + changes.retyped())
+        self.assertTrue(changes.fields_changed())
+
+    def test_regrouped(self):
+        old = spec([field("a", groups=[("g", "x")]), field("b", groups=[("g", "y")])])
+        new = spec([field("a", groups=[("h", "x")]), field("b", groups=[("g", "y")])])
+        changes = diff(old, new)
+
+        self.assertEqual(["a"], changes.regrouped())
+        self.assertEqual({"g", "h"}, changes.serializing_groups())
+        self.assertEqual({"g", "h"}, changes.deserializing_groups())
+        self.assertFalse(changes.fields_changed())
+
+    def test_retyped_member_changes_its_group_only(self):
+        old = spec([field("a", groups=[("g", "x")]), field("b", groups=[("h", "y")])])
+        new = spec([field("a", "string", groups=[("g", "x")]), field("b", groups=[("h", "y")])])
+        changes = diff(old, new)
+
+        self.assertEqual({"g"}, changes.serializing_groups())
+        self.assertEqual({"g"}, changes.deserializing_groups())
+
+    def test_out_dir_changed(self):
+        changes = diff(spec([field("a")]), spec([field("a")], "other"))
+
+        self.assertTrue(changes.out_dir_changed())
+        self.assertFalse(changes.is_empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
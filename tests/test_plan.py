@@ -0,0 +1,57 @@
+import io
+import unittest
+
+from internal.codegen.common.plan import RenderPlans
+from internal.codegen.php import PHPGenerator
+from internal.codegen.php.ast import Identifier
+from internal.codegen.php.grammer import ClassDeclaration, BlankLineStatement
+from internal.spec import Spec
+
+
+def spec(clazz: str, names: list, comment: str = None) -> Spec:
+    return Spec.parse({
+        "outDir": "out",
+        "lang": {"php": {"namespace": "App", "clazz": clazz}},
+        "fields": [
+            {"name": name, "type": "string", "comment": comment, "groups": [{"name": "api", "member": name + "_"}]}
+            for name in names
+        ],
+    })
+
+
+def render(specs: list, render_plans: RenderPlans = None) -> str:
+    gen = PHPGenerator(render_plans=render_plans)
+    fp = io.StringIO()
+
+    for sp in specs:
+        gen.generate(sp, fp)
+
+    return fp.getvalue()
+
+
+class RenderPlansTest(unittest.TestCase):
+    def test_classes_of_the_same_shape_share_a_plan(self):
+        specs = [spec("A", ["a", "b"]), spec("Bb", ["cc", "d"]), spec("Ccc", ["e" * 60, "f" * 70])]
+        render_plans = RenderPlans()
+
+        self.assertEqual(render(specs), render(specs, render_plans))
+        self.assertEqual(1, render_plans.stats().compiled())
+        self.assertEqual(1, render_plans.stats().hits())
+
+    def test_classes_of_another_shape_are_printed(self):
+        specs = [spec("A", ["a"]), spec("B", ["b"]), spec("C", ["c"], "the c"), spec("D", ["d", "e"])]
+        render_plans = RenderPlans()
+
+        self.assertEqual(render(specs), render(specs, render_plans))
+        self.assertEqual(1, render_plans.stats().compiled())
+        self.assertEqual(0, render_plans.stats().hits())
+
+    def test_adding_a_field_forgets_the_shape(self):
+        clazz = ClassDeclaration(Identifier("A"), [], ())
+        clazz.add_field(BlankLineStatement())
+
+        self.assertIsNone(clazz.shape())
+
+
+if __name__ == '__main__':
+    unittest.main()
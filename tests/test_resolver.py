@@ -0,0 +1,123 @@
+import json
+import shutil
+import tempfile
+import unittest
+from os import path
+
+from internal.resolver import SpecResolver
+
+
+class SpecResolverTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name: str, document: dict) -> str:
+        spec_file = path.join(self.directory, name)
+
+        with open(spec_file, "w") as fp:
+            json.dump(document, fp)
+
+        return spec_file
+
+    def fragment(self, name: str, fields: list, **bases) -> str:
+        return self.write(name, {"fragment": True, "fields": fields, **bases})
+
+    def spec(self, name: str, fields: list, **bases) -> str:
+        document = {"outDir": "out", "lang": {"php": {"namespace": "A", "clazz": name.split(".")[0]}}}
+
+        return self.write(name, {**document, "fields": fields, **bases})
+
+    def test_specs_are_ordered_after_the_specs_they_reference(self):
+        a = self.spec("A.json", [{"name": "b", "type": "ref:B.json"}])
+        b = self.spec("B.json", [{"name": "c", "type": "ref:C.json"}])
+        c = self.spec("C.json", [{"name": "x", "type": "integer"}])
+        resolver = SpecResolver()
+
+        streamed = [spec for spec_file in [a, b, c] for spec in resolver.stream(spec_file)]
+
+        self.assertEqual(["C"], [spec.lang().php().clazz() for spec in streamed])
+        self.assertEqual(["B", "A"], [spec.lang().php().clazz() for spec in resolver.order()])
+
+    def test_references_between_documents_of_one_file(self):
+        spec_file = path.join(self.directory, "S.json")
+        document = {"outDir": "out", "fields": []}
+
+        with open(spec_file, "w") as fp:
+            json.dump([
+                {**document, "lang": {"php": {"namespace": "A", "clazz": "A"}},
+                 "fields": [{"name": "b", "type": "ref:S.json#1"}]},
+                {**document, "lang": {"php": {"namespace": "A", "clazz": "B"}},
+                 "fields": [{"name": "c", "type": "ref:S.json#2"}]},
+                {**document, "lang": {"php": {"namespace": "A", "clazz": "C"}}},
+            ], fp)
+
+        resolver = SpecResolver()
+
+        self.assertEqual(["B"], [spec.lang().php().clazz() for spec in resolver.dependencies(spec_file)])
+        self.assertEqual(["C"], [spec.lang().php().clazz() for spec in resolver.dependencies(spec_file, 1)])
+        self.assertEqual([], resolver.dependencies(spec_file, 2))
+
+    def test_cyclic_reference(self):
+        a = self.spec("A.json", [{"name": "b", "type": "ref:B.json"}])
+        b = self.spec("B.json", [{"name": "a", "type": "ref:A.json"}])
+        resolver = SpecResolver()
+
+        for spec_file in [a, b]:
+            self.assertEqual([], list(resolver.stream(spec_file)))
+
+        with self.assertRaisesRegex(ValueError, r"cyclic reference: .*A\.json#0 -> .*B\.json#0 -> .*A\.json#0"):
+            resolver.order()
+
+    def test_override_survives_a_mixin_sharing_the_ancestor(self):
+        self.fragment("f1.json", [{"name": "a", "type": "integer"}, {"name": "b", "type": "integer"}])
+        self.fragment("f2.json", [{"name": "b", "type": "string"}], extends="f1.json")
+        self.fragment("f3.json", [{"name": "c", "type": "float"}], extends="f1.json")
+        spec_file = self.spec("S.json", [], extends="f2.json", mixins=["f3.json"])
+
+        fields = SpecResolver().flatten(spec_file)
+
+        self.assertEqual([("a", "integer"), ("b", "string"), ("c", "float")],
+                         [(field.name(), field.type()) for field in fields])
+
+    def test_shared_ancestor_comes_after_its_descendants(self):
+        f1 = self.fragment("f1.json", [])
+        f2 = self.fragment("f2.json", [], extends="f1.json")
+        f3 = self.fragment("f3.json", [], extends="f1.json")
+        spec_file = self.spec("S.json", [], extends="f2.json", mixins=["f3.json"])
+
+        keys = [spec_file, f3, f2, f1]
+
+        self.assertEqual([(key, 0) for key in keys], SpecResolver().linearize(spec_file))
+
+    def test_cyclic_inheritance(self):
+        self.fragment("f1.json", [], extends="f2.json")
+        self.fragment("f2.json", [], mixins=["f1.json"])
+        spec_file = self.spec("S.json", [], extends="f1.json")
+
+        with self.assertRaisesRegex(ValueError, r"cyclic inheritance: .*f1\.json#0 -> .*f2\.json#0 -> .*f1\.json#0"):
+            SpecResolver().flatten(spec_file)
+
+    def test_fields_of_a_base_are_inherited_before_its_own(self):
+        self.fragment("f1.json", [{"name": "a", "type": "integer"}, {"name": "b", "type": "integer"}])
+        spec_file = self.spec("S.json", [{"name": "c", "type": "string"}, {"name": "a", "type": "float"}],
+                              extends="f1.json")
+
+        fields = SpecResolver().flatten(spec_file)
+
+        self.assertEqual([("a", "float"), ("b", "integer"), ("c", "string")],
+                         [(field.name(), field.type()) for field in fields])
+
+    def test_inconsistent_order_of_bases(self):
+        self.fragment("f1.json", [])
+        self.fragment("f2.json", [], extends="f1.json")
+        spec_file = self.spec("S.json", [], extends="f2.json", mixins=["f1.json"])
+
+        with self.assertRaisesRegex(ValueError, "inconsistent inheritance"):
+            SpecResolver().flatten(spec_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
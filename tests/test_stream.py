@@ -0,0 +1,75 @@
+import io
+import unittest
+
+from internal.stream import JSONStream
+
+
+def decode_documents(text: str, chunk_size: int = 65536) -> list:
+    stream = JSONStream(io.StringIO(text), chunk_size)
+
+    return [stream.decode() for _ in stream.documents()]
+
+
+class JSONStreamTest(unittest.TestCase):
+    def test_single_document(self):
+        self.assertEqual([{"a": 1}], decode_documents('{"a": 1}\n'))
+
+    def test_array_of_documents(self):
+        self.assertEqual([{"a": 1}, {"b": 2}], decode_documents('[{"a": 1}, {"b": 2}]'))
+
+    def test_json_lines(self):
+        self.assertEqual([{"a": 1}, {"b": 2}], decode_documents('{"a": 1}\n{"b": 2}\n'))
+
+    def test_empty_stream(self):
+        self.assertEqual([], decode_documents(' \n'))
+        self.assertEqual([], decode_documents('[]'))
+
+    def test_values_split_across_chunks(self):
+        text = '[{"name": "abcdef"}, 1234567, [1.5, 2.25]]'
+
+        for chunk_size in range(1, 8):
+            self.assertEqual([{"name": "abcdef"}, 1234567, [1.5, 2.25]], decode_documents(text, chunk_size))
+
+    def test_members(self):
+        stream = JSONStream(io.StringIO('{"a": 1, "b": [2]}'), 3)
+        members = {key: stream.decode() for key in stream.members()}
+
+        self.assertEqual({"a": 1, "b": [2]}, members)
+        self.assertIsNone(stream.peek())
+
+    def test_unterminated_array(self):
+        with self.assertRaisesRegex(ValueError, "expect ']', but 'None' is given"):
+            decode_documents('[{"a": 1}')
+
+    def test_missing_separator(self):
+        with self.assertRaisesRegex(ValueError, "expect ']', but '2' is given"):
+            decode_documents('[1 2]')
+
+    def test_trailing_comma(self):
+        with self.assertRaises(ValueError):
+            decode_documents('[1, ]')
+
+    def test_trailing_garbage(self):
+        with self.assertRaises(ValueError):
+            decode_documents('{"a": 1} x')
+
+    def test_truncated_document(self):
+        with self.assertRaises(ValueError):
+            decode_documents('{"a": ', 2)
+
+    def test_unexpected_end_of_stream(self):
+        stream = JSONStream(io.StringIO('{"a": '))
+
+        with self.assertRaisesRegex(ValueError, "unexpected end of stream"):
+            for _ in stream.members():
+                stream.decode()
+
+    def test_key_must_be_a_string(self):
+        stream = JSONStream(io.StringIO('{1: 2}'))
+
+        with self.assertRaisesRegex(ValueError, "expect a string key, but '1' is given"):
+            list(stream.members())
+
+
+if __name__ == '__main__':
+    unittest.main()